@@ -1,8 +1,19 @@
+import re
 import time
+import random
+import threading
 import requests
 import logging
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
 from typing import Optional
-from app.core.config import JEB_API_BASE_URL, JEB_API_KEY, JEB_API_TIMEOUT
+from requests.adapters import HTTPAdapter
+from app.core.config import (
+    JEB_API_BASE_URL, JEB_API_KEY, JEB_API_TIMEOUT, JEB_API_RETRIES, JEB_API_BACKOFF,
+    JEB_API_MAX_BACKOFF, JEB_API_CIRCUIT_THRESHOLD, JEB_API_CIRCUIT_COOLDOWN, SYNC_WORKERS,
+)
+
+REQUEST_SLEEP = 0.010
 
 class UpstreamHTTPError(Exception):
     def __init__(self, status: int, text: str):
@@ -10,42 +21,201 @@ class UpstreamHTTPError(Exception):
         self.status = status
         self.text = text
 
+class CircuitOpenError(UpstreamHTTPError):
+    def __init__(self, retry_in: float):
+        super().__init__(503, f"JEB API circuit open, retry in {retry_in:.1f}s")
+
+class RateLimiter:
+    """Spaces requests from every thread at least `interval` apart.
+    A 429 pushes the next free slot back for all threads at once."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def backoff(self, seconds: float):
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
+
+class RetryBudget:
+    """Caps retries to a fraction of recent traffic so an upstream outage
+    cannot multiply our request volume: each request earns `ratio` of a
+    token, each retry spends one."""
+
+    def __init__(self, ratio: float = 0.2, initial: float = 10.0, cap: float = 50.0):
+        self.ratio = ratio
+        self.cap = cap
+        self._tokens = initial
+        self._lock = threading.Lock()
+
+    def on_request(self):
+        with self._lock:
+            self._tokens = min(self.cap, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `cooldown` one
+    trial request is let through and closes it again on success."""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self.state == "open" and remaining <= 0:
+                self.state = "half_open"
+                return
+            raise CircuitOpenError(max(remaining, 0.0))
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.threshold:
+                if self.state != "open":
+                    logging.warning(f"JEB API circuit opened after {self._failures} failures")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
 _session = requests.Session()
 _session.headers.update({"X-Group-Authorization": JEB_API_KEY})
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=SYNC_WORKERS + 4)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+rate_limiter = RateLimiter(REQUEST_SLEEP)
+retry_budget = RetryBudget()
+breaker = CircuitBreaker(JEB_API_CIRCUIT_THRESHOLD, JEB_API_CIRCUIT_COOLDOWN)
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {"requests": 0, "errors": 0, "throttled": 0, "retries": 0,
+                              "total_ms": 0.0, "max_ms": 0.0})
 
 def _url(path: str) -> str:
     return f"{JEB_API_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
 
+def _endpoint(path: str) -> str:
+    return re.sub(r"/\d+(?=/|$)", "/{id}", "/" + path.strip("/"))
+
+def _record(endpoint: str, elapsed: float, error: bool = False, throttled: bool = False):
+    ms = elapsed * 1000
+    with _stats_lock:
+        s = _stats[endpoint]
+        s["requests"] += 1
+        s["errors"] += error
+        s["throttled"] += throttled
+        s["total_ms"] += ms
+        s["max_ms"] = max(s["max_ms"], ms)
+
+def stats() -> dict:
+    with _stats_lock:
+        endpoints = {
+            name: {**s, "avg_ms": round(s["total_ms"] / s["requests"], 2) if s["requests"] else 0.0,
+                   "total_ms": round(s["total_ms"], 2), "max_ms": round(s["max_ms"], 2)}
+            for name, s in _stats.items()
+        }
+    return {"circuit": breaker.state, "endpoints": endpoints}
+
+def _retry_delay(resp, attempt: int, backoff: float) -> float:
+    """Retry-After when the server sends one, else full-jitter exponential."""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if value:
+        try:
+            return min(float(value), JEB_API_MAX_BACKOFF)
+        except ValueError:
+            try:
+                return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0), JEB_API_MAX_BACKOFF)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(JEB_API_MAX_BACKOFF, backoff * (2 ** attempt)))
+
 def _request_with_retry(method: str, path: str, *,
                         params: Optional[dict] = None,
+                        headers: Optional[dict] = None,
                         stream: bool = False,
-                        retries: int = 2,
-                        backoff: float = 0.5):
+                        retries: int = JEB_API_RETRIES,
+                        backoff: float = JEB_API_BACKOFF):
 
     url = _url(path)
+    endpoint = _endpoint(path)
     last_exc = None
     for attempt in range(retries + 1):
+        breaker.before_request()
+        rate_limiter.wait()
+        retry_budget.on_request()
+        start = time.monotonic()
+        resp = None
+        upstream_alive = False
         try:
-            resp = _session.request(method, url, params=params, timeout=JEB_API_TIMEOUT, stream=stream)
-            if resp.status_code == 404:
-                return resp
+            resp = _session.request(method, url, params=params, headers=headers,
+                                    timeout=JEB_API_TIMEOUT, stream=stream)
+            upstream_alive = resp.status_code < 500
+        except requests.RequestException as e:
+            _record(endpoint, time.monotonic() - start, error=True)
+            last_exc = e
+        finally:
+            # Resolve every outcome, unexpected exceptions included, so a
+            # half-open trial never keeps the breaker's only slot. A 429
+            # still proves the upstream is alive.
+            if upstream_alive:
+                breaker.success()
+            else:
+                breaker.failure()
+        if resp is not None:
+            elapsed = time.monotonic() - start
             if resp.status_code == 429:
+                _record(endpoint, elapsed, throttled=True)
                 logging.warning(f"429 Too Many Requests on endpoint: {path} (attempt {attempt+1})")
-            if 500 <= resp.status_code < 600:
                 last_exc = UpstreamHTTPError(resp.status_code, resp.text)
-                if attempt < retries:
-                    time.sleep(backoff * (2 ** attempt))
-                    continue
-                raise last_exc
-            if not resp.ok:
-                raise UpstreamHTTPError(resp.status_code, resp.text)
-            return resp
-        except requests.RequestException as e:
-            last_exc = e
-            if attempt < retries:
-                time.sleep(backoff * (2 ** attempt))
-                continue
-            raise e
+            elif 500 <= resp.status_code < 600:
+                _record(endpoint, elapsed, error=True)
+                last_exc = UpstreamHTTPError(resp.status_code, resp.text)
+            else:
+                _record(endpoint, elapsed)
+                if resp.status_code in (304, 404) or resp.ok:
+                    return resp
+                error = UpstreamHTTPError(resp.status_code, resp.text)
+                resp.close()
+                raise error
+        if attempt == retries or not retry_budget.try_spend():
+            break
+        delay = _retry_delay(resp, attempt, backoff)
+        if resp is not None:
+            if resp.status_code == 429:
+                rate_limiter.backoff(delay)
+            resp.close()
+        with _stats_lock:
+            _stats[endpoint]["retries"] += 1
+        time.sleep(delay)
+    if resp is not None:
+        resp.close()
     raise last_exc or RuntimeError("Unknown upstream error")
 
 def get_page(path: str, params: dict | None = None) -> list[dict]:
@@ -61,5 +231,5 @@ def get_one(path: str) -> dict | None:
         return None
     return r.json()
 
-def get_stream(path: str, params: dict | None = None):
-    return _request_with_retry("GET", path, params=params, stream=True)
+def get_stream(path: str, params: dict | None = None, headers: dict | None = None):
+    return _request_with_retry("GET", path, params=params, headers=headers, stream=True)
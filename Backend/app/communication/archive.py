@@ -0,0 +1,97 @@
+import datetime
+import logging
+import time
+from typing import List, Optional
+from app.db.connection import get_connection
+from app.core.config import MESSAGE_ARCHIVE_AFTER_DAYS, MESSAGE_ARCHIVE_BATCH
+
+log = logging.getLogger(__name__)
+
+MESSAGE_COLUMNS = "id, conversation_id, sender_id, receiver_id, content, created_at"
+
+def archive_batch(cursor, cutoff: datetime.datetime, start_after: int, batch_size: int) -> List[int]:
+    """Move up to `batch_size` messages older than `cutoff` into
+    messages_archive, in id order after `start_after`. A conversation's last
+    message always stays hot so the pointer join and the inbox never need the
+    archive. Runs in the caller's transaction; returns the ids moved."""
+    cursor.execute(
+        "SELECT m.id FROM messages m JOIN conversations c ON c.id = m.conversation_id "
+        "WHERE m.id > %s AND m.created_at < %s AND m.id < c.last_message_id "
+        "ORDER BY m.id LIMIT %s",
+        (start_after, cutoff, batch_size))
+    ids = [row["id"] for row in cursor.fetchall()]
+    if not ids:
+        return ids
+    placeholders = ",".join(["%s"] * len(ids))
+    cursor.execute(
+        f"INSERT IGNORE INTO messages_archive ({MESSAGE_COLUMNS}) "
+        f"SELECT {MESSAGE_COLUMNS} FROM messages WHERE id IN ({placeholders})",
+        tuple(ids))
+    cursor.execute(
+        f"""
+        UPDATE conversations c
+        JOIN (SELECT conversation_id, MAX(id) AS id FROM messages
+              WHERE id IN ({placeholders}) GROUP BY conversation_id) moved
+          ON moved.conversation_id = c.id
+        SET c.archived_through_id = GREATEST(c.archived_through_id, moved.id)
+        """,
+        tuple(ids))
+    cursor.execute(f"DELETE FROM messages WHERE id IN ({placeholders})", tuple(ids))
+    return ids
+
+def archive_messages(older_than_days: int = MESSAGE_ARCHIVE_AFTER_DAYS,
+                     batch_size: int = MESSAGE_ARCHIVE_BATCH):
+    """Scheduled job: archive cold messages in short, separately committed
+    batches so the hot table is never locked for long."""
+    start = time.monotonic()
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=older_than_days)
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    archived = batches = 0
+    last_id = 0
+    try:
+        while True:
+            ids = archive_batch(cursor, cutoff, last_id, batch_size)
+            connection.commit()
+            if not ids:
+                break
+            archived += len(ids)
+            batches += 1
+            last_id = ids[-1]
+            if len(ids) < batch_size:
+                break
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        connection.close()
+    summary = {
+        "archived": archived,
+        "batches": batches,
+        "cutoff": cutoff.isoformat() + "Z",
+        "duration_ms": int((time.monotonic() - start) * 1000),
+    }
+    log.info({"message_archive": summary})
+    return summary
+
+def fetch_archived_range(cursor, conversation_id: int, before: Optional[int],
+                         after: Optional[int], limit: int):
+    """Archived messages of a conversation, same order as the hot reads:
+    ascending after `after`, otherwise descending before `before`."""
+    if after is not None:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages_archive "
+            "WHERE conversation_id = %s AND id > %s ORDER BY id ASC LIMIT %s",
+            (conversation_id, after, limit))
+    elif before is not None:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages_archive "
+            "WHERE conversation_id = %s AND id < %s ORDER BY id DESC LIMIT %s",
+            (conversation_id, before, limit))
+    else:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages_archive "
+            "WHERE conversation_id = %s ORDER BY id DESC LIMIT %s",
+            (conversation_id, limit))
+    return cursor.fetchall()
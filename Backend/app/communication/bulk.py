@@ -0,0 +1,102 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.communication.identity import identities, canonical_pair
+
+BULK_CHUNK_ROWS = 500
+
+def _chunks(rows: List[tuple], size: int = BULK_CHUNK_ROWS):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def resolve_recipients(cursor, emails: Iterable[str] = (), sector: Optional[str] = None,
+                       role: Optional[str] = None) -> Dict[int, str]:
+    """Recipient ids -> emails from an explicit list and/or filters, one
+    query per source."""
+    recipients = {u["id"]: email for email, u in identities.resolve(cursor, emails).items()} if emails else {}
+    if sector is not None:
+        cursor.execute(
+            "SELECT u.id, u.email FROM users u "
+            "JOIN founders f ON f.id = u.founder_id "
+            "JOIN startups s ON s.id = f.startup_id WHERE s.sector = %s",
+            (sector,))
+        recipients.update({row["id"]: row["email"] for row in cursor.fetchall()})
+    if role is not None:
+        cursor.execute("SELECT id, email FROM users WHERE role = %s", (role,))
+        recipients.update({row["id"]: row["email"] for row in cursor.fetchall()})
+    return recipients
+
+def existing_conversations(cursor, sender_id: int, recipient_ids: List[int]) -> Dict[int, int]:
+    """Recipient id -> id of their conversation with the sender, for those
+    that have one."""
+    conversations = {}
+    for chunk in _chunks(recipient_ids):
+        placeholders = ",".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"SELECT id, user1_id, user2_id FROM conversations "
+            f"WHERE (user1_id = %s AND user2_id IN ({placeholders})) "
+            f"OR (user2_id = %s AND user1_id IN ({placeholders}))",
+            (sender_id, *chunk, sender_id, *chunk))
+        for row in cursor.fetchall():
+            other = row["user2_id"] if row["user1_id"] == sender_id else row["user1_id"]
+            conversations[other] = row["id"]
+    return conversations
+
+def conversations_for(cursor, sender_id: int, recipient_ids: List[int]) -> Tuple[Dict[int, int], int]:
+    """Get-or-create the sender's conversation with every recipient in bulk.
+    Returns recipient id -> conversation id, and the number created. Only
+    pairs missing from the first lookup are inserted (rowcount can't tell:
+    found rows count as affected), so those are what "created" counts."""
+    conversations = existing_conversations(cursor, sender_id, recipient_ids)
+    missing = [r for r in recipient_ids if r not in conversations]
+    for chunk in _chunks([canonical_pair(sender_id, r) for r in missing]):
+        cursor.execute(
+            "INSERT INTO conversations (user1_id, user2_id) VALUES "
+            + ",".join(["(%s,%s)"] * len(chunk))
+            + " ON DUPLICATE KEY UPDATE id = id",
+            tuple(v for pair in chunk for v in pair))
+    if missing:
+        conversations.update(existing_conversations(cursor, sender_id, missing))
+    return conversations, len(missing)
+
+def send_bulk(cursor, sender_id: int, recipient_ids: List[int], content: str, preview: str) -> dict:
+    """Insert one message per recipient with multi-row INSERTs and move every
+    conversation's last-message pointer and unread counter in one UPDATE.
+    Runs in the caller's transaction; returns ids and timings."""
+    start = time.perf_counter()
+    conversations, created = conversations_for(cursor, sender_id, recipient_ids)
+    rows = [(conversations[r], sender_id, r, content) for r in recipient_ids]
+    for chunk in _chunks(rows):
+        cursor.execute(
+            "INSERT INTO messages (conversation_id, sender_id, receiver_id, content) VALUES "
+            + ",".join(["(%s,%s,%s,%s)"] * len(chunk)),
+            tuple(v for row in chunk for v in row))
+    latest = {}
+    conversation_ids = list(conversations.values())
+    for chunk in _chunks(conversation_ids):
+        placeholders = ",".join(["%s"] * len(chunk))
+        cursor.execute(
+            f"SELECT conversation_id, MAX(id) AS id FROM messages "
+            f"WHERE conversation_id IN ({placeholders}) GROUP BY conversation_id",
+            tuple(chunk))
+        pointers = {row["conversation_id"]: row["id"] for row in cursor.fetchall()}
+        latest.update(pointers)
+        # The pointers just read feed the UPDATE, so messages are aggregated once.
+        cursor.execute(
+            f"""
+            UPDATE conversations c
+            SET c.last_message_id = CASE c.id {" ".join(["WHEN %s THEN %s"] * len(pointers))} END,
+                c.last_sender_id = %s,
+                c.last_message_preview = %s, c.last_message_at = NOW(),
+                c.user1_unread = c.user1_unread + (c.user1_id <> %s),
+                c.user2_unread = c.user2_unread + (c.user2_id <> %s)
+            WHERE c.id IN ({",".join(["%s"] * len(pointers))})
+            """,
+            (*(v for pair in pointers.items() for v in pair), sender_id, preview, sender_id, sender_id,
+             *pointers))
+    seconds = time.perf_counter() - start
+    return {
+        "messages": {r: latest.get(conversations[r]) for r in recipient_ids},
+        "conversations": conversations,
+        "conversations_created": created,
+        "seconds": seconds,
+    }
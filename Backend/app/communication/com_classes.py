@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
 
 class Message(BaseModel):
     sender_email: str
@@ -13,6 +15,8 @@ class Recive_Message(BaseModel):
 class Read_message(BaseModel):
     sender_name: str
     content: str
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
 
 class Read_conversation_from(BaseModel):
     reader_email: str
@@ -22,4 +26,47 @@ class Conversation(BaseModel):
     conversation_id: int
     user_1_id: int
     user_2_id: int
-    last_update: float
\ No newline at end of file
+    last_update: float
+class Inbox_entry(BaseModel):
+    conversation_id: int
+    user_id: int
+    name: Optional[str] = None
+    email: str
+    last_message_id: int
+    last_sender_id: int
+    last_message_preview: str
+    last_message_at: Optional[datetime] = None
+    unread: int = 0
+    other_last_read_id: int = 0
+
+class Read_receipt(BaseModel):
+    conversation_id: int
+    user_id: int
+    last_read_message_id: int
+    unread: int
+
+class Unread_total(BaseModel):
+    user_id: int
+    unread: int
+
+class Bulk_message(BaseModel):
+    sender_email: str
+    content_message: str
+    recipient_emails: List[str] = []
+    sector: Optional[str] = None
+    role: Optional[str] = None
+
+class Bulk_result(BaseModel):
+    recipients: int
+    conversations_created: int
+    unknown_emails: List[str] = []
+    duration_ms: int
+    messages_per_sec: float
+
+class Search_hit(BaseModel):
+    id: int
+    conversation_id: int
+    sender_id: int
+    created_at: Optional[datetime] = None
+    snippet: str
+    highlights: List[List[int]] = []
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Set
+from app.core.config import WS_SEND_QUEUE_SIZE
+
+log = logging.getLogger(__name__)
+
+class Subscription:
+    """One connected client: a bounded queue of events waiting to be sent.
+    A None in the queue tells the sender to close the connection."""
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+class MessageHub:
+    """In-process pub/sub from the send endpoints to WebSocket clients.
+
+    publish() is thread-safe (the send handlers run in the threadpool) and
+    never blocks: delivery is scheduled on the event loop. A subscriber whose
+    queue is full is disconnected instead of slowing everyone else down; it
+    reconnects and catches up with read_conversation?after=<id>."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subs: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: int) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        sub = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subs.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def publish(self, user_ids: Iterable[int], event: dict) -> int:
+        with self._lock:
+            targets = [sub for user_id in set(user_ids) for sub in self._subs.get(user_id, ())]
+            if targets:
+                self.published += 1
+        if not targets or self._loop is None:
+            return 0
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, targets, event)
+        except RuntimeError:
+            return 0
+        return len(targets)
+
+    def _deliver(self, targets, event: dict):
+        for sub in targets:
+            if sub.overflowed:
+                continue
+            try:
+                sub.queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                self.dropped += 1
+                log.warning(f"Dropping slow WebSocket subscriber for user {sub.user_id}")
+                while not sub.queue.empty():
+                    sub.queue.get_nowait()
+                sub.queue.put_nowait(None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._subs),
+                "connections": sum(len(subs) for subs in self._subs.values()),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+            }
+
+hub = MessageHub(WS_SEND_QUEUE_SIZE)
@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from app.core.config import IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+class IdentityCache:
+    """Short-lived cache of email -> {"id", "name"} for the messaging
+    handlers. Misses for one request are fetched with a single IN query."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, cursor, emails: Iterable[str]) -> Dict[str, dict]:
+        wanted = {normalize_email(e) for e in emails}
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for email in wanted:
+                entry = self._entries.get(email)
+                if entry and entry[1] > now:
+                    found[email] = entry[0]
+        missing = sorted(wanted - found.keys())
+        if missing:
+            placeholders = ",".join(["%s"] * len(missing))
+            cursor.execute(f"SELECT id, name, email FROM users WHERE email IN ({placeholders})", tuple(missing))
+            rows = cursor.fetchall()
+            with self._lock:
+                if len(self._entries) + len(rows) > self.max_entries:
+                    self._entries = {k: v for k, v in self._entries.items() if v[1] > now}
+                for row in rows:
+                    email = normalize_email(row["email"])
+                    found[email] = {"id": row["id"], "name": row["name"]}
+                    if len(self._entries) < self.max_entries:
+                        self._entries[email] = (found[email], now + self.ttl)
+        return found
+
+    def invalidate(self, email: Optional[str] = None):
+        with self._lock:
+            if email is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_email(email), None)
+
+identities = IdentityCache(IDENTITY_CACHE_TTL, IDENTITY_CACHE_SIZE)
+
+def canonical_pair(a: int, b: int) -> tuple:
+    """Conversations store their participants as (smaller id, larger id)."""
+    return (a, b) if a < b else (b, a)
+
+def find_conversation(cursor, a: int, b: int) -> Optional[dict]:
+    cursor.execute("SELECT id, archived_through_id FROM conversations WHERE user1_id = %s AND user2_id = %s",
+                   canonical_pair(a, b))
+    return cursor.fetchone()
+
+def get_or_create_conversation(cursor, a: int, b: int) -> int:
+    """Atomic insert-or-get on the unique (user1_id, user2_id) key."""
+    cursor.execute(
+        "INSERT INTO conversations (user1_id, user2_id) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)",
+        canonical_pair(a, b))
+    return cursor.lastrowid
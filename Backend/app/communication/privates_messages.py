@@ -1,55 +1,219 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import datetime
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
+from pydantic_core import to_json
+from typing import Optional
 from app.db.connection import get_connection
 from app.schemas.user import UserRegister, UserLogin, UserOut
-from app.communication.com_classes import Message, Read_message, Read_conversation_from
+from app.communication.com_classes import (
+    Message, Read_message, Read_conversation_from, Inbox_entry, Read_receipt, Unread_total,
+    Bulk_message, Bulk_result, Search_hit,
+)
+from app.communication.bulk import resolve_recipients, send_bulk
+from app.communication.search import search_messages
+from app.communication.archive import fetch_archived_range
+from app.routers.auth import get_current_user, require_admin
 from app.utils.security import hash_password, verify_password
+from app.utils.jwt import decode_access_token
+from app.communication.hub import hub, Subscription
+from app.communication.identity import identities, normalize_email, find_conversation, get_or_create_conversation
+from app.core.config import WS_SEND_TIMEOUT
 
 comm = APIRouter(prefix="/communication", tags=["communication"])
 
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+MESSAGE_PREVIEW_LENGTH = 255
+MAX_BULK_RECIPIENTS = 10000
+HISTORY_STREAM_BATCH = 500
+
+# Each branch walks its (userX_id, last_message_id) index backwards and stops
+# at LIMIT, so a page never sorts all of the user's conversations.
+INBOX_QUERY = """
+    SELECT c.id AS conversation_id, u.id AS user_id, u.name, u.email,
+           c.last_message_id, c.last_sender_id, c.last_message_preview, c.last_message_at,
+           c.unread, c.other_last_read_id
+    FROM (
+        (SELECT id, user2_id AS other_id, last_message_id, last_sender_id, last_message_preview, last_message_at,
+                user1_unread AS unread, user2_last_read_id AS other_last_read_id
+         FROM conversations
+         WHERE user1_id = %s AND last_message_id IS NOT NULL AND (%s IS NULL OR last_message_id < %s)
+         ORDER BY last_message_id DESC
+         LIMIT %s)
+        UNION ALL
+        (SELECT id, user1_id AS other_id, last_message_id, last_sender_id, last_message_preview, last_message_at,
+                user2_unread AS unread, user1_last_read_id AS other_last_read_id
+         FROM conversations
+         WHERE user2_id = %s AND last_message_id IS NOT NULL AND (%s IS NULL OR last_message_id < %s)
+         ORDER BY last_message_id DESC
+         LIMIT %s)
+    ) c
+    JOIN users u ON u.id = c.other_id
+    ORDER BY c.last_message_id DESC
+    LIMIT %s
+"""
+
+def current_user_id(user=Depends(get_current_user)) -> int:
+    """The authenticated user's id, from the token's `sub`."""
+    sub = str(user.get("sub", ""))
+    if not sub.isdigit():
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return int(sub)
+
+def own_user_id(user_id: int, me: int = Depends(current_user_id)) -> int:
+    """`user_id` from the path, which must be the authenticated user."""
+    if user_id != me:
+        raise HTTPException(status_code=403, detail="permission denied")
+    return user_id
+
+def resolve_pair(cursor, first_email: str, second_email: str,
+                 first_missing: str, second_missing: str, same_user: str):
+    """Both users of a conversation from one (cached) lookup."""
+    users = identities.resolve(cursor, (first_email, second_email))
+    first = users.get(normalize_email(first_email))
+    if not first:
+        raise HTTPException(status_code=501, detail=first_missing)
+    second = users.get(normalize_email(second_email))
+    if not second:
+        raise HTTPException(status_code=501, detail=second_missing)
+    if first['id'] == second['id']:
+        raise HTTPException(status_code=501, detail=same_user)
+    return first, second
+
+def record_message(cursor, conversation_id: int, sender_id: int, receiver_id: int, content: str) -> int:
+    """Insert a message, bump the receiver's unread counter and move the
+    conversation's last-message pointer to it. Runs in the caller's
+    transaction; the pointer never moves backwards."""
+    cursor.execute(
+        "INSERT INTO messages (conversation_id, sender_id, receiver_id, content) VALUES (%s, %s, %s, %s)",
+        (conversation_id, sender_id, receiver_id, content,))
+    message_id = cursor.lastrowid
+    cursor.execute(
+        "UPDATE conversations SET user1_unread = user1_unread + (user1_id = %s), "
+        "user2_unread = user2_unread + (user2_id = %s) WHERE id = %s",
+        (receiver_id, receiver_id, conversation_id,))
+    cursor.execute(
+        "UPDATE conversations SET last_message_id = %s, last_sender_id = %s, "
+        "last_message_preview = %s, last_message_at = NOW() "
+        "WHERE id = %s AND (last_message_id IS NULL OR last_message_id < %s)",
+        (message_id, sender_id, content[:MESSAGE_PREVIEW_LENGTH], conversation_id, message_id,))
+    return message_id
+
+def publish_message(conversation_id: int, message_id: int, sender_id: int, receiver_id: int, content: str):
+    """Push a committed message to both participants' open WebSockets."""
+    hub.publish((sender_id, receiver_id), {
+        "type": "message",
+        "conversation_id": conversation_id,
+        "id": message_id,
+        "sender_id": sender_id,
+        "receiver_id": receiver_id,
+        "content": content,
+        "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+    })
+
+def fetch_last_message(cursor, conversation_id: int):
+    """Last message of a conversation through its pointer: one primary key lookup."""
+    cursor.execute(
+        "SELECT m.id, m.sender_id, m.content, m.created_at FROM conversations c "
+        "JOIN messages m ON m.id = c.last_message_id WHERE c.id = %s",
+        (conversation_id,))
+    last_message = cursor.fetchone()
+    if not last_message:
+        raise HTTPException(status_code=501,
+            detail="No message in this conversation yet.")
+    return last_message
+
+def _hot_range(cursor, conversation_id: int, before: Optional[int], after: Optional[int], limit: int):
+    if after is not None:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages "
+            "WHERE conversation_id = %s AND id > %s ORDER BY id ASC LIMIT %s",
+            (conversation_id, after, limit))
+    elif before is not None:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages "
+            "WHERE conversation_id = %s AND id < %s ORDER BY id DESC LIMIT %s",
+            (conversation_id, before, limit))
+    else:
+        cursor.execute(
+            "SELECT id, sender_id, content, created_at FROM messages "
+            "WHERE conversation_id = %s ORDER BY id DESC LIMIT %s",
+            (conversation_id, limit))
+    return cursor.fetchall()
+
+def fetch_message_page(cursor, conversation_id: int, before: Optional[int] = None,
+                       after: Optional[int] = None, limit: int = MESSAGE_PAGE_SIZE,
+                       archived_through: int = 0):
+    """One page of a conversation in ascending id order, read through the
+    (conversation_id, id) index. Without a cursor this is the latest page;
+    `before` pages back through history, `after` fetches newer messages.
+    messages_archive is only read when the page reaches back to or below
+    `archived_through`, the conversation's highest archived id."""
+    page = _hot_range(cursor, conversation_id, before, after, limit)
+    if after is not None:
+        if after < archived_through:
+            page = sorted(page + fetch_archived_range(cursor, conversation_id, None, after, limit),
+                          key=lambda m: m['id'])[:limit]
+        return page
+    if archived_through and (len(page) < limit or page[-1]['id'] < archived_through):
+        page = sorted(page + fetch_archived_range(cursor, conversation_id, before, None, limit),
+                      key=lambda m: m['id'], reverse=True)[:limit]
+    return page[::-1]
+
+def encode_messages(batches, sender_names: dict):
+    """Read_message JSON array straight from cursor rows, one chunk per batch
+    of rows, encoded by pydantic-core's serializer without building a model
+    per message. Messages from anyone other than the two participants are
+    skipped, as before."""
+    separator = b"["
+    for rows in batches:
+        batch = [
+            {"sender_name": sender_names[m['sender_id']], "content": m['content'],
+             "id": m['id'], "created_at": m['created_at']}
+            for m in rows if m['sender_id'] in sender_names
+        ]
+        if batch:
+            yield separator + to_json(batch)[1:-1]
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+def messages_response(rows, sender_names: dict) -> Response:
+    return Response(b"".join(encode_messages((rows,), sender_names)), media_type="application/json")
+
+def history_batches(cursor, conversation_id: int, archived_through: int = 0):
+    """The whole conversation in id order, archive first, fetched from the
+    unbuffered cursor HISTORY_STREAM_BATCH rows at a time."""
+    tables = ("messages_archive", "messages") if archived_through else ("messages",)
+    for table in tables:
+        cursor.execute(
+            f"SELECT id, sender_id, content, created_at FROM {table} "
+            f"WHERE conversation_id = %s ORDER BY id",
+            (conversation_id,))
+        while True:
+            rows = cursor.fetchmany(HISTORY_STREAM_BATCH)
+            if not rows:
+                break
+            yield rows
+
 @comm.post("/send_message", response_model=Message)
 def send_message(message: Message):
     sender_email: str = message.sender_email.strip().lower()
     reciver_email: str= message.reciver_email.strip().lower()
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    
-    cursor.execute("SHOW TABLES")
-    for table in cursor.fetchall():
-        print(table)
-
     try:
-        cursor.execute("SELECT id FROM users where email = %s",
-            (sender_email,))
-        get_sender = cursor.fetchone()
-        if not get_sender:
-            raise HTTPException(status_code=501,
-                detail="Sender does not exist.")
-        cursor.execute("SELECT id FROM users where email = %s",
-            (reciver_email,))
-        get_reciver = cursor.fetchone()
-        if not get_reciver:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to send this message does not exist.")
-        if (get_sender == get_reciver):
-            raise HTTPException(status_code=501,
-                detail="Sender and Reciver of the massages cannot be the same.")
+        get_sender, get_reciver = resolve_pair(cursor, sender_email, reciver_email,
+            "Sender does not exist.",
+            "The email you tried to send this message does not exist.",
+            "Sender and Reciver of the massages cannot be the same.")
         reciver_id: int = get_reciver['id']
         sender_id: int = get_sender['id']
-        cursor.execute("SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-            (sender_id, reciver_id, reciver_id, sender_id,))
-        get_conv = cursor.fetchone()
-        if not get_conv:
-            cursor.execute("INSERT INTO conversations (user1_id, user2_id) VALUES (%s, %s)",
-                (sender_id, reciver_id,))
-            connection.commit()
-            cursor.execute("SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-                (sender_id, reciver_id, reciver_id, sender_id,))
-            get_conv = cursor.fetchone()
-        conv_id: int = get_conv['id']
-        cursor.execute(
-            "INSERT INTO messages (conversation_id, sender_id, receiver_id, content) VALUES (%s, %s, %s, %s)",
-            (conv_id, sender_id, reciver_id, message.content_message,))
+        conv_id: int = get_or_create_conversation(cursor, sender_id, reciver_id)
+        message_id = record_message(cursor, conv_id, sender_id, reciver_id, message.content_message)
         connection.commit()
+        publish_message(conv_id, message_id, sender_id, reciver_id, message.content_message)
         return {"sender_email": sender_email, "reciver_email": reciver_email, "content_message": message.content_message}
     finally:
         cursor.close()
@@ -63,33 +227,22 @@ def read_message(reader: Read_conversation_from):
     cursor = connection.cursor(dictionary=True)
     conversation: list[Read_message]= []
     try:
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (reader_email,))
-        get_reader = cursor.fetchone()
-        if not get_reader:
-            raise HTTPException(status_code=501,
-                detail="Reader does not exist.")
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (readed_email,))
-        get_readed = cursor.fetchone()
-        if not get_readed:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to read your conversation with does not exist.")
-        if (get_reader == get_readed):
-            raise HTTPException(status_code=501,
-                detail="You cannot try to read a conversation with yourself.")
+        get_reader, get_readed = resolve_pair(cursor, reader_email, readed_email,
+            "Reader does not exist.",
+            "The email you tried to read your conversation with does not exist.",
+            "You cannot try to read a conversation with yourself.")
         reader_id: int = get_reader['id']
         readed_id: int = get_readed['id']
         reader_name: str = get_reader['name']
         readed_name: str = get_readed['name']
-        cursor.execute(
-            "SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-            (reader_id, readed_id, readed_id, reader_id,))
-        get_conv = cursor.fetchone()
+        get_conv = find_conversation(cursor, reader_id, readed_id)
         if get_conv:
             conv_id: int = get_conv['id']
-            cursor.execute("SELECT sender_id, content FROM messages where conversation_id = %s",
-                (conv_id,))
+            cursor.execute(
+                "SELECT id, sender_id, content FROM messages_archive WHERE conversation_id = %s "
+                "UNION ALL SELECT id, sender_id, content FROM messages where conversation_id = %s "
+                "ORDER BY id",
+                (conv_id, conv_id,))
             all_messages = cursor.fetchall()
             for message_s in all_messages:
                 if reader_id == message_s['sender_id']:
@@ -116,35 +269,18 @@ def read_message(reader: Read_conversation_from):
     cursor = connection.cursor(dictionary=True)
     conversation: list[Read_message]= []
     try:
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (reader_email,))
-        get_reader = cursor.fetchone()
-        if not get_reader:
-            raise HTTPException(status_code=501,
-                detail="Reader does not exist.")
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (readed_email,))
-        get_readed = cursor.fetchone()
-        if not get_readed:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to read your conversation with does not exist.")
-        if (get_reader == get_readed):
-            raise HTTPException(status_code=501,
-                detail="You cannot try to read a conversation with yourself.")
+        get_reader, get_readed = resolve_pair(cursor, reader_email, readed_email,
+            "Reader does not exist.",
+            "The email you tried to read your conversation with does not exist.",
+            "You cannot try to read a conversation with yourself.")
         reader_id: int = get_reader['id']
         readed_id: int = get_readed['id']
         reader_name: str = get_reader['name']
         readed_name: str = get_readed['name']
-        cursor.execute(
-            "SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-            (reader_id, readed_id, readed_id, reader_id,))
-        get_conv = cursor.fetchone()
+        get_conv = find_conversation(cursor, reader_id, readed_id)
         if get_conv:
             conv_id: int = get_conv['id']
-            cursor.execute("SELECT sender_id, content FROM messages where conversation_id = %s",
-                (conv_id,))
-            all_messages = cursor.fetchall()
-            last_message = all_messages[-1]
+            last_message = fetch_last_message(cursor, conv_id)
             if reader_id == last_message['sender_id']:
                 return {"sender_name": reader_name, "content": last_message['content']}
             if readed_id == last_message['sender_id']:
@@ -163,35 +299,18 @@ def read_message(reader_email :str, readed_email: str):
     cursor = connection.cursor(dictionary=True)
     conversation: list[Read_message]= []
     try:
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (reader_email,))
-        get_reader = cursor.fetchone()
-        if not get_reader:
-            raise HTTPException(status_code=501,
-                detail="Reader does not exist.")
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (readed_email,))
-        get_readed = cursor.fetchone()
-        if not get_readed:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to read your conversation with does not exist.")
-        if (get_reader == get_readed):
-            raise HTTPException(status_code=501,
-                detail="You cannot try to read a conversation with yourself.")
+        get_reader, get_readed = resolve_pair(cursor, reader_email, readed_email,
+            "Reader does not exist.",
+            "The email you tried to read your conversation with does not exist.",
+            "You cannot try to read a conversation with yourself.")
         reader_id: int = get_reader['id']
         readed_id: int = get_readed['id']
         reader_name: str = get_reader['name']
         readed_name: str = get_readed['name']
-        cursor.execute(
-            "SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-            (reader_id, readed_id, readed_id, reader_id,))
-        get_conv = cursor.fetchone()
+        get_conv = find_conversation(cursor, reader_id, readed_id)
         if get_conv:
             conv_id: int = get_conv['id']
-            cursor.execute("SELECT sender_id, content FROM messages where conversation_id = %s",
-                (conv_id,))
-            all_messages = cursor.fetchall()
-            last_message = all_messages[-1]
+            last_message = fetch_last_message(cursor, conv_id)
             if reader_id == last_message['sender_id']:
                 return {"sender_name": reader_name, "content": last_message['content']}
             if readed_id == last_message['sender_id']:
@@ -205,49 +324,26 @@ def read_message(reader_email :str, readed_email: str):
         connection.close()
              
 @comm.get("/read_conversation/{reader_email}/with/{readed_email}", response_model= list[Read_message])
-def read_conversation_by_emils(reader_email: str, readed_email: str):
+def read_conversation_by_emils(reader_email: str, readed_email: str,
+                               before: Optional[int] = None, after: Optional[int] = None,
+                               limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE)):
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    conversation: list[Read_message]= []
     try:
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (reader_email,))
-        get_reader = cursor.fetchone()
-        if not get_reader:
-            raise HTTPException(status_code=501,
-                detail="Reader does not exist.")
-        cursor.execute("SELECT id, name FROM users where email = %s",
-            (readed_email,))
-        get_readed = cursor.fetchone()
-        if not get_readed:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to read your conversation with does not exist.")
-        if (get_reader == get_readed):
-            raise HTTPException(status_code=501,
-                detail="You cannot try to read a conversation with yourself.")
+        get_reader, get_readed = resolve_pair(cursor, reader_email, readed_email,
+            "Reader does not exist.",
+            "The email you tried to read your conversation with does not exist.",
+            "You cannot try to read a conversation with yourself.")
         reader_id: int = get_reader['id']
         readed_id: int = get_readed['id']
         reader_name: str = get_reader['name']
         readed_name: str = get_readed['name']
-        cursor.execute(
-            "SELECT id FROM conversations where user1_id = %s AND user2_id = %s OR user1_id = %s AND user2_id = %s",
-            (reader_id, readed_id, readed_id, reader_id,))
-        get_conv = cursor.fetchone()
+        get_conv = find_conversation(cursor, reader_id, readed_id)
         if get_conv:
             conv_id: int = get_conv['id']
-            cursor.execute("SELECT sender_id, content FROM messages where conversation_id = %s",
-                (conv_id,))
-            all_messages = cursor.fetchall()
-            for message_s in all_messages:
-                if reader_id == message_s['sender_id']:
-                    conversation.append(Read_message(
-                        sender_name=reader_name,
-                        content=message_s['content']))
-                if readed_id == message_s['sender_id']:
-                    conversation.append(Read_message(
-                        sender_name=readed_name,
-                        content=message_s['content']))
-            return conversation
+            all_messages = fetch_message_page(cursor, conv_id, before, after, limit,
+                                              get_conv.get('archived_through_id') or 0)
+            return messages_response(all_messages, {reader_id: reader_name, readed_id: readed_name})
         else:
             raise HTTPException(status_code=501, 
                 detail="No conversation with this email yet.")
@@ -275,85 +371,218 @@ def get_conversation_id(user_id: int):
         cursor.close()
         connection.close()
 
+def conversation_participants(cursor, conversation_id: int):
+    """The conversation row and the sender names its messages are shown
+    with (each participant's email)."""
+    cursor.execute(
+        "SELECT user1_id, user2_id, archived_through_id FROM conversations where id = %s", (conversation_id,))
+    users = cursor.fetchone()
+    if not users:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    cursor.execute("SELECT email, name FROM users where id = %s", (users['user1_id'],))
+    get_reader = cursor.fetchone()
+    if not get_reader:
+        raise HTTPException(status_code=501,
+            detail="Reader does not exist.")
+    cursor.execute("SELECT email, name FROM users where id = %s", (users['user2_id'],))
+    get_readed = cursor.fetchone()
+    if not get_readed:
+        raise HTTPException(status_code=501,
+            detail="The email you tried to read your conversation with does not exist.")
+    if (get_reader == get_readed):
+        raise HTTPException(status_code=501,
+            detail="You cannot try to read a conversation with yourself.")
+    return users, {users['user1_id']: get_reader['email'], users['user2_id']: get_readed['email']}
+
 @comm.get("/read_conversation/{conversation_id}", response_model= list[Read_message])
-def read_conversation_by_id(conversation_id: int):
+def read_conversation_by_id(conversation_id: int,
+                            before: Optional[int] = None, after: Optional[int] = None,
+                            limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE)):
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    user_one_id: int
-    user_two_id: int
-    user_one: str = ""
-    user_two: str = ""
-    conversation: list[Read_message]= []
     try:
-        cursor.execute(
-            "SELECT user1_id, user2_id FROM conversations where id = %s", (conversation_id,))
-        users = cursor.fetchone()
-        user_one_id = users['user1_id']
-        user_two_id = users['user2_id']
-        cursor.execute("SELECT email, name FROM users where id = %s", (user_one_id,))
-        get_reader = cursor.fetchone()
-        if not get_reader:
-            raise HTTPException(status_code=501,
-                detail="Reader does not exist.")
-        cursor.execute("SELECT email, name FROM users where id = %s", (user_two_id,))
-        get_readed = cursor.fetchone()
-        if not get_readed:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to read your conversation with does not exist.")
-        if (get_reader == get_readed):
-            raise HTTPException(status_code=501,
-                detail="You cannot try to read a conversation with yourself.")
-        user_one_name: int = get_reader['name']
-        user_two_name: int = get_readed['name']
-        user_one: str = get_reader['email']
-        user_two: str = get_readed['email']
-        cursor.execute("SELECT sender_id, content FROM messages where conversation_id = %s",
-            (conversation_id,))
-        all_messages = cursor.fetchall()
-        for message_s in all_messages:
-            if user_one_id == message_s['sender_id']:
-                conversation.append(Read_message(
-                    sender_name=user_one,
-                    content=message_s['content']))
-            if user_two_id == message_s['sender_id']:
-                conversation.append(Read_message(
-                    sender_name=user_two,
-                    content=message_s['content']))
-        return conversation
+        users, sender_names = conversation_participants(cursor, conversation_id)
+        all_messages = fetch_message_page(cursor, conversation_id, before, after, limit,
+                                          users.get('archived_through_id') or 0)
+        return messages_response(all_messages, sender_names)
     finally:
         cursor.close()
         connection.close()
 
+@comm.get("/read_conversation/{conversation_id}/history", response_model= list[Read_message])
+def stream_conversation_history(conversation_id: int, me: int = Depends(current_user_id)):
+    """The full history (archived included) as one JSON array, streamed in
+    batches while rows are read, so memory stays flat on long conversations.
+    Only served to the conversation's participants."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        users, sender_names = conversation_participants(cursor, conversation_id)
+        if me not in (users['user1_id'], users['user2_id']):
+            raise HTTPException(status_code=403, detail="permission denied")
+    except Exception:
+        cursor.close()
+        connection.close()
+        raise
+
+    def body():
+        try:
+            batches = history_batches(cursor, conversation_id, users.get('archived_through_id') or 0)
+            yield from encode_messages(batches, sender_names)
+        finally:
+            cursor.close()
+            connection.close()
+
+    return StreamingResponse(body(), media_type="application/json")
+
 @comm.get("/read_last_message_by_id/{id}/user/{user}", response_model= Read_message)
 def read_message(id: int, user: int):
     connection = get_connection()
     cursor = connection.cursor(dictionary=True)
-    email: str
-    i = -1
     try:
-        cursor.execute("SELECT ALL user1_id, user2_id FROM conversations",)
-        all_messages = cursor.fetchall()
-        for mess in all_messages:
-            print("aaaaaaaaaaaaaaaaaaaaaaaaaaaa", mess)
-        cursor.execute("SELECT user1_id, user2_id FROM conversations where id = %s",
-            (id,))
-        last_message = cursor.fetchone()
-        print("nous avons pris :", last_message['user1_id'], last_message['user2_id'], " de ", id)
-        if (last_message['user1_id'] == user):
-            cursor.execute("SELECT email FROM users where id = %s",
-            (last_message['user2_id'],))
-            last_mess = cursor.fetchone()
-            print("le push", last_mess['email'])
-            return {"sender_name": last_mess['email'], "content": ""}
-        cursor.execute("SELECT email FROM users where id = %s",
-            (last_message['user1_id'],))
-        last_mess = cursor.fetchone()
-        print("le push", last_mess['email'])
-        return {"sender_name": last_mess['email'], "content": ""}
+        cursor.execute(
+            "SELECT u.email FROM conversations c "
+            "JOIN users u ON u.id = IF(c.user1_id = %s, c.user2_id, c.user1_id) WHERE c.id = %s",
+            (user, id,))
+        other = cursor.fetchone()
+        if not other:
+            raise HTTPException(status_code=501,
+                detail="No conversation with this id.")
+        return {"sender_name": other['email'], "content": ""}
     finally:
         cursor.close()
         connection.close()
-        
+
+@comm.get("/inbox/{user_id}", response_model= list[Inbox_entry])
+def read_inbox(user_id: int = Depends(own_user_id), before: Optional[int] = None,
+               limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE)):
+    """Every conversation of the authenticated `user_id` with the
+    counterpart and the last message, newest first, in one query. Page with
+    `before` set to the last_message_id of the last entry received."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(INBOX_QUERY, (user_id, before, before, limit, user_id, before, before, limit, limit,))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        connection.close()
+
+@comm.post("/read/{conversation_id}/user/{user_id}", response_model= Read_receipt)
+def mark_conversation_read(conversation_id: int, user_id: int = Depends(own_user_id),
+                           up_to: Optional[int] = None):
+    """Advance `user_id`'s read marker to `up_to` (default: the last message)
+    and recount their unread messages from the (conversation_id, id) index,
+    which only walks the messages still unread."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT user1_id, user2_id, user1_last_read_id, user2_last_read_id, last_message_id, "
+            "archived_through_id FROM conversations WHERE id = %s FOR UPDATE", (conversation_id,))
+        conv = cursor.fetchone()
+        if not conv or user_id not in (conv['user1_id'], conv['user2_id']):
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        side = "user1" if conv['user1_id'] == user_id else "user2"
+        target = conv['last_message_id'] or 0
+        if up_to is not None:
+            target = min(up_to, target)
+        last_read = max(conv[f'{side}_last_read_id'], target)
+        cursor.execute(
+            "SELECT COUNT(*) AS unread FROM messages "
+            "WHERE conversation_id = %s AND id > %s AND receiver_id = %s",
+            (conversation_id, last_read, user_id,))
+        unread = cursor.fetchone()['unread']
+        if last_read < (conv.get('archived_through_id') or 0):
+            cursor.execute(
+                "SELECT COUNT(*) AS unread FROM messages_archive "
+                "WHERE conversation_id = %s AND id > %s AND receiver_id = %s",
+                (conversation_id, last_read, user_id,))
+            unread += cursor.fetchone()['unread']
+        cursor.execute(
+            f"UPDATE conversations SET {side}_last_read_id = %s, {side}_unread = %s WHERE id = %s",
+            (last_read, unread, conversation_id,))
+        connection.commit()
+        receipt = {"conversation_id": conversation_id, "user_id": user_id,
+                   "last_read_message_id": last_read, "unread": unread}
+        hub.publish((conv['user1_id'], conv['user2_id']), {"type": "read", **receipt})
+        return receipt
+    finally:
+        cursor.close()
+        connection.close()
+
+@comm.get("/unread/{user_id}", response_model= Unread_total)
+def read_unread_total(user_id: int = Depends(own_user_id)):
+    """Total unread messages of a user: sums the per-conversation counters."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT (SELECT COALESCE(SUM(user1_unread), 0) FROM conversations WHERE user1_id = %s) "
+            "+ (SELECT COALESCE(SUM(user2_unread), 0) FROM conversations WHERE user2_id = %s) AS unread",
+            (user_id, user_id,))
+        return {"user_id": user_id, "unread": int(cursor.fetchone()['unread'])}
+    finally:
+        cursor.close()
+        connection.close()
+
+@comm.get("/search/{user_id}", response_model= list[Search_hit])
+def search_user_messages(user_id: int = Depends(own_user_id),
+                         q: str = Query(..., min_length=1, max_length=200),
+                         before: Optional[int] = None,
+                         limit: int = Query(20, ge=1, le=MAX_MESSAGE_PAGE_SIZE)):
+    """Full-text search over the messages of `user_id`'s conversations,
+    newest first, with highlighted snippets. Page with `before` set to the
+    id of the last hit received."""
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        return search_messages(cursor, user_id, q, before, limit)
+    finally:
+        cursor.close()
+        connection.close()
+
+@comm.post("/bulk_send", response_model=Bulk_result)
+def bulk_send(message: Bulk_message, admin=Depends(require_admin)):
+    """Send one message to many users (explicit emails, founders of a
+    `sector`, and/or every user with a `role`) in a single transaction."""
+    if not (message.recipient_emails or message.sector or message.role):
+        raise HTTPException(status_code=400, detail="No recipients given.")
+    connection = get_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        start = time.perf_counter()
+        sender = identities.resolve(cursor, [message.sender_email]).get(normalize_email(message.sender_email))
+        if not sender:
+            raise HTTPException(status_code=501, detail="Sender does not exist.")
+        sender_id: int = sender['id']
+        recipients = resolve_recipients(cursor, message.recipient_emails, message.sector, message.role)
+        recipients.pop(sender_id, None)
+        if len(recipients) > MAX_BULK_RECIPIENTS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_RECIPIENTS} recipients per call.")
+        known = {normalize_email(e) for e in recipients.values()}
+        unknown = sorted({normalize_email(e) for e in message.recipient_emails} - known - {normalize_email(message.sender_email)})
+        created = 0
+        if recipients:
+            result = send_bulk(cursor, sender_id, list(recipients), message.content_message,
+                               message.content_message[:MESSAGE_PREVIEW_LENGTH])
+            connection.commit()
+            created = result["conversations_created"]
+            for receiver_id, message_id in result["messages"].items():
+                publish_message(result["conversations"][receiver_id], message_id, sender_id, receiver_id,
+                                message.content_message)
+        seconds = time.perf_counter() - start
+        return {
+            "recipients": len(recipients),
+            "conversations_created": created,
+            "unknown_emails": unknown,
+            "duration_ms": int(seconds * 1000),
+            "messages_per_sec": round(len(recipients) / seconds, 1) if seconds else 0.0,
+        }
+    finally:
+        cursor.close()
+        connection.close()
+
 @comm.get("/send_message/sender/{sender_email}/reciver/{reciver_email}/content/{content}/conv/{id}", response_model= None)
 def add_message_to_conversation(sender_email: str, reciver_email:str, content:str, id: int):
     connection = get_connection()
@@ -371,29 +600,55 @@ def add_message_to_conversation(sender_email: str, reciver_email:str, content:st
         ##        (sender_email, reciver_email, reciver_email, sender_email,))
         ##    get_conv = cursor.fetchone()
         conv_id: int = get_conv['id']
-        cursor.execute("SELECT id FROM users where email = %s",
-            (sender_email,))
-        get_sender = cursor.fetchone()
-        if not get_sender:
-            raise HTTPException(status_code=501,
-                detail="Sender does not exist.")
-        cursor.execute("SELECT id FROM users where email = %s",
-            (reciver_email,))
-        get_reciver = cursor.fetchone()
-        if not get_reciver:
-            raise HTTPException(status_code=501,
-                detail="The email you tried to send this message does not exist.")
-        if (get_sender == get_reciver):
-            raise HTTPException(status_code=501,
-                detail="Sender and Reciver of the massages cannot be the same.")
+        get_sender, get_reciver = resolve_pair(cursor, sender_email, reciver_email,
+            "Sender does not exist.",
+            "The email you tried to send this message does not exist.",
+            "Sender and Reciver of the massages cannot be the same.")
         reciver_id: int = get_reciver['id']
         sender_id: int = get_sender['id']
-        cursor.execute(
-            "INSERT INTO messages (conversation_id, sender_id, receiver_id, content) VALUES (%s, %s, %s, %s)",
-            (conv_id, sender_id, reciver_id, content,))
+        message_id = record_message(cursor, conv_id, sender_id, reciver_id, content)
         connection.commit()
-        print("arrivés au bout\n")
+        publish_message(conv_id, message_id, sender_id, reciver_id, content)
         return
     finally:
         cursor.close()
         connection.close()
+
+async def _send_events(websocket: WebSocket, sub: Subscription):
+    while True:
+        event = await sub.queue.get()
+        if event is None:
+            await websocket.close(code=1013)
+            return
+        try:
+            await asyncio.wait_for(websocket.send_json(event), WS_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            await websocket.close(code=1013)
+            return
+
+async def _receive_until_closed(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+@comm.websocket("/ws")
+async def message_stream(websocket: WebSocket, token: str = Query(...)):
+    """New messages for the authenticated user, pushed as they are sent."""
+    payload = decode_access_token(token)
+    if not payload or not str(payload.get("sub", "")).isdigit():
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    sub = hub.subscribe(int(payload["sub"]))
+    tasks = {
+        asyncio.create_task(_send_events(websocket, sub)),
+        asyncio.create_task(_receive_until_closed(websocket)),
+    }
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(sub)
@@ -0,0 +1,73 @@
+import re
+from typing import List, Optional, Tuple
+from app.core.config import FULLTEXT_MIN_TOKEN_SIZE
+
+SNIPPET_RADIUS = 60
+_WORD = re.compile(r"\w+", re.UNICODE)
+# InnoDB's default FULLTEXT stopword list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD).
+FULLTEXT_STOPWORDS = frozenset((
+    "a about an are as at be by com de en for from how i in is it la of on or "
+    "that the this to was what when where who will with und www"
+).split())
+
+def search_terms(query: str) -> List[str]:
+    """Words of a user query, stripped of FULLTEXT boolean operators. Words
+    the index never holds (too short, or stopwords) are dropped: as required
+    terms they would make every query match nothing."""
+    words = (w.lower() for w in _WORD.findall(query))
+    return [w for w in words if len(w) >= FULLTEXT_MIN_TOKEN_SIZE and w not in FULLTEXT_STOPWORDS][:10]
+
+def boolean_query(terms: List[str]) -> str:
+    """Every term required, each matched as a prefix."""
+    return " ".join(f"+{t}*" for t in terms)
+
+def snippet(content: str, terms: List[str], radius: int = SNIPPET_RADIUS) -> Tuple[str, List[List[int]]]:
+    """A window of `content` around the first match, plus [start, end)
+    offsets of every term prefix match inside that window."""
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    first = pattern.search(content)
+    start = max((first.start() if first else 0) - radius, 0)
+    end = min((first.end() if first else 0) + radius, len(content))
+    if start > 0:
+        start = content.rfind(" ", 0, start) + 1
+    window = content[start:end]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(content) else ""
+    highlights = [[m.start() + len(prefix), m.end() + len(prefix)] for m in pattern.finditer(window)]
+    return prefix + window + suffix, highlights
+
+# Hot and archived messages are searched alike (ids are disjoint: the
+# archive job moves rows), each branch keyset-paged on its own index.
+SEARCH_BRANCH = """
+    (SELECT m.id, m.conversation_id, m.sender_id, m.created_at, m.content
+     FROM {table} m
+     WHERE MATCH(m.content) AGAINST (%s IN BOOLEAN MODE)
+       AND m.conversation_id IN (
+           SELECT id FROM conversations WHERE user1_id = %s
+           UNION ALL
+           SELECT id FROM conversations WHERE user2_id = %s
+       )
+       AND (%s IS NULL OR m.id < %s)
+     ORDER BY m.id DESC
+     LIMIT %s)
+"""
+
+SEARCH_QUERY = (
+    "SELECT * FROM ("
+    + SEARCH_BRANCH.format(table="messages")
+    + "UNION ALL"
+    + SEARCH_BRANCH.format(table="messages_archive")
+    + ") hits ORDER BY id DESC LIMIT %s"
+)
+
+def search_messages(cursor, user_id: int, query: str, before: Optional[int], limit: int) -> List[dict]:
+    terms = search_terms(query)
+    if not terms:
+        return []
+    branch = (boolean_query(terms), user_id, user_id, before, before, limit)
+    cursor.execute(SEARCH_QUERY, branch + branch + (limit,))
+    hits = []
+    for row in cursor.fetchall():
+        text, highlights = snippet(row.pop("content"), terms)
+        hits.append({**row, "snippet": text, "highlights": highlights})
+    return hits
@@ -18,14 +18,46 @@ DB_PORT = env("DB_PORT", int)
 DB_USER = env("DB_USER")
 DB_PASSWORD = env("DB_PASSWORD")
 DB_NAME = env("DB_NAME")
+DB_POOL_SIZE = env("DB_POOL_SIZE", int, default=10)
+DB_POOL_TIMEOUT = env("DB_POOL_TIMEOUT", float, default=5.0)
+DB_POOL_RECYCLE_SECONDS = env("DB_POOL_RECYCLE_SECONDS", int, default=1800)
+DB_POOL_PING_AFTER_SECONDS = env("DB_POOL_PING_AFTER_SECONDS", float, default=30.0)
 
 BCRYPT_ROUNDS = env("BCRYPT_ROUNDS", int)
 
 JEB_API_BASE_URL = env("JEB_API_BASE_URL")
 JEB_API_KEY = env("JEB_API_KEY")
 JEB_API_TIMEOUT = env("JEB_API_TIMEOUT", float)
+JEB_API_RETRIES = env("JEB_API_RETRIES", int, default=4)
+JEB_API_BACKOFF = env("JEB_API_BACKOFF", float, default=0.5)
+JEB_API_MAX_BACKOFF = env("JEB_API_MAX_BACKOFF", float, default=30.0)
+JEB_API_CIRCUIT_THRESHOLD = env("JEB_API_CIRCUIT_THRESHOLD", int, default=5)
+JEB_API_CIRCUIT_COOLDOWN = env("JEB_API_CIRCUIT_COOLDOWN", float, default=30.0)
 
 SYNC_INTERVAL_SECONDS = env("SYNC_INTERVAL_SECONDS", int)
+SYNC_WORKERS = env("SYNC_WORKERS", int, default=8)
+SYNC_RECONCILE_INTERVAL_SECONDS = env("SYNC_RECONCILE_INTERVAL_SECONDS", int, default=86400)
+SYNC_IMAGE_MAX_BYTES = env("SYNC_IMAGE_MAX_BYTES", int, default=15 * 1024 * 1024)
+
+S3_PART_SIZE = env("S3_PART_SIZE", int, default=8 * 1024 * 1024)
+S3_UPLOAD_CONCURRENCY = env("S3_UPLOAD_CONCURRENCY", int, default=4)
+S3_PRESIGN_EXPIRES = env("S3_PRESIGN_EXPIRES", int, default=3600)
+S3_PRESIGN_REFRESH_BEFORE = env("S3_PRESIGN_REFRESH_BEFORE", int, default=300)
+S3_PRESIGN_CACHE_SIZE = env("S3_PRESIGN_CACHE_SIZE", int, default=10000)
+
+WS_SEND_QUEUE_SIZE = env("WS_SEND_QUEUE_SIZE", int, default=100)
+WS_SEND_TIMEOUT = env("WS_SEND_TIMEOUT", float, default=10.0)
+IDENTITY_CACHE_TTL = env("IDENTITY_CACHE_TTL", float, default=60.0)
+IDENTITY_CACHE_SIZE = env("IDENTITY_CACHE_SIZE", int, default=10000)
+ENTITY_CACHE_TTL = env("ENTITY_CACHE_TTL", float, default=30.0)
+ENTITY_CACHE_SIZE = env("ENTITY_CACHE_SIZE", int, default=5000)
+ENTITY_VERSION_TTL = env("ENTITY_VERSION_TTL", float, default=1.0)
+CATALOG_LIST_MAX_AGE = env("CATALOG_LIST_MAX_AGE", int, default=10)
+# Must match the server's innodb_ft_min_token_size.
+FULLTEXT_MIN_TOKEN_SIZE = env("FULLTEXT_MIN_TOKEN_SIZE", int, default=3)
+MESSAGE_ARCHIVE_AFTER_DAYS = env("MESSAGE_ARCHIVE_AFTER_DAYS", int, default=180)
+MESSAGE_ARCHIVE_BATCH = env("MESSAGE_ARCHIVE_BATCH", int, default=1000)
+MESSAGE_ARCHIVE_INTERVAL_SECONDS = env("MESSAGE_ARCHIVE_INTERVAL_SECONDS", int, default=3600)
 
 SECRET_KEY = env("SECRET_KEY")
 ALGORITHM = env("ALGORITHM")
@@ -1,7 +1,20 @@
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 import mysql.connector
-from app.core.config import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+from app.core.config import (
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_RECYCLE_SECONDS, DB_POOL_PING_AFTER_SECONDS,
+)
 
-def get_connection():
+log = logging.getLogger(__name__)
+
+class PoolTimeoutError(Exception):
+    pass
+
+def _connect():
     return mysql.connector.connect(
         host=DB_HOST,
         port=DB_PORT,
@@ -9,3 +22,188 @@ def get_connection():
         password=DB_PASSWORD,
         database=DB_NAME,
     )
+
+class PooledConnection:
+    """Proxy around a pooled connection: close() hands it back to the pool.
+    A proxy garbage-collected without close() is handed back too (and
+    counted as reclaimed), so a missed close can't shrink the pool."""
+
+    def __init__(self, pool, raw, created_at: float):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._finalizer = weakref.finalize(self, pool._reclaim, raw, created_at)
+        self._finalizer.atexit = False
+
+    def close(self):
+        if self._raw is None:
+            return
+        self._finalizer.detach()
+        raw, self._raw = self._raw, None
+        self._pool._release(raw, self._created_at)
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ConnectionPool:
+    """Bounded pool: checkout waits up to `timeout`, pings connections idle
+    for longer than `ping_after` and recycles those older than `recycle`."""
+
+    def __init__(self, connect, size: int, timeout: float, recycle: float, ping_after: float):
+        self._connect = connect
+        self._size = size
+        self._timeout = timeout
+        self._recycle = recycle
+        self._ping_after = ping_after
+        self._cond = threading.Condition()
+        self._idle = []
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._broken = 0
+        self._reclaimed = 0
+
+    def acquire(self) -> PooledConnection:
+        start = time.monotonic()
+        deadline = start + self._timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._in_use >= self._size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(f"No database connection available after {self._timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            self._checkouts += 1
+            wait = time.monotonic() - start
+            if waited:
+                self._waits += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            if entry is None:
+                raw, created_at = self._connect(), time.monotonic()
+            else:
+                raw, created_at = self._checkout(*entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def _checkout(self, raw, created_at: float, released_at: float):
+        now = time.monotonic()
+        if now - created_at > self._recycle:
+            self._discard(raw)
+            self._recycled += 1
+            return self._connect(), time.monotonic()
+        if now - released_at > self._ping_after:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._discard(raw)
+                self._broken += 1
+                return self._connect(), time.monotonic()
+        return raw, created_at
+
+    def _release(self, raw, created_at: float):
+        try:
+            # never leak uncommitted work or a read snapshot to the next borrower
+            raw.consume_results()
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            raw = None
+        with self._cond:
+            self._in_use -= 1
+            if raw is not None:
+                self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _reclaim(self, raw, created_at: float):
+        log.warning("database connection garbage-collected without close(); returning it to the pool")
+        with self._cond:
+            self._reclaimed += 1
+        self._release(raw, created_at)
+
+    @staticmethod
+    def _discard(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "broken": self._broken,
+                "reclaimed": self._reclaimed,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    _connect,
+                    size=DB_POOL_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    recycle=DB_POOL_RECYCLE_SECONDS,
+                    ping_after=DB_POOL_PING_AFTER_SECONDS,
+                )
+    return _pool
+
+def get_connection():
+    return get_pool().acquire()
+
+@contextmanager
+def db_session(dictionary: bool = True):
+    """Borrow a pooled connection and a cursor; both are released on exit."""
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=dictionary)
+    try:
+        yield conn, cursor
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_db():
+    """FastAPI dependency yielding a (connection, cursor) pair."""
+    with db_session() as session:
+        yield session
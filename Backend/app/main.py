@@ -1,10 +1,19 @@
-from fastapi import FastAPI
+from typing import Literal, Optional
+from fastapi import Depends, FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, users, events, news, partners, investors, startups
 from app.communication import privates_messages
-from app.routers import auth, users, events, news, partners, investors, startups, founders
+from app.communication.hub import hub
+from app.communication.archive import archive_messages
+from app.routers import auth, users, events, news, partners, investors, startups, founders, images, search
 from app.scheduler.sync_runner import register_scheduler
 from app.services.sync import sync_all
+from app.db.connection import get_pool
+from app.clients import jeb_api
+from app.utils.s3 import presigned_urls
+from app.utils.cache import entity_cache
+from app.core.config import MESSAGE_ARCHIVE_AFTER_DAYS
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI()
 
@@ -14,6 +23,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(users.router, prefix="/api", tags=["users"])
@@ -25,10 +35,37 @@ app.include_router(partners.router, prefix="/api", tags=["partners"])
 app.include_router(investors.router, prefix="/api", tags=["investors"])
 app.include_router(startups.router, prefix="/api", tags=["startups"])
 app.include_router(founders.router, prefix="/api", tags=["founders"])
+app.include_router(images.router, prefix="/api", tags=["images"])
+app.include_router(search.router, prefix="/api", tags=["search"])
 
 @app.post("/admin/sync")
-def admin_sync():
-    return sync_all()
+def admin_sync(mode: Optional[Literal["incremental", "reconcile"]] = None):
+    return sync_all(mode)
+
+@app.post("/admin/messages/archive")
+def admin_archive_messages(older_than_days: int = Query(MESSAGE_ARCHIVE_AFTER_DAYS, ge=1),
+                           admin=Depends(auth.require_admin)):
+    return archive_messages(older_than_days)
+
+@app.get("/admin/db/pool")
+def admin_db_pool(admin=Depends(auth.require_admin)):
+    return get_pool().stats()
+
+@app.get("/admin/s3/presigned-cache")
+def admin_presigned_cache(admin=Depends(auth.require_admin)):
+    return presigned_urls.stats()
+
+@app.get("/admin/cache/entities")
+def admin_entity_cache(admin=Depends(auth.require_admin)):
+    return entity_cache.stats()
+
+@app.get("/admin/ws/stats")
+def admin_ws_stats(admin=Depends(auth.require_admin)):
+    return hub.stats()
+
+@app.get("/admin/jeb/stats")
+def admin_jeb_stats(admin=Depends(auth.require_admin)):
+    return jeb_api.stats()
 
 register_scheduler(app)
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Response
 from fastapi.security import OAuth2PasswordBearer
-from app.db.connection import get_connection
+from app.db.connection import get_connection, db_session
 from app.schemas.user import UserRegister, UserLogin, UserOut
 from app.utils.security import hash_password, verify_password
 from app.utils.jwt import create_access_token, decode_access_token
@@ -200,14 +200,17 @@ def require_founder_of_startup(startup_id, user=Depends(get_current_user)):
         cursor.close()
         conn.close()
 
-def get_user_name(user_id):
-        conn = get_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, name FROM users WHERE id = %s", (user_id,))
-        user_row = cursor.fetchone()
-        if not user_row:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user_row["name"]
+def get_user_name(user_id, cursor=None):
+    """Name of `user_id`, read on the caller's (dictionary) cursor when given
+    so a handler holding a connection does not check out a second one."""
+    if cursor is None:
+        with db_session() as (_, cursor):
+            return get_user_name(user_id, cursor)
+    cursor.execute("SELECT id, name FROM users WHERE id = %s", (user_id,))
+    user_row = cursor.fetchone()
+    if not user_row:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_row["name"]
 
 def require_investor(user=Depends(get_current_user)):
     role = user.get("role")
@@ -1,30 +1,26 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, UploadFile, File, Depends
 from app.db.connection import get_connection
+from app.utils.cache import entity_cache
+from app.utils.conditional import commit_change, conditional_get, DETAIL_CACHE_CONTROL, LIST_CACHE_CONTROL
+from app.utils.pagination import cached_keyset_page, LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
 from app.schemas.event import EventCreate, EventUpdate, EventOut, EventImage
-from typing import List
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from typing import List, Optional
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 from app.routers.auth import require_admin
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+EVENT_LIST_SELECT = """
+    SELECT id, name, dates, location, description, event_type, target_audience, image_s3_key
+    FROM events
+"""
+
 @router.get("/", response_model=List[EventOut])
-def get_events(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1)):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT id, name, dates, location, description, event_type, target_audience, image_s3_key
-            FROM events
-            ORDER BY id DESC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, skip),
-        )
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+def get_events(request: Request, response: Response,
+               page_token: Optional[str] = Query(None, alias="cursor"),
+               limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE)):
+    return conditional_get(request, response, "events", LIST_CACHE_CONTROL, lambda: cached_keyset_page(
+        "events", get_connection, EVENT_LIST_SELECT, None, page_token, limit, response))
 
 @router.get("/most-viewed", response_model=list[EventOut])
 def get_most_viewed_event(limit: int = Query(10, ge=1, le=100)):
@@ -49,8 +45,7 @@ def get_most_viewed_event(limit: int = Query(10, ge=1, le=100)):
         cursor.close()
         conn.close()
 
-@router.get("/{event_id}", response_model=EventOut)
-def get_event(event_id: int):
+def _load_event(event_id: int):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -70,6 +65,11 @@ def get_event(event_id: int):
         cursor.close()
         conn.close()
 
+@router.get("/{event_id}", response_model=EventOut)
+def get_event(event_id: int, request: Request, response: Response):
+    return conditional_get(request, response, "events", DETAIL_CACHE_CONTROL,
+                           lambda: entity_cache.item("events", event_id, lambda: _load_event(event_id)))
+
 @router.post("/", response_model=EventOut)
 def create_event(event: EventCreate, admin=Depends(require_admin)):
     conn = get_connection()
@@ -89,8 +89,8 @@ def create_event(event: EventCreate, admin=Depends(require_admin)):
                 event.target_audience,
             ),
         )
-        conn.commit()
         new_id = cursor.lastrowid
+        commit_change(conn, cursor, "events", new_id)
         cursor.execute(
             """
             SELECT id, name, dates, location, description, event_type, target_audience, image_s3_key
@@ -124,7 +124,7 @@ def update_event(event_id: int, event: EventUpdate, admin=Depends(require_admin)
         values.append(event_id)
         sql = f"UPDATE events SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
-        conn.commit()
+        commit_change(conn, cursor, "events", event_id)
         cursor.execute(
             """
             SELECT id, name, dates, location, description, event_type, target_audience, image_s3_key
@@ -149,14 +149,13 @@ def delete_event(event_id: int, admin=Depends(require_admin)):
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Event not found")
         cursor.execute("DELETE FROM events WHERE id = %s", (event_id,))
-        conn.commit()
+        commit_change(conn, cursor, "events", event_id)
         return {"message": f"Event {event_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-@router.post("/{event_id}/image", response_model=EventImage)
-async def upload_event_image(event_id: int, file: UploadFile = File(...)):
+def _store_event_image(event_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -168,12 +167,16 @@ async def upload_event_image(event_id: int, file: UploadFile = File(...)):
         key = f"events/{event_id}/{file.filename}"
         url = upload_file_to_s3(file.file, key, file.content_type)
         cursor.execute("UPDATE events SET image_s3_key=%s WHERE id=%s", (key, event_id))
-        conn.commit()
+        commit_change(conn, cursor, "events", event_id)
         return {"image_url": url}
     finally:
         cursor.close()
         conn.close()
 
+@router.post("/{event_id}/image", response_model=EventImage)
+async def upload_event_image(event_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_event_image, event_id, file)
+
 @router.get("/{event_id}/image", response_model=EventImage)
 def get_event_image(event_id: int):
     conn = get_connection()
@@ -183,7 +186,7 @@ def get_event_image(event_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -204,7 +207,8 @@ def delete_event_image(event_id: int):
             raise HTTPException(status_code=404, detail="Image not found")
         key = row[0]
         cursor.execute("UPDATE events SET image_s3_key=NULL WHERE id=%s", (event_id,))
-        conn.commit()
+        commit_change(conn, cursor, "events", event_id)
+        presigned_urls.invalidate(key)
 
         return {"message": f"Image for event {event_id} deleted successfully"}
     finally:
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
 from app.db.connection import get_connection
 from app.schemas.founder import FounderOut
-from app.utils.s3 import generate_presigned_url
+from app.utils.s3 import presigned_url
 from app.schemas.partner import PartnerImage
 
 router = APIRouter(prefix="/founders", tags=["founders"])
@@ -15,7 +15,7 @@ def get_founder_image(founder_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+from app.db.connection import get_connection
+from app.schemas.image import ImageUrls
+from app.utils.s3 import presigned_url
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+IMAGE_TABLES = ("startups", "founders", "events", "news", "users", "investors", "partners")
+MAX_BATCH_IDS = 200
+
+@router.get("/{entity}", response_model=ImageUrls)
+def get_image_urls(entity: str, ids: List[int] = Query(...)):
+    """Presigned image URLs for many rows of one entity in one call;
+    ids without an image (or without a row) map to null."""
+    if entity not in IMAGE_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown entity")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        placeholders = ",".join(["%s"] * len(ids))
+        cursor.execute(f"SELECT id, image_s3_key FROM {entity} WHERE id IN ({placeholders})", tuple(ids))
+        urls = {i: None for i in ids}
+        for row in cursor.fetchall():
+            if row["image_s3_key"]:
+                urls[row["id"]] = presigned_url(row["image_s3_key"])
+        return {"urls": urls}
+    finally:
+        cursor.close()
+        conn.close()
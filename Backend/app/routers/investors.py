@@ -1,33 +1,29 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, UploadFile, File, Depends
+from typing import Optional
 from app.db.connection import get_connection
+from app.utils.cache import entity_cache
+from app.utils.conditional import commit_change, conditional_get, DETAIL_CACHE_CONTROL, LIST_CACHE_CONTROL
+from app.utils.pagination import cached_keyset_page, LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
 from app.schemas.investor import InvestorCreate, InvestorUpdate, InvestorOut
 from app.routers.auth import require_investor, require_investor_of_investor
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 from app.schemas.partner import PartnerImage
 
 router = APIRouter(prefix="/investors", tags=["investors"])
 
+INVESTOR_LIST_SELECT = """
+    SELECT id, name, legal_status, address, email, phone, created_at, description, investor_type, investment_focus, image_s3_key
+    FROM investors
+"""
+
 @router.get("/", response_model=list[InvestorOut])
-def get_investors(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1)):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT id, name, legal_status, address, email, phone, created_at, description, investor_type, investment_focus, image_s3_key
-            FROM investors
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, skip),
-        )
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+def get_investors(request: Request, response: Response,
+                  page_token: Optional[str] = Query(None, alias="cursor"),
+                  limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE)):
+    return conditional_get(request, response, "investors", LIST_CACHE_CONTROL, lambda: cached_keyset_page(
+        "investors", get_connection, INVESTOR_LIST_SELECT, "created_at", page_token, limit, response))
 
-@router.get("/{investor_id}", response_model=InvestorOut)
-def get_investor(investor_id: int):
+def _load_investor(investor_id: int):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -47,6 +43,11 @@ def get_investor(investor_id: int):
         cursor.close()
         conn.close()
 
+@router.get("/{investor_id}", response_model=InvestorOut)
+def get_investor(investor_id: int, request: Request, response: Response):
+    return conditional_get(request, response, "investors", DETAIL_CACHE_CONTROL,
+                           lambda: entity_cache.item("investors", investor_id, lambda: _load_investor(investor_id)))
+
 @router.post("/", response_model=InvestorOut)
 def create_investor(investor: InvestorCreate, user=Depends(require_investor)):
     conn = get_connection()
@@ -66,8 +67,8 @@ def create_investor(investor: InvestorCreate, user=Depends(require_investor)):
                 investor.investment_focus, investor.image_s3_key,
             ),
         )
-        conn.commit()
         new_id = cursor.lastrowid
+        commit_change(conn, cursor, "investors", new_id)
         cursor.execute(
             "SELECT id, name, legal_status, address, email, phone, created_at, description, investor_type, investment_focus, image_s3_key FROM investors WHERE id = %s",
             (new_id,),
@@ -100,7 +101,7 @@ def update_investor(investor_id: int, investor: InvestorUpdate, user=Depends(req
         values.append(investor_id)
         sql = f"UPDATE investors SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
-        conn.commit()
+        commit_change(conn, cursor, "investors", investor_id)
         cursor.execute(
             "SELECT id, name, legal_status, address, email, phone, created_at, description, investor_type, investment_focus, image_s3_key FROM investors WHERE id = %s",
             (investor_id,),
@@ -122,14 +123,13 @@ def delete_investor(investor_id: int, user=Depends(require_investor_of_investor)
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Investor not found")
         cursor.execute("DELETE FROM investors WHERE id = %s", (investor_id,))
-        conn.commit()
+        commit_change(conn, cursor, "investors", investor_id)
         return {"message": f"Investor {investor_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-@router.post("/{investor_id}/image", response_model=PartnerImage)
-async def upload_investor_image(investor_id: int, file: UploadFile = File(...)):
+def _store_investor_image(investor_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -141,12 +141,16 @@ async def upload_investor_image(investor_id: int, file: UploadFile = File(...)):
         key = f"investors/{investor_id}/{file.filename}"
         url = upload_file_to_s3(file.file, key, file.content_type)
         cursor.execute("UPDATE investors SET image_s3_key=%s WHERE id=%s", (key, investor_id))
-        conn.commit()
+        commit_change(conn, cursor, "investors", investor_id)
         return {"image_url": url}
     finally:
         cursor.close()
         conn.close()
 
+@router.post("/{investor_id}/image", response_model=PartnerImage)
+async def upload_investor_image(investor_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_investor_image, investor_id, file)
+
 @router.get("/{investor_id}/image", response_model=PartnerImage)
 def get_investor_image(investor_id: int):
     conn = get_connection()
@@ -156,7 +160,7 @@ def get_investor_image(investor_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -176,7 +180,8 @@ def delete_investor_image(investor_id: int):
         if not row or not row[0]:
             raise HTTPException(status_code=404, detail="Image not found")
         cursor.execute("UPDATE investors SET image_s3_key=NULL WHERE id=%s", (investor_id,))
-        conn.commit()
+        commit_change(conn, cursor, "investors", investor_id)
+        presigned_urls.invalidate(row[0])
         return {"message": f"Image for investor {investor_id} deleted successfully"}
     finally:
         cursor.close()
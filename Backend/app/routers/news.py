@@ -1,31 +1,27 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, Response, UploadFile, File, Depends
+from typing import List, Optional
 from app.db.connection import get_connection
+from app.utils.cache import entity_cache
+from app.utils.conditional import commit_change, conditional_get, DETAIL_CACHE_CONTROL, LIST_CACHE_CONTROL
+from app.utils.pagination import cached_keyset_page, LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
 from app.schemas.news import NewsCreate, NewsUpdate, NewsOut
 from app.routers.auth import require_founder, check_founder_of_startup
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 from app.schemas.event import EventImage
 
 router = APIRouter(prefix="/news", tags=["news"])
 
+NEWS_LIST_SELECT = """
+    SELECT id, title, news_date, location, category, startup_id, description, image_s3_key
+    FROM news
+"""
+
 @router.get("/", response_model=List[NewsOut])
-def get_news(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1)):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT id, title, news_date, location, category, startup_id, description, image_s3_key
-            FROM news
-            ORDER BY news_date DESC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, skip),
-        )
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+def get_news(request: Request, response: Response,
+             page_token: Optional[str] = Query(None, alias="cursor"),
+             limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE)):
+    return conditional_get(request, response, "news", LIST_CACHE_CONTROL, lambda: cached_keyset_page(
+        "news", get_connection, NEWS_LIST_SELECT, "news_date", page_token, limit, response))
 
 @router.get("/startup/{startup_id}", response_model=list[NewsOut])
 def get_news_by_startup(startup_id: int, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1),
@@ -78,8 +74,7 @@ def get_most_viewed_news(limit: int = Query(10, ge=1, le=100)):
         cursor.close()
         conn.close()
 
-@router.get("/{news_id}", response_model=NewsOut)
-def get_news_item(news_id: int):
+def _load_news_item(news_id: int):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -99,6 +94,11 @@ def get_news_item(news_id: int):
         cursor.close()
         conn.close()
 
+@router.get("/{news_id}", response_model=NewsOut)
+def get_news_item(news_id: int, request: Request, response: Response):
+    return conditional_get(request, response, "news", DETAIL_CACHE_CONTROL,
+                           lambda: entity_cache.item("news", news_id, lambda: _load_news_item(news_id)))
+
 @router.post("/", response_model=NewsOut)
 def create_news(news: NewsCreate, user=Depends(require_founder)):
     check_founder_of_startup(user, news.startup_id)
@@ -119,8 +119,8 @@ def create_news(news: NewsCreate, user=Depends(require_founder)):
                 news.description,
             ),
         )
-        conn.commit()
         new_id = cursor.lastrowid
+        commit_change(conn, cursor, "news", new_id)
         cursor.execute(
             """
             SELECT id, title, news_date, location, category, startup_id, description, image_s3_key
@@ -159,7 +159,7 @@ def update_news(news_id: int, news: NewsUpdate, user=Depends(require_founder)):
         values.append(news_id)
         sql = f"UPDATE news SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
-        conn.commit()
+        commit_change(conn, cursor, "news", news_id)
         cursor.execute(
             """
             SELECT id, title, news_date, location, category, startup_id, description, image_s3_key
@@ -188,13 +188,13 @@ def delete_news(news_id: int, user=Depends(require_founder)):
         check_founder_of_startup(user, startup_id)
 
         cursor.execute("DELETE FROM news WHERE id = %s", (news_id,))
-        conn.commit()
+        commit_change(conn, cursor, "news", news_id)
         return {"message": f"News item {news_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-async def upload_news_image(news_id: int, file: UploadFile = File(...)):
+def _store_news_image(news_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -206,12 +206,15 @@ async def upload_news_image(news_id: int, file: UploadFile = File(...)):
         key = f"news/{news_id}/{file.filename}"
         url = upload_file_to_s3(file.file, key, file.content_type)
         cursor.execute("UPDATE news SET image_s3_key=%s WHERE id=%s", (key, news_id))
-        conn.commit()
+        commit_change(conn, cursor, "news", news_id)
         return {"image_url": url}
     finally:
         cursor.close()
         conn.close()
 
+async def upload_news_image(news_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_news_image, news_id, file)
+
 @router.get("/{news_id}/image", response_model=EventImage)
 def get_news_image(news_id: int):
     conn = get_connection()
@@ -221,7 +224,7 @@ def get_news_image(news_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -242,7 +245,8 @@ def delete_news_image(news_id: int):
             raise HTTPException(status_code=404, detail="Image not found")
         key = row[0]
         cursor.execute("UPDATE news SET image_s3_key=NULL WHERE id=%s", (news_id,))
-        conn.commit()
+        commit_change(conn, cursor, "news", news_id)
+        presigned_urls.invalidate(key)
         return {"message": f"Image for news {news_id} deleted successfully"}
     finally:
         cursor.close()
@@ -1,32 +1,28 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, UploadFile, File, Depends
+from typing import Optional
 from app.db.connection import get_connection
+from app.utils.cache import entity_cache
+from app.utils.conditional import commit_change, conditional_get, DETAIL_CACHE_CONTROL, LIST_CACHE_CONTROL
+from app.utils.pagination import cached_keyset_page, LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE
 from app.schemas.partner import PartnerCreate, PartnerUpdate, PartnerOut, PartnerImage
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 from app.routers.auth import require_admin
 
 router = APIRouter(prefix="/partners", tags=["partners"])
 
+PARTNER_LIST_SELECT = """
+    SELECT id, name, legal_status, address, email, phone, created_at, description, partnership_type, image_s3_key
+    FROM partners
+"""
+
 @router.get("/", response_model=list[PartnerOut])
-def get_partners(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1)):
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        cursor.execute(
-            """
-            SELECT id, name, legal_status, address, email, phone, created_at, description, partnership_type, image_s3_key
-            FROM partners
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, skip),
-        )
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+def get_partners(request: Request, response: Response,
+                 page_token: Optional[str] = Query(None, alias="cursor"),
+                 limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE)):
+    return conditional_get(request, response, "partners", LIST_CACHE_CONTROL, lambda: cached_keyset_page(
+        "partners", get_connection, PARTNER_LIST_SELECT, "created_at", page_token, limit, response))
 
-@router.get("/{partner_id}", response_model=PartnerOut)
-def get_partner(partner_id: int):
+def _load_partner(partner_id: int):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -46,6 +42,11 @@ def get_partner(partner_id: int):
         cursor.close()
         conn.close()
 
+@router.get("/{partner_id}", response_model=PartnerOut)
+def get_partner(partner_id: int, request: Request, response: Response):
+    return conditional_get(request, response, "partners", DETAIL_CACHE_CONTROL,
+                           lambda: entity_cache.item("partners", partner_id, lambda: _load_partner(partner_id)))
+
 @router.post("/", response_model=PartnerOut)
 def create_partner(partner: PartnerCreate, admin=Depends(require_admin)):
     conn = get_connection()
@@ -64,8 +65,8 @@ def create_partner(partner: PartnerCreate, admin=Depends(require_admin)):
                 partner.phone, partner.description, partner.partnership_type, partner.image_s3_key,
             ),
         )
-        conn.commit()
         new_id = cursor.lastrowid
+        commit_change(conn, cursor, "partners", new_id)
         cursor.execute(
             "SELECT id, name, legal_status, address, email, phone, created_at, description, partnership_type, image_s3_key FROM partners WHERE id = %s",
             (new_id,),
@@ -98,7 +99,7 @@ def update_partner(partner_id: int, partner: PartnerUpdate, admin=Depends(requir
         values.append(partner_id)
         sql = f"UPDATE partners SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
-        conn.commit()
+        commit_change(conn, cursor, "partners", partner_id)
         cursor.execute(
             "SELECT id, name, legal_status, address, email, phone, created_at, description, partnership_type, image_s3_key FROM partners WHERE id = %s",
             (partner_id,),
@@ -120,14 +121,13 @@ def delete_partner(partner_id: int, admin=Depends(require_admin) ):
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Partner not found")
         cursor.execute("DELETE FROM partners WHERE id = %s", (partner_id,))
-        conn.commit()
+        commit_change(conn, cursor, "partners", partner_id)
         return {"message": f"Partner {partner_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-@router.post("/{partner_id}/image", response_model=PartnerImage)
-async def upload_partner_image(partner_id: int, file: UploadFile = File(...)):
+def _store_partner_image(partner_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -139,12 +139,16 @@ async def upload_partner_image(partner_id: int, file: UploadFile = File(...)):
         key = f"partners/{partner_id}/{file.filename}"
         url = upload_file_to_s3(file.file, key, file.content_type)
         cursor.execute("UPDATE partners SET image_s3_key=%s WHERE id=%s", (key, partner_id))
-        conn.commit()
+        commit_change(conn, cursor, "partners", partner_id)
         return {"image_url": url}
     finally:
         cursor.close()
         conn.close()
 
+@router.post("/{partner_id}/image", response_model=PartnerImage)
+async def upload_partner_image(partner_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_partner_image, partner_id, file)
+
 @router.get("/{partner_id}/image", response_model=PartnerImage)
 def get_partner_image(partner_id: int):
     conn = get_connection()
@@ -154,7 +158,7 @@ def get_partner_image(partner_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -174,7 +178,8 @@ def delete_partner_image(partner_id: int):
         if not row or not row[0]:
             raise HTTPException(status_code=404, detail="Image not found")
         cursor.execute("UPDATE partners SET image_s3_key=NULL WHERE id=%s", (partner_id,))
-        conn.commit()
+        commit_change(conn, cursor, "partners", partner_id)
+        presigned_urls.invalidate(row[0])
         return {"message": f"Image for partner {partner_id} deleted successfully"}
     finally:
         cursor.close()
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+from app.db.connection import get_connection
+from app.schemas.search import SearchHit, SearchType
+from app.communication.search import search_terms, boolean_query, snippet
+from app.routers.startups import STARTUP_SEARCH_COLUMNS
+from app.utils.pagination import decode_cursor, encode_cursor, NEXT_CURSOR_HEADER
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+# Scores are compared and carried in cursors at this fixed precision, so a
+# cursor's score matches its row's exactly.
+SCORE_TYPE = "DECIMAL(12,6)"
+
+# type -> (table, title column, columns of its FULLTEXT index, in index order)
+SEARCH_SOURCES = {
+    "startup": ("startups", "name", STARTUP_SEARCH_COLUMNS),
+    "investor": ("investors", "name", ("name", "description", "investment_focus", "investor_type")),
+    "partner": ("partners", "name", ("name", "description", "partnership_type")),
+    "news": ("news", "title", ("title", "description", "category")),
+    "event": ("events", "name", ("name", "description", "event_type", "target_audience")),
+}
+
+def search_query(types: List[str], after: bool) -> str:
+    """One ranked UNION ALL over the FULLTEXT index of every requested type.
+    `uid` (id * number of types + type position) makes (score, uid) a total
+    order, which is what the keyset cursor resumes from."""
+    parts = []
+    for kind in types:
+        position = list(SEARCH_SOURCES).index(kind)
+        table, title, columns = SEARCH_SOURCES[kind]
+        match = f"MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)"
+        parts.append(
+            f"SELECT '{kind}' AS type, id, {title} AS title, description, CAST({match} AS {SCORE_TYPE}) AS score, "
+            f"id * {len(SEARCH_SOURCES)} + {position} AS uid FROM {table} WHERE {match}")
+    after_score = f"CAST(%s AS {SCORE_TYPE})"
+    where = f"WHERE score < {after_score} OR (score = {after_score} AND uid < %s)" if after else ""
+    return (f"SELECT type, id, title, description, score, uid FROM ({' UNION ALL '.join(parts)}) hits "
+            f"{where} ORDER BY score DESC, uid DESC LIMIT %s")
+
+@router.get("", response_model=list[SearchHit])
+def search(response: Response, q: str, types: Optional[List[SearchType]] = Query(None, alias="type"),
+           page_token: Optional[str] = Query(None, alias="cursor"),
+           limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE)):
+    """Relevance-ranked search over startups, investors, partners, news and
+    events. Every word must match (as a prefix); `type` narrows the sources.
+    The next page's cursor is returned in X-Next-Cursor."""
+    terms = search_terms(q)
+    if not terms:
+        return []
+    sources = [kind for kind in SEARCH_SOURCES if not types or kind in types]
+    against = boolean_query(terms)
+    params = tuple(against for _ in sources for _ in range(2))
+    if page_token is not None:
+        score, uid = decode_cursor(page_token)
+        if not isinstance(score, str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        params += (score, score, uid)
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(search_query(sources, page_token is not None), (*params, limit))
+        rows = cursor.fetchall()
+        if len(rows) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(str(rows[-1]["score"]), rows[-1]["uid"])
+        hits = []
+        for row in rows:
+            text, highlights = snippet(row["description"], terms) if row["description"] else (None, [])
+            hits.append({"type": row["type"], "id": row["id"], "title": row["title"] or "",
+                         "score": row["score"], "snippet": text, "highlights": highlights})
+        return hits
+    finally:
+        cursor.close()
+        conn.close()
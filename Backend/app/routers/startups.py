@@ -1,32 +1,109 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, Query, Request, Response, UploadFile, File, Depends
+from typing import Optional
 from app.db.connection import get_connection
-from app.schemas.startup import StartupCreate, StartupUpdate, StartupOut, StartupDetail, FounderImage
+from app.utils.pagination import (
+    cached_keyset_page, keyset_rows, set_next_cursor, LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE, NEXT_CURSOR_HEADER,
+)
+from app.utils.cache import entity_cache
+from app.utils.conditional import (
+    commit_change, conditional_get, DELETE_CASCADES, DETAIL_CACHE_CONTROL, LIST_CACHE_CONTROL,
+)
+from app.communication.search import search_terms, boolean_query
+from app.schemas.startup import StartupCreate, StartupUpdate, StartupOut, StartupDetail, FounderImage, StartupDirectory
 from app.routers.auth import require_founder, require_founder_of_startup, get_user_name
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 
 router = APIRouter(prefix="/startups", tags=["startups"])
 
+# view_count is left out of the versioned (ETag'd) reads: a view would
+# otherwise bump the startups version. It is served by GET /{id}/view.
+STARTUP_LIST_SELECT = """
+    SELECT id, name, legal_status, address, email, phone, sector, maturity, created_at,
+           description, website_url, social_media_url, project_status, needs,
+           image_s3_key
+    FROM startups
+"""
+FACET_COLUMNS = ("sector", "maturity")
+# Columns of ft_startups_search, in index order; shared by the directory
+# filter and GET /api/search so both MATCH() through the one index.
+STARTUP_SEARCH_COLUMNS = ("name", "email", "address", "description", "sector", "needs")
+
+def startup_filters(sector: Optional[str] = None, maturity: Optional[str] = None,
+                    project_status: Optional[str] = None, q: Optional[str] = None,
+                    without: Optional[str] = None):
+    """WHERE conditions for the directory filters, each served by an index:
+    equality on sector/maturity/project_status and the ft_startups_search
+    FULLTEXT index for `q` (every word, matched as a prefix). `without`
+    leaves one column's filter out, for that column's own facet."""
+    conditions, params = [], []
+    for column, value in (("sector", sector), ("maturity", maturity), ("project_status", project_status)):
+        if value and column != without:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+    terms = search_terms(q or "")
+    if terms:
+        conditions.append(f"MATCH({', '.join(STARTUP_SEARCH_COLUMNS)}) AGAINST (%s IN BOOLEAN MODE)")
+        params.append(boolean_query(terms))
+    return conditions, tuple(params)
+
+def startup_facets(cursor, sector: Optional[str], maturity: Optional[str],
+                   project_status: Optional[str], q: Optional[str]) -> dict:
+    """Startup counts per sector and per maturity. Each facet applies every
+    filter but its own, so the counts show what picking that value gives."""
+    facets = {}
+    for column in FACET_COLUMNS:
+        conditions, params = startup_filters(sector, maturity, project_status, q, without=column)
+        where = " AND ".join([f"{column} IS NOT NULL", f"{column} <> ''", *conditions])
+        cursor.execute(
+            f"SELECT {column} AS value, COUNT(*) AS count FROM startups "
+            f"WHERE {where} GROUP BY {column} ORDER BY {column}",
+            params)
+        facets[column] = cursor.fetchall()
+    return facets
+
 @router.get("/", response_model=list[StartupOut])
-def get_startups(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1)):
+def get_startups(request: Request, response: Response,
+                 page_token: Optional[str] = Query(None, alias="cursor"),
+                 limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE),
+                 sector: Optional[str] = None, maturity: Optional[str] = None,
+                 project_status: Optional[str] = None, q: Optional[str] = None):
+    conditions, params = startup_filters(sector, maturity, project_status, q)
+    return conditional_get(request, response, "startups", LIST_CACHE_CONTROL, lambda: cached_keyset_page(
+        "startups", get_connection, STARTUP_LIST_SELECT, "created_at", page_token, limit, response,
+        conditions, params))
+
+def _load_startup_directory(page_token: Optional[str], limit: int, sector: Optional[str],
+                            maturity: Optional[str], project_status: Optional[str], q: Optional[str]):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute(
-            """
-            SELECT id, name, legal_status, address, email, phone, sector, maturity, created_at,
-                   description, website_url, social_media_url, project_status, needs,
-                   image_s3_key, view_count      -- 👈 include view_count here
-            FROM startups
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-            """,
-            (limit, skip),
-        )
-        return cursor.fetchall()
+        conditions, params = startup_filters(sector, maturity, project_status, q)
+        items = keyset_rows(cursor, STARTUP_LIST_SELECT, "created_at", page_token, limit, conditions, params)
+        facets = None
+        if page_token is None:
+            facets = startup_facets(cursor, sector, maturity, project_status, q)
+        return items, facets
     finally:
         cursor.close()
         conn.close()
 
+@router.get("/directory", response_model=StartupDirectory)
+def get_startup_directory(request: Request, response: Response,
+                          page_token: Optional[str] = Query(None, alias="cursor"),
+                          limit: int = Query(LIST_PAGE_SIZE, ge=1, le=MAX_LIST_PAGE_SIZE),
+                          sector: Optional[str] = None, maturity: Optional[str] = None,
+                          project_status: Optional[str] = None, q: Optional[str] = None):
+    """One filtered page plus the sector/maturity facets for the directory
+    page. Facets are only computed for the first page."""
+    filters = (page_token, limit, sector, maturity, project_status, q)
+
+    def page():
+        items, facets = entity_cache.list("startups", ("directory", *filters),
+                                          lambda: _load_startup_directory(*filters))
+        set_next_cursor(response, items, limit, "created_at")
+        return {"items": items, "facets": facets, "next_cursor": response.headers.get(NEXT_CURSOR_HEADER)}
+    return conditional_get(request, response, "startups", LIST_CACHE_CONTROL, page)
+
 @router.get("/most-viewed", response_model=list[StartupOut])
 def get_most_viewed_startups(limit: int = Query(10, ge=1, le=100)):
     conn = get_connection()
@@ -51,8 +128,7 @@ def get_most_viewed_startups(limit: int = Query(10, ge=1, le=100)):
         cursor.close()
         conn.close()
 
-@router.get("/{startup_id}", response_model=StartupDetail)
-def get_startup(startup_id: int):
+def _load_startup(startup_id: int):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -60,7 +136,7 @@ def get_startup(startup_id: int):
             """
             SELECT id, name, legal_status, address, email, phone, created_at,
                    description, website_url, social_media_url, project_status,
-                   needs, sector, maturity, image_s3_key, view_count   -- 👈 include it here
+                   needs, sector, maturity, image_s3_key
             FROM startups
             WHERE id = %s
             """,
@@ -79,6 +155,11 @@ def get_startup(startup_id: int):
         cursor.close()
         conn.close()
 
+@router.get("/{startup_id}", response_model=StartupDetail)
+def get_startup(startup_id: int, request: Request, response: Response):
+    return conditional_get(request, response, "startups", DETAIL_CACHE_CONTROL,
+                           lambda: entity_cache.item("startups", startup_id, lambda: _load_startup(startup_id)))
+
 @router.post("/", response_model=StartupOut)
 def create_startup(startup: StartupCreate, user=Depends(require_founder)):
     user_id = user.get("sub")
@@ -100,9 +181,9 @@ def create_startup(startup: StartupCreate, user=Depends(require_founder)):
                 startup.social_media_url, startup.project_status, startup.needs,
             ),
         )
+        new_id = cursor.lastrowid
         if user.get("role") != "admin":
-            new_id = cursor.lastrowid
-            user_name = get_user_name(user_id)
+            user_name = get_user_name(user_id, cursor)
             cursor.execute(
                 """
                 INSERT INTO founders (name, startup_id) VALUES (%s, %s)
@@ -116,7 +197,7 @@ def create_startup(startup: StartupCreate, user=Depends(require_founder)):
                 """,
                 (new_founder_id, user_id)
             )
-        conn.commit()
+        commit_change(conn, cursor, "startups", new_id)
         cursor.execute("SELECT * FROM startups WHERE id = %s", (new_id,))
         return cursor.fetchone()
     finally:
@@ -143,7 +224,7 @@ def update_startup(startup_id: int, startup: StartupUpdate, user=Depends(require
         values.append(startup_id)
         sql = f"UPDATE startups SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
-        conn.commit()
+        commit_change(conn, cursor, "startups", startup_id)
         cursor.execute("SELECT * FROM startups WHERE id = %s", (startup_id,))
         return cursor.fetchone()
     finally:
@@ -159,14 +240,13 @@ def delete_startup(startup_id: int, user=Depends(require_founder_of_startup)):
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Startup not found")
         cursor.execute("DELETE FROM startups WHERE id = %s", (startup_id,))
-        conn.commit()
+        commit_change(conn, cursor, "startups", startup_id, also=DELETE_CASCADES["startups"])
         return {"message": f"Startup {startup_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-@router.post("/{startup_id}/image", response_model=FounderImage)
-async def upload_startup_image(startup_id: int, file: UploadFile = File(...)):
+def _store_startup_image(startup_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -178,12 +258,16 @@ async def upload_startup_image(startup_id: int, file: UploadFile = File(...)):
         key = f"startups/{startup_id}/{file.filename}"
         url = upload_file_to_s3(file.file, key, file.content_type)
         cursor.execute("UPDATE startups SET image_s3_key=%s WHERE id=%s", (key, startup_id))
-        conn.commit()
+        commit_change(conn, cursor, "startups", startup_id)
         return {"image_url": url}
     finally:
         cursor.close()
         conn.close()
 
+@router.post("/{startup_id}/image", response_model=FounderImage)
+async def upload_startup_image(startup_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_startup_image, startup_id, file)
+
 @router.get("/{startup_id}/image", response_model=FounderImage)
 def get_startup_image(startup_id: int):
     conn = get_connection()
@@ -193,7 +277,7 @@ def get_startup_image(startup_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -213,7 +297,8 @@ def delete_startup_image(startup_id: int):
         if not row or not row[0]:
             raise HTTPException(status_code=404, detail="Image not found")
         cursor.execute("UPDATE startups SET image_s3_key=NULL WHERE id=%s", (startup_id,))
-        conn.commit()
+        commit_change(conn, cursor, "startups", startup_id)
+        presigned_urls.invalidate(row[0])
         return {"message": f"Image for startup {startup_id} deleted successfully"}
     finally:
         cursor.close()
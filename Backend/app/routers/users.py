@@ -3,8 +3,9 @@ from app.db.connection import get_connection
 from app.schemas.user import UserOut, UserCreate, UserUpdate
 from app.utils.security import hash_password
 from app.schemas.event import EventImage
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url
+from app.utils.s3 import upload_file_to_s3, presigned_url, presigned_urls, run_upload
 from app.routers.auth import require_admin, require_owner_of_user
+from app.communication.identity import identities
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -119,6 +120,7 @@ def update_user(user_id: int, user: UserUpdate, admin=Depends(require_owner_of_u
         sql = f"UPDATE users SET {', '.join(fields)} WHERE id = %s"
         cursor.execute(sql, tuple(values))
         conn.commit()
+        identities.invalidate()
         cursor.execute(
             """
             SELECT id, email, name, role, founder_id, investor_id, image_s3_key
@@ -144,13 +146,13 @@ def delete_user(user_id: int, admin=Depends(require_admin)):
             raise HTTPException(status_code=404, detail="User not found")
         cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
         conn.commit()
+        identities.invalidate()
         return {"message": f"User {user_id} deleted successfully"}
     finally:
         cursor.close()
         conn.close()
 
-@router.post("/{user_id}/image", response_model=EventImage)
-async def upload_user_image(user_id: int, file: UploadFile = File(...)):
+def _store_user_image(user_id: int, file: UploadFile):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
@@ -168,6 +170,10 @@ async def upload_user_image(user_id: int, file: UploadFile = File(...)):
         cursor.close()
         conn.close()
 
+@router.post("/{user_id}/image", response_model=EventImage)
+async def upload_user_image(user_id: int, file: UploadFile = File(...)):
+    return await run_upload(_store_user_image, user_id, file)
+
 @router.get("/{user_id}/image", response_model=EventImage)
 def get_user_image(user_id: int):
     conn = get_connection()
@@ -177,7 +183,7 @@ def get_user_image(user_id: int):
         row = cursor.fetchone()
         if not row or not row["image_s3_key"]:
             raise HTTPException(status_code=404, detail="Image not found")
-        url = generate_presigned_url(row["image_s3_key"])
+        url = presigned_url(row["image_s3_key"])
         return {"image_url": url}
     finally:
         cursor.close()
@@ -199,6 +205,7 @@ def delete_user_image(user_id: int):
         key = row[0]
         cursor.execute("UPDATE users SET image_s3_key=NULL WHERE id=%s", (user_id,))
         conn.commit()
+        presigned_urls.invalidate(key)
         return {"message": f"Image for user {user_id} deleted successfully"}
     finally:
         cursor.close()
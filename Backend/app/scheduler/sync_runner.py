@@ -1,8 +1,9 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI
-from app.core.config import SYNC_INTERVAL_SECONDS
+from app.core.config import SYNC_INTERVAL_SECONDS, MESSAGE_ARCHIVE_INTERVAL_SECONDS
 from app.services.sync import sync_all
+from app.communication.archive import archive_messages
 from datetime import datetime
 import logging
 
@@ -17,6 +18,14 @@ def register_scheduler(app: FastAPI):
         max_instances=1,
         coalesce=True,
     )
+    scheduler.add_job(
+        func=archive_messages,
+        trigger=IntervalTrigger(seconds=MESSAGE_ARCHIVE_INTERVAL_SECONDS),
+        id="archive_messages_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
     logging.info(f"Periodic sync triggered at {datetime.utcnow().isoformat()}Z")
 
     @app.on_event("startup")
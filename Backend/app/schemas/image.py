@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class ImageUrls(BaseModel):
+    urls: Dict[int, Optional[str]]
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+SearchType = Literal["startup", "investor", "partner", "news", "event"]
+
+class SearchHit(BaseModel):
+    type: SearchType
+    id: int
+    title: str
+    score: float
+    snippet: Optional[str] = None
+    highlights: List[List[int]] = []
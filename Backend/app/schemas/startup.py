@@ -43,11 +43,25 @@ class StartupOut(StartupBase):
     project_status: Optional[str] = None
     needs: Optional[str] = None
     image_s3_key: Optional[str] = None
-    view_count: int = 0
+    # Only filled by /most-viewed; see GET /startups/{id}/view.
+    view_count: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class StartupFacets(BaseModel):
+    sector: List[FacetCount] = []
+    maturity: List[FacetCount] = []
+
+class StartupDirectory(BaseModel):
+    items: List[StartupOut]
+    facets: Optional[StartupFacets] = None
+    next_cursor: Optional[str] = None
+
 class Founder(BaseModel):
     id: int
     name: str
@@ -0,0 +1,64 @@
+import time
+import logging
+from typing import Iterable, List, Sequence
+
+log = logging.getLogger(__name__)
+
+class UpsertBatch:
+    """Buffers rows for one table and writes them as multi-VALUES
+    INSERT ... ON DUPLICATE KEY UPDATE statements.
+
+    `coalesce` columns only overwrite the stored value when the new one is
+    not NULL (used for image keys). Child batches are flushed right after
+    their parent so their foreign keys always resolve."""
+
+    def __init__(self, table: str, columns: Sequence[str], update: Sequence[str],
+                 coalesce: Sequence[str] = (), children: Iterable["UpsertBatch"] = (),
+                 max_rows: int = 500):
+        self.table = table
+        self.columns = tuple(columns)
+        self.children = list(children)
+        self.max_rows = max_rows
+        self.rows: List[tuple] = []
+        self.written = 0
+        self.seconds = 0.0
+        assignments = [f"{c}=VALUES({c})" for c in update]
+        assignments += [f"{c}=COALESCE(VALUES({c}), {c})" for c in coalesce]
+        self._head = f"INSERT INTO {table} ({', '.join(self.columns)}) VALUES "
+        self._tail = " ON DUPLICATE KEY UPDATE " + ", ".join(assignments)
+        self._placeholder = "(" + ",".join(["%s"] * len(self.columns)) + ")"
+
+    def add(self, row: Sequence):
+        if len(row) != len(self.columns):
+            raise ValueError(f"{self.table}: expected {len(self.columns)} values, got {len(row)}")
+        self.rows.append(tuple(row))
+
+    def flush(self, cursor) -> int:
+        start = time.perf_counter()
+        count = 0
+        for i in range(0, len(self.rows), self.max_rows):
+            chunk = self.rows[i:i + self.max_rows]
+            sql = self._head + ",".join([self._placeholder] * len(chunk)) + self._tail
+            cursor.execute(sql, tuple(v for row in chunk for v in row))
+            count += len(chunk)
+        self.rows.clear()
+        self.written += count
+        self.seconds += time.perf_counter() - start
+        for child in self.children:
+            count += child.flush(cursor)
+        return count
+
+    def stats(self) -> dict:
+        return {
+            "rows": self.written,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.written / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+    def report(self, label: str) -> dict:
+        stats = {self.table: self.stats()}
+        for child in self.children:
+            stats[child.table] = child.stats()
+        for table, s in stats.items():
+            log.info(f"[{label}] {table}: {s['rows']} rows upserted in {s['seconds']}s ({s['rows_per_sec']} rows/s)")
+        return stats
@@ -1,404 +1,692 @@
-import requests
-import io
 import time
-from typing import Any, Dict, List
+import resource
+import hashlib
+import json
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from app.db.connection import get_connection
-from app.utils.s3 import upload_file_to_s3
+from app.utils.conditional import record_change, DELETE_CASCADES
+from app.utils.s3 import UploadRejected, buffer_gauge, upload_stream_to_s3
 from app.core import config
+from app.clients import jeb_api
 from app.clients.jeb_api import UpstreamHTTPError
+from app.services.batch_writer import UpsertBatch
 import datetime
 import logging
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-API_BASE = config.JEB_API_BASE_URL
-HEADERS = {"X-Group-Authorization": config.JEB_API_KEY}
-REQUEST_TIMEOUT = config.JEB_API_TIMEOUT or 30
+SYNC_WORKERS = config.SYNC_WORKERS
+SYNC_RECONCILE_INTERVAL_SECONDS = config.SYNC_RECONCILE_INTERVAL_SECONDS
+SYNC_IMAGE_MAX_BYTES = config.SYNC_IMAGE_MAX_BYTES
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_CONTENT_TYPES = {"image/jpeg": "jpeg", "image/png": "png", "image/gif": "gif", "image/webp": "webp"}
 
-REQUEST_SLEEP = 0.010
+_fetch_pool = ThreadPoolExecutor(max_workers=SYNC_WORKERS, thread_name_prefix="sync-fetch")
 
-def fetch_json(url: str) -> Any:
-    """Fetch JSON with retry for 429 and rate limit backoff."""
-    retry_after = 2
-    while True:
-        resp = requests.get(url, headers=HEADERS)
-        if resp.status_code == 500:
-            log.warning(f"500 Internal Server Error. Retrying after {retry_after}s")
-            time.sleep(retry_after)
-            continue
-        if resp.status_code == 429:
-            log.warning(f"429 Too Many Requests. Retrying after {retry_after}s")
-            time.sleep(retry_after)
-            continue
-        resp.raise_for_status()
-        time.sleep(REQUEST_SLEEP)
-        return resp.json()
-
-def fetch_and_upload_image(url: str, key_prefix: str, entity_id: int, table: str, cursor):
-    """Fetch image from JEB API and upload to S3."""
-    img_resp = requests.get(url, headers=HEADERS, stream=True)
-    time.sleep(REQUEST_SLEEP)
-    if img_resp.status_code == 200 and img_resp.content:
-        content_type = img_resp.headers.get("Content-Type", "image/jpeg")
-        ext = content_type.split("/")[-1]
-        key = f"{key_prefix}/{entity_id}/image.{ext}"
-        upload_file_to_s3(io.BytesIO(img_resp.content), key, content_type)
-        cursor.execute(
-            f"UPDATE {table} SET image_s3_key=%s WHERE id=%s", (key, entity_id)
+def fetch_page(path: str, skip: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+    params = None if skip is None else {"skip": skip, "limit": limit}
+    return jeb_api.get_page(path, params)
+
+def fetch_detail(path: str) -> dict:
+    detail = jeb_api.get_one(path)
+    if detail is None:
+        raise UpstreamHTTPError(404, f"{path} not found")
+    return detail
+
+def fetch_and_upload_image(path: str, key_prefix: str, entity_id: int,
+                           fingerprint: Optional[dict] = None) -> Tuple[Optional[dict], str]:
+    """Fetch image from JEB API and upload to S3. Safe to call from sync workers.
+
+    The body is streamed to S3 one bounded part at a time. With a stored
+    `fingerprint` the GET is conditional, and identical bytes skip the S3
+    upload. Returns the image's current fingerprint (None when there is no
+    image) and the outcome: uploaded, unchanged, not_modified, missing, or
+    rejected (unexpected content type or over SYNC_IMAGE_MAX_BYTES)."""
+    headers = {}
+    if fingerprint and fingerprint.get("etag"):
+        headers["If-None-Match"] = fingerprint["etag"]
+    if fingerprint and fingerprint.get("last_modified"):
+        headers["If-Modified-Since"] = fingerprint["last_modified"]
+    with jeb_api.get_stream(path, headers=headers) as img_resp:
+        return _store_image(img_resp, key_prefix, entity_id, fingerprint)
+
+def _store_image(img_resp, key_prefix: str, entity_id: int,
+                 fingerprint: Optional[dict]) -> Tuple[Optional[dict], str]:
+    if img_resp.status_code == 304 and fingerprint:
+        return fingerprint, "not_modified"
+    if img_resp.status_code != 200:
+        return None, "missing"
+    content_type = img_resp.headers.get("Content-Type", "image/jpeg").split(";")[0].strip().lower()
+    length = img_resp.headers.get("Content-Length")
+    if content_type not in IMAGE_CONTENT_TYPES:
+        log.warning(f"Rejected {key_prefix}/{entity_id} image: content type {content_type}")
+        return None, "rejected"
+    if length and length.isdigit() and int(length) > SYNC_IMAGE_MAX_BYTES:
+        log.warning(f"Rejected {key_prefix}/{entity_id} image: {length} bytes")
+        return None, "rejected"
+    key = f"{key_prefix}/{entity_id}/image.{IMAGE_CONTENT_TYPES[content_type]}"
+    stored_hash = fingerprint.get("content_hash") if fingerprint else None
+    try:
+        uploaded, content_hash, size = upload_stream_to_s3(
+            img_resp.iter_content(chunk_size=IMAGE_CHUNK_SIZE), key, content_type,
+            max_bytes=SYNC_IMAGE_MAX_BYTES, skip=(lambda sha: sha == stored_hash) if stored_hash else None,
         )
-        return key
-    return None
+    except UploadRejected as e:
+        log.warning(f"Rejected {key_prefix}/{entity_id} image: {e}")
+        return None, "rejected"
+    if size == 0:
+        return None, "missing"
+    current = {
+        "etag": img_resp.headers.get("ETag"),
+        "last_modified": img_resp.headers.get("Last-Modified"),
+        "content_hash": content_hash,
+    }
+    if not uploaded:
+        return {**current, "s3_key": fingerprint["s3_key"]}, "unchanged"
+    return {**current, "s3_key": key}, "uploaded"
 
-def get_last_synced(entity: str, cursor) -> int:
-    cursor.execute("SELECT last_id FROM sync_state WHERE entity=%s", (entity,))
-    row = cursor.fetchone()
-    return row["last_id"] if row else 0
+FINGERPRINT_FIELDS = ("etag", "last_modified", "content_hash", "s3_key")
 
-def update_last_synced(entity: str, last_id: int, cursor):
+def load_fingerprints(entity: str, cursor) -> Dict[int, dict]:
+    """Stored image fingerprints for `entity`, trusted only while the row
+    still points at the S3 key they describe."""
     cursor.execute(
-        """
-        INSERT INTO sync_state (entity, last_id)
-        VALUES (%s,%s)
-        ON DUPLICATE KEY UPDATE last_id=VALUES(last_id)
+        f"""
+        SELECT f.entity_id, f.etag, f.last_modified, f.content_hash, f.s3_key
+        FROM image_fingerprints f
+        JOIN {entity} t ON t.id = f.entity_id AND t.image_s3_key = f.s3_key
+        WHERE f.entity = %s
         """,
-        (entity, last_id),
+        (entity,),
+    )
+    return {row["entity_id"]: row for row in cursor.fetchall()}
+
+class ImageSync:
+    """Image state of one entity for one sync run. Workers call fetch(); the
+    writer calls record() to get the key to store and queue the fingerprint."""
+
+    def __init__(self, entity: str, cursor):
+        self.entity = entity
+        self.fingerprints = load_fingerprints(entity, cursor)
+        self.batch = UpsertBatch(
+            "image_fingerprints",
+            ("entity", "entity_id") + FINGERPRINT_FIELDS,
+            update=FINGERPRINT_FIELDS,
+        )
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def fetch(self, path: str, entity_id: int) -> Optional[dict]:
+        fingerprint, outcome = fetch_and_upload_image(path, self.entity, entity_id, self.fingerprints.get(entity_id))
+        with self._lock:
+            self.counts[outcome] += 1
+        return fingerprint
+
+    def worker(self) -> Callable[[dict], Optional[dict]]:
+        return lambda item: self.fetch(f"{self.entity}/{item['id']}/image", item["id"])
+
+    def record(self, entity_id: int, fingerprint: Optional[dict]) -> Optional[str]:
+        if not fingerprint:
+            return None
+        stored = self.fingerprints.get(entity_id)
+        if stored and all(stored.get(f) == fingerprint.get(f) for f in FINGERPRINT_FIELDS):
+            return None
+        self.batch.add((self.entity, entity_id) + tuple(fingerprint.get(f) for f in FINGERPRINT_FIELDS))
+        self.fingerprints[entity_id] = fingerprint
+        if stored and stored.get("s3_key") == fingerprint["s3_key"]:
+            return None
+        return fingerprint["s3_key"]
+
+    def report(self, label: str) -> dict:
+        counts = dict(self.counts)
+        log.info(f"[{label}] {self.entity} images: {counts}")
+        return counts
+
+def fetch_concurrently(fn: Callable[[dict], Any], items: Iterable[dict]) -> List[Tuple[dict, Any, Optional[Exception]]]:
+    """Run `fn` over `items` on the shared fetch pool. Results keep the input
+    order so the caller can write them and advance sync_state sequentially."""
+    def run(item):
+        try:
+            return item, fn(item), None
+        except Exception as e:
+            return item, None, e
+    return list(_fetch_pool.map(run, items))
+
+def row_hash(item: dict) -> str:
+    return hashlib.sha256(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+
+def choose_mode(entity: str, cursor) -> str:
+    cursor.execute("SELECT last_reconciled_at FROM sync_state WHERE entity=%s", (entity,))
+    row = cursor.fetchone()
+    last = row["last_reconciled_at"] if row else None
+    if last is None or datetime.datetime.utcnow() - last > datetime.timedelta(seconds=SYNC_RECONCILE_INTERVAL_SECONDS):
+        return "reconcile"
+    return "incremental"
+
+def _in_chunks(ids: List[int], size: int = 500):
+    for i in range(0, len(ids), size):
+        chunk = ids[i:i + size]
+        yield chunk, ",".join(["%s"] * len(chunk))
+
+class SyncRun:
+    """Row-level change tracking for one entity sync.
+
+    Every run walks the whole upstream listing. In "incremental" mode only
+    rows whose content hash differs from the stored one, or whose image
+    changed, are written; the hash covers the row as written (the detail
+    payload for startups and news). Images are checked for every listed row
+    with a conditional GET, since an image can change under an unchanged row.
+    "reconcile" rewrites every row and deletes previously synced rows that
+    upstream no longer lists: a row must be missing from two reconciles in a
+    row, and a walk whose listing shifted underneath it deletes nothing."""
+
+    def __init__(self, entity: str, cursor, mode: Optional[str] = None, paged: bool = True):
+        self.entity = entity
+        self.mode = mode or choose_mode(entity, cursor)
+        self.paged = paged
+        self.started = time.monotonic()
+        cursor.execute("SELECT row_id, content_hash, missed FROM sync_rows WHERE entity=%s", (entity,))
+        rows = cursor.fetchall()
+        self.hashes = {row["row_id"]: row["content_hash"] for row in rows}
+        self.missed = {row["row_id"] for row in rows if row.get("missed")}
+        self.batch = UpsertBatch("sync_rows", ("entity", "row_id", "content_hash"), update=("content_hash",))
+        self.seen = set()
+        self.listed_count = 0
+        self.pending: Dict[int, str] = {}
+        self.max_id = 0
+        self.changed = 0
+        self.deleted = 0
+        self.missing = 0
+
+    def listed(self, items: List[dict]) -> List[dict]:
+        """Mark a page of the upstream listing as seen."""
+        self.listed_count += len(items)
+        for item in items:
+            self.seen.add(item["id"])
+            self.max_id = max(self.max_id, item["id"])
+        return items
+
+    def needs_write(self, row: dict, image_changed: bool = False) -> bool:
+        """Whether `row` must be written: a reconcile, a new content hash, or
+        a new image key."""
+        digest = row_hash(row)
+        if self.mode == "reconcile" or self.hashes.get(row["id"]) != digest:
+            self.pending[row["id"]] = digest
+            return True
+        return image_changed
+
+    def written(self, row_id: int):
+        """Store the hash only once the row is written, so failures retry."""
+        digest = self.pending.pop(row_id, None)
+        if digest is not None:
+            self.batch.add((self.entity, row_id, digest))
+            self.hashes[row_id] = digest
+        self.changed += 1
+
+    def listing_stable(self) -> bool:
+        """Whether the walk saw upstream's listing as one consistent
+        snapshot. Offset paging skips rows when rows are inserted or
+        deleted mid-walk, so a row listed twice, or a total that no longer
+        ends where the walk ended, rules the walk out for deletes. An empty
+        listing never wipes a synced table."""
+        if len(self.seen) != self.listed_count:
+            return False
+        if not self.listed_count:
+            return not self.hashes
+        if not self.paged:
+            return True
+        return len(fetch_page(self.entity, self.listed_count - 1, 2)) == 1
+
+    def _delete_stale(self, cursor):
+        stale = sorted(set(self.hashes) - self.seen)
+        doomed = [row_id for row_id in stale if row_id in self.missed]
+        first_miss = [row_id for row_id in stale if row_id not in self.missed]
+        for chunk, marks in _in_chunks(first_miss):
+            cursor.execute(f"UPDATE sync_rows SET missed = 1 WHERE entity=%s AND row_id IN ({marks})",
+                           (self.entity, *chunk))
+        for chunk, marks in _in_chunks(doomed):
+            cursor.execute(f"DELETE FROM {self.entity} WHERE id IN ({marks})", tuple(chunk))
+            cursor.execute(
+                f"DELETE FROM sync_rows WHERE entity=%s AND row_id IN ({marks})", (self.entity, *chunk)
+            )
+        self.missing = len(first_miss)
+        self.deleted = len(doomed)
+
+    def finish(self, cursor) -> dict:
+        back = sorted(self.missed & self.seen)
+        for chunk, marks in _in_chunks(back):
+            cursor.execute(f"UPDATE sync_rows SET missed = 0 WHERE entity=%s AND row_id IN ({marks})",
+                           (self.entity, *chunk))
+        if self.mode == "reconcile":
+            if self.listing_stable():
+                self._delete_stale(cursor)
+            else:
+                log.warning(f"[sync_{self.entity}] upstream listing changed during the walk, deletes skipped")
+        duration_ms = int((time.monotonic() - self.started) * 1000)
+        cursor.execute(
+            """
+            INSERT INTO sync_state (entity, last_id, last_mode, rows_seen, rows_changed, rows_deleted,
+                                    last_run_ms, last_run_at, last_reconciled_at)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,UTC_TIMESTAMP(),IF(%s, UTC_TIMESTAMP(), NULL))
+            ON DUPLICATE KEY UPDATE
+                last_id=GREATEST(last_id, VALUES(last_id)),
+                last_mode=VALUES(last_mode),
+                rows_seen=VALUES(rows_seen),
+                rows_changed=VALUES(rows_changed),
+                rows_deleted=VALUES(rows_deleted),
+                last_run_ms=VALUES(last_run_ms),
+                last_run_at=VALUES(last_run_at),
+                last_reconciled_at=COALESCE(VALUES(last_reconciled_at), last_reconciled_at)
+            """,
+            (self.entity, self.max_id, self.mode, len(self.seen), self.changed, self.deleted,
+             duration_ms, self.mode == "reconcile"),
+        )
+        stats = {
+            "mode": self.mode,
+            "seen": len(self.seen),
+            "changed": self.changed,
+            "deleted": self.deleted,
+            "missing": self.missing,
+            "duration_ms": duration_ms,
+        }
+        log.info(f"[sync_{self.entity}] {stats}")
+        return stats
+
+def fetch_details(entity: str, items: List[dict]) -> List[dict]:
+    """Detail payloads of a listing page; rows that fail are logged and
+    skipped until the next run."""
+    details = []
+    for item, detail, error in fetch_concurrently(lambda i: fetch_detail(f"{entity}/{i['id']}"), items):
+        if error:
+            log.warning(f"[sync_{entity}] Could not fetch details for {entity} id={item['id']}: {error}")
+            continue
+        details.append(detail)
+    return details
+
+def _fetch_startup_images(detail: dict, images: ImageSync, founder_images: ImageSync):
+    founders = {}
+    for founder in detail.get("founders", []):
+        try:
+            founders[founder["id"]] = founder_images.fetch(
+                f"startups/{detail['id']}/founders/{founder['id']}/image",
+                founder["id"],
+            )
+        except Exception as e:
+            log.warning(f"[sync_startups] Could not fetch/upload founder image for founder_id={founder['id']} of startup_id={detail['id']}: {e}")
+    try:
+        image = images.worker()(detail)
+    except Exception as e:
+        log.warning(f"[sync_startups] Could not fetch/upload image for startup_id={detail['id']}: {e}")
+        image = None
+    return founders, image
+
+def _startups_batch(images: ImageSync, founder_images: ImageSync, run: SyncRun) -> UpsertBatch:
+    founders = UpsertBatch(
+        "founders",
+        ("id", "name", "startup_id", "image_s3_key"),
+        update=("name", "startup_id"),
+        coalesce=("image_s3_key",),
+        children=(founder_images.batch,),
+    )
+    return UpsertBatch(
+        "startups",
+        ("id", "name", "legal_status", "address", "email", "phone", "sector", "maturity",
+         "description", "website_url", "social_media_url", "project_status", "needs", "created_at",
+         "image_s3_key"),
+        update=("name", "legal_status", "address", "email", "phone", "sector", "maturity",
+                "description", "website_url", "social_media_url", "project_status", "needs", "created_at"),
+        coalesce=("image_s3_key",),
+        children=(founders, images.batch, run.batch),
     )
 
-def sync_startups():
+def sync_startups(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        last_id = get_last_synced("startups", cursor)
-        max_id = last_id
-        skip = last_id
+        images = ImageSync("startups", cursor)
+        founder_images = ImageSync("founders", cursor)
+        run = SyncRun("startups", cursor, mode)
+        batch = _startups_batch(images, founder_images, run)
+        founders_batch = batch.children[0]
+        skip = 0
         page_size = 50
         while True:
-            startups = fetch_json(f"{API_BASE}/startups?skip={skip}&limit={page_size}")
+            startups = fetch_page("startups", skip, page_size)
             if not startups:
                 break
-            for s in startups:
-                try:
-                    detail = fetch_json(f"{API_BASE}/startups/{s['id']}")
-                except Exception as e:
-                    log.warning(f"[sync_startups] Could not fetch details for startup_id={s['id']}: {e}")
+            details = fetch_details("startups", run.listed(startups))
+            for detail, fetched, error in fetch_concurrently(
+                lambda d: _fetch_startup_images(d, images, founder_images), details
+            ):
+                if error:
+                    log.warning(f"[sync_startups] Could not fetch images for startup_id={detail['id']}: {error}")
                     continue
-                cursor.execute(
-                    """
-                    INSERT INTO startups (
-                        id, name, legal_status, address, email, phone, sector, maturity,
-                        description, website_url, social_media_url, project_status, needs, created_at
-                    )
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON DUPLICATE KEY UPDATE
-                        name=VALUES(name),
-                        legal_status=VALUES(legal_status),
-                        address=VALUES(address),
-                        email=VALUES(email),
-                        phone=VALUES(phone),
-                        sector=VALUES(sector),
-                        maturity=VALUES(maturity),
-                        description=VALUES(description),
-                        website_url=VALUES(website_url),
-                        social_media_url=VALUES(social_media_url),
-                        project_status=VALUES(project_status),
-                        needs=VALUES(needs),
-                        created_at=VALUES(created_at)
-                    """,
-                    (
-                        detail["id"], detail["name"], detail.get("legal_status"), detail.get("address"),
-                        detail["email"], detail.get("phone"), detail.get("sector"), detail.get("maturity"),
-                        detail.get("description"), detail.get("website_url"), detail.get("social_media_url"),
-                        detail.get("project_status"), detail.get("needs"), detail.get("created_at"),
-                    ),
-                )
-                founders = detail.get("founders", [])
-                for founder in founders:
-                    cursor.execute(
-                        """
-                        INSERT INTO founders (id, name, startup_id)
-                        VALUES (%s, %s, %s)
-                        ON DUPLICATE KEY UPDATE
-                            name=VALUES(name),
-                            startup_id=VALUES(startup_id)
-                        """,
-                        (
-                            founder["id"], founder["name"], detail["id"]
-                        ),
-                    )
-                    try:
-                        fetch_and_upload_image(
-                            f"{API_BASE}/startups/{detail['id']}/founders/{founder['id']}/image",
-                            "founders",
-                            founder["id"],
-                            "founders",
-                            cursor,
-                        )
-                    except Exception as e:
-                        log.warning(f"[sync_startups] Could not fetch/upload founder image for founder_id={founder['id']} of startup_id={detail['id']}: {e}")
-                fetch_and_upload_image(
-                    f"{API_BASE}/startups/{s['id']}/image",
-                    "startups",
-                    s["id"],
-                    "startups",
-                    cursor,
-                )
-                max_id = max(max_id, s["id"])
+                founders, image = fetched
+                image_key = images.record(detail["id"], image)
+                founder_keys = {
+                    founder["id"]: founder_images.record(founder["id"], founders.get(founder["id"]))
+                    for founder in detail.get("founders", [])
+                }
+                new_keys = image_key is not None or any(key is not None for key in founder_keys.values())
+                if not run.needs_write(detail, new_keys):
+                    continue
+                batch.add((
+                    detail["id"], detail["name"], detail.get("legal_status"), detail.get("address"),
+                    detail["email"], detail.get("phone"), detail.get("sector"), detail.get("maturity"),
+                    detail.get("description"), detail.get("website_url"), detail.get("social_media_url"),
+                    detail.get("project_status"), detail.get("needs"), detail.get("created_at"),
+                    image_key,
+                ))
+                for founder in detail.get("founders", []):
+                    founders_batch.add((founder["id"], founder["name"], detail["id"], founder_keys[founder["id"]]))
+                run.written(detail["id"])
+            batch.flush(cursor)
             skip += page_size
-        if max_id > last_id:
-            update_last_synced("startups", max_id, cursor)
+            conn.commit()
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_startups"))
+        stats["images"] = {
+            "startups": images.report("sync_startups"),
+            "founders": founder_images.report("sync_startups"),
+        }
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_investors():
+def sync_investors(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        last_id = get_last_synced("investors", cursor)
-        max_id = last_id
-        skip = last_id
+        images = ImageSync("investors", cursor)
+        run = SyncRun("investors", cursor, mode)
+        batch = UpsertBatch(
+            "investors",
+            ("id", "name", "legal_status", "address", "email", "phone", "created_at", "description",
+             "investor_type", "investment_focus", "image_s3_key"),
+            update=("name", "legal_status", "address", "phone", "description", "investor_type", "investment_focus"),
+            coalesce=("image_s3_key",),
+            children=(images.batch, run.batch),
+        )
+        skip = 0
         page_size = 50
         while True:
-            investors = fetch_json(f"{API_BASE}/investors?skip={skip}&limit={page_size}")
+            investors = fetch_page("investors", skip, page_size)
             if not investors:
                 break
-            for inv in investors:
-                cursor.execute(
-                    """
-                    INSERT INTO investors (id, name, legal_status, address, email, phone, created_at, description, investor_type, investment_focus)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON DUPLICATE KEY UPDATE
-                        name=VALUES(name),
-                        legal_status=VALUES(legal_status),
-                        address=VALUES(address),
-                        phone=VALUES(phone),
-                        description=VALUES(description),
-                        investor_type=VALUES(investor_type),
-                        investment_focus=VALUES(investment_focus)
-                    """,
-                    (
-                        inv["id"], inv["name"], inv.get("legal_status"),
-                        inv.get("address"), inv["email"], inv.get("phone"),
-                        inv.get("created_at"), inv.get("description"),
-                        inv.get("investor_type"), inv.get("investment_focus"),
-                    ),
-                )
-                fetch_and_upload_image(
-                    f"{API_BASE}/investors/{inv['id']}/image",
-                    "investors",
-                    inv["id"],
-                    "investors",
-                    cursor,
-                )
-                max_id = max(max_id, inv["id"])
+            for inv, image, error in fetch_concurrently(images.worker(), run.listed(investors)):
+                if error:
+                    log.warning(f"[sync_investors] Could not fetch/upload image for investor_id={inv['id']}: {error}")
+                image_key = images.record(inv["id"], image)
+                if not run.needs_write(inv, image_key is not None):
+                    continue
+                batch.add((
+                    inv["id"], inv["name"], inv.get("legal_status"),
+                    inv.get("address"), inv["email"], inv.get("phone"),
+                    inv.get("created_at"), inv.get("description"),
+                    inv.get("investor_type"), inv.get("investment_focus"),
+                    image_key,
+                ))
+                run.written(inv["id"])
+            batch.flush(cursor)
             skip += page_size
-        if max_id > last_id:
-            update_last_synced("investors", max_id, cursor)
+            conn.commit()
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_investors"))
+        stats["images"] = images.report("sync_investors")
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_partners():
+def sync_partners(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        last_id = get_last_synced("partners", cursor)
-        max_id = last_id
-        skip = last_id
+        images = ImageSync("partners", cursor)
+        run = SyncRun("partners", cursor, mode)
+        batch = UpsertBatch(
+            "partners",
+            ("id", "name", "legal_status", "address", "email", "phone", "created_at", "description",
+             "partnership_type", "image_s3_key"),
+            update=("name", "legal_status", "address", "phone", "description", "partnership_type"),
+            coalesce=("image_s3_key",),
+            children=(images.batch, run.batch),
+        )
+        skip = 0
         page_size = 50
         while True:
-            partners = fetch_json(f"{API_BASE}/partners?skip={skip}&limit={page_size}")
+            partners = fetch_page("partners", skip, page_size)
             if not partners:
                 break
-            for p in partners:
-                cursor.execute(
-                    """
-                    INSERT INTO partners (id, name, legal_status, address, email, phone,
-                                          created_at, description, partnership_type)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON DUPLICATE KEY UPDATE
-                        name=VALUES(name),
-                        legal_status=VALUES(legal_status),
-                        address=VALUES(address),
-                        phone=VALUES(phone),
-                        description=VALUES(description),
-                        partnership_type=VALUES(partnership_type)
-                    """,
-                    (
-                        p["id"], p["name"], p.get("legal_status"), p.get("address"),
-                        p["email"], p.get("phone"), p.get("created_at"),
-                        p.get("description"), p.get("partnership_type"),
-                    ),
-                )
-                fetch_and_upload_image(
-                    f"{API_BASE}/partners/{p['id']}/image",
-                    "partners",
-                    p["id"],
-                    "partners",
-                    cursor,
-                )
-                max_id = max(max_id, p["id"])
+            for p, image, error in fetch_concurrently(images.worker(), run.listed(partners)):
+                if error:
+                    log.warning(f"[sync_partners] Could not fetch/upload image for partner_id={p['id']}: {error}")
+                image_key = images.record(p["id"], image)
+                if not run.needs_write(p, image_key is not None):
+                    continue
+                batch.add((
+                    p["id"], p["name"], p.get("legal_status"), p.get("address"),
+                    p["email"], p.get("phone"), p.get("created_at"),
+                    p.get("description"), p.get("partnership_type"),
+                    image_key,
+                ))
+                run.written(p["id"])
+            batch.flush(cursor)
             skip += page_size
-        if max_id > last_id:
-            update_last_synced("partners", max_id, cursor)
+            conn.commit()
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_partners"))
+        stats["images"] = images.report("sync_partners")
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_news():
+def sync_news(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        last_id = get_last_synced("news", cursor)
-        max_id = last_id
-        skip = last_id
+        images = ImageSync("news", cursor)
+        run = SyncRun("news", cursor, mode)
+        batch = UpsertBatch(
+            "news",
+            ("id", "title", "news_date", "location", "category", "startup_id", "description", "image_s3_key"),
+            update=("title", "news_date", "location", "category", "startup_id", "description"),
+            coalesce=("image_s3_key",),
+            children=(images.batch, run.batch),
+        )
+        skip = 0
         page_size = 50
         while True:
-            news_list = fetch_json(f"{API_BASE}/news?skip={skip}&limit={page_size}")
+            news_list = fetch_page("news", skip, page_size)
             if not news_list:
                 break
-            for n in news_list:
-                detail = fetch_json(f"{API_BASE}/news/{n['id']}")
-                cursor.execute(
-                    """
-                    INSERT INTO news (id, title, news_date, location, category, startup_id, description)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s)
-                    ON DUPLICATE KEY UPDATE
-                        title=VALUES(title),
-                        news_date=VALUES(news_date),
-                        location=VALUES(location),
-                        category=VALUES(category),
-                        startup_id=VALUES(startup_id),
-                        description=VALUES(description)
-                    """,
-                    (
-                        detail["id"], detail["title"], detail.get("news_date"),
-                        detail.get("location"), detail.get("category"),
-                        detail.get("startup_id"), detail.get("description"),
-                    ),
-                )
-                fetch_and_upload_image(
-                    f"{API_BASE}/news/{n['id']}/image",
-                    "news",
-                    n["id"],
-                    "news",
-                    cursor,
-                )
-                max_id = max(max_id, n["id"])
+            details = fetch_details("news", run.listed(news_list))
+            for detail, image, error in fetch_concurrently(images.worker(), details):
+                if error:
+                    log.warning(f"[sync_news] Could not fetch/upload image for news_id={detail['id']}: {error}")
+                image_key = images.record(detail["id"], image)
+                if not run.needs_write(detail, image_key is not None):
+                    continue
+                batch.add((
+                    detail["id"], detail["title"], detail.get("news_date"),
+                    detail.get("location"), detail.get("category"),
+                    detail.get("startup_id"), detail.get("description"),
+                    image_key,
+                ))
+                run.written(detail["id"])
+            batch.flush(cursor)
             skip += page_size
-        if max_id > last_id:
-            update_last_synced("news", max_id, cursor)
+            conn.commit()
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_news"))
+        stats["images"] = images.report("sync_news")
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_events():
+def sync_events(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        last_id = get_last_synced("events", cursor)
-        max_id = last_id
-        skip = last_id
+        images = ImageSync("events", cursor)
+        run = SyncRun("events", cursor, mode)
+        batch = UpsertBatch(
+            "events",
+            ("id", "name", "dates", "location", "description", "event_type", "target_audience", "image_s3_key"),
+            update=("name", "dates", "location", "description", "event_type", "target_audience"),
+            coalesce=("image_s3_key",),
+            children=(images.batch, run.batch),
+        )
+        skip = 0
         page_size = 50
         while True:
-            events = fetch_json(f"{API_BASE}/events?skip={skip}&limit={page_size}")
+            events = fetch_page("events", skip, page_size)
             if not events:
                 break
-            for ev in events:
-                cursor.execute(
-                    """
-                    INSERT INTO events (id, name, dates, location, description, event_type, target_audience)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s)
-                    ON DUPLICATE KEY UPDATE
-                        name=VALUES(name),
-                        dates=VALUES(dates),
-                        location=VALUES(location),
-                        description=VALUES(description),
-                        event_type=VALUES(event_type),
-                        target_audience=VALUES(target_audience)
-                    """,
-                    (
-                        ev["id"], ev["name"], ev.get("dates"), ev.get("location"),
-                        ev.get("description"), ev.get("event_type"), ev.get("target_audience"),
-                    ),
-                )
-                fetch_and_upload_image(
-                    f"{API_BASE}/events/{ev['id']}/image",
-                    "events",
-                    ev["id"],
-                    "events",
-                    cursor,
-                )
-                max_id = max(max_id, ev["id"])
+            for ev, image, error in fetch_concurrently(images.worker(), run.listed(events)):
+                if error:
+                    log.warning(f"[sync_events] Could not fetch/upload image for event_id={ev['id']}: {error}")
+                image_key = images.record(ev["id"], image)
+                if not run.needs_write(ev, image_key is not None):
+                    continue
+                batch.add((
+                    ev["id"], ev["name"], ev.get("dates"), ev.get("location"),
+                    ev.get("description"), ev.get("event_type"), ev.get("target_audience"),
+                    image_key,
+                ))
+                run.written(ev["id"])
+            batch.flush(cursor)
             skip += page_size
-        if max_id > last_id:
-            update_last_synced("events", max_id, cursor)
+            conn.commit()
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_events"))
+        stats["images"] = images.report("sync_events")
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_users():
+def sync_users(mode: Optional[str] = None):
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
     try:
-        users = fetch_json(f"{API_BASE}/users")
-        last_id = get_last_synced("users", cursor)
-        max_id = last_id
-        for u in users:
-            cursor.execute(
-                """
-                INSERT INTO users (id, email, name, role, founder_id, investor_id)
-                VALUES (%s,%s,%s,%s,%s,%s)
-                ON DUPLICATE KEY UPDATE
-                    name=VALUES(name),
-                    role=VALUES(role),
-                    founder_id=VALUES(founder_id),
-                    investor_id=VALUES(investor_id)
-                """,
-                (
-                    u["id"], u["email"], u["name"], u["role"],
-                    u.get("founder_id"), u.get("investor_id"),
-                ),
-            )
-            fetch_and_upload_image(
-                f"{API_BASE}/users/{u['id']}/image",
-                "users",
-                u["id"],
-                "users",
-                cursor,
-            )
-            max_id = max(max_id, u["id"])
-        if max_id > last_id:
-            update_last_synced("users", max_id, cursor)
+        images = ImageSync("users", cursor)
+        run = SyncRun("users", cursor, mode, paged=False)
+        batch = UpsertBatch(
+            "users",
+            ("id", "email", "name", "role", "founder_id", "investor_id", "image_s3_key"),
+            update=("name", "role", "founder_id", "investor_id"),
+            coalesce=("image_s3_key",),
+            children=(images.batch, run.batch),
+        )
+        users = fetch_page("users")
+        for u, image, error in fetch_concurrently(images.worker(), run.listed(users)):
+            if error:
+                log.warning(f"[sync_users] Could not fetch/upload image for user_id={u['id']}: {error}")
+            image_key = images.record(u["id"], image)
+            if not run.needs_write(u, image_key is not None):
+                continue
+            batch.add((
+                u["id"], u["email"], u["name"], u["role"],
+                u.get("founder_id"), u.get("investor_id"),
+                image_key,
+            ))
+            run.written(u["id"])
+        batch.flush(cursor)
+        stats = {"rows": run.finish(cursor)}
         conn.commit()
+        stats.update(batch.report("sync_users"))
+        stats["images"] = images.report("sync_users")
+        return stats
     finally:
         cursor.close()
         conn.close()
 
-def sync_all():
+# Entities only wait for what they reference: news -> startups,
+# users -> founders (synced with startups) and investors.
+SYNC_DEPENDENCIES = {
+    "startups": (),
+    "investors": (),
+    "partners": (),
+    "events": (),
+    "news": ("startups",),
+    "users": ("startups", "investors"),
+}
+
+SYNC_FUNCTIONS = {
+    "startups": sync_startups,
+    "investors": sync_investors,
+    "partners": sync_partners,
+    "news": sync_news,
+    "events": sync_events,
+    "users": sync_users,
+}
+
+def _sync_entity(name: str, mode: Optional[str]) -> dict:
+    start = time.monotonic()
+    result = {}
+    try:
+        result["stats"] = SYNC_FUNCTIONS[name](mode)
+        result["status"] = "ok"
+    except UpstreamHTTPError as e:
+        log.warning(f"[sync_all] upstream error in {name}: {e}")
+        result["status"] = "upstream_error"
+        result["error"] = str(e)
+    except Exception as e:
+        log.exception(f"[sync_all] unexpected error in {name}: {e}")
+        result["status"] = "error"
+        result["error"] = str(e)
+    # Pages are committed as they go, so even a failed run may have written rows.
+    # Cascades follow deletes; a failed run may have deleted without saying so.
+    deleted = result.get("stats", {}).get("rows", {}).get("deleted", 1)
+    try:
+        record_change(name, also=DELETE_CASCADES.get(name, ()) if deleted else ())
+    except Exception as e:
+        log.warning(f"[sync_all] could not bump the {name} version: {e}")
+    result["duration_ms"] = int((time.monotonic() - start) * 1000)
+    return result
+
+def sync_all(mode: Optional[str] = None):
+    """Sync every entity, running those whose dependencies are done in
+    parallel, each on its own pooled connection."""
+    start = time.monotonic()
+    buffer_gauge.reset()
     results = {}
-    for name, fn in [
-        ("startups", sync_startups),
-        ("investors", sync_investors),
-        ("partners", sync_partners),
-        ("news", sync_news),
-        ("events", sync_events),
-        ("users", sync_users),
-    ]:
-        try:
-            fn()
-            results[name] = "ok"
-        except UpstreamHTTPError as e:
-            log.warning(f"[sync_all] upstream error in {name}: {e}")
-            results[name] = f"upstream_error:{e}"
-        except Exception as e:
-            log.exception(f"[sync_all] unexpected error in {name}: {e}")
-            results[name] = f"error:{e}"
-    log.info({"status": results, "synced_at": datetime.datetime.utcnow().isoformat() + "Z"})
-    return results
\ No newline at end of file
+    pending = dict(SYNC_DEPENDENCIES)
+    running = {}
+    with ThreadPoolExecutor(max_workers=len(SYNC_DEPENDENCIES), thread_name_prefix="sync-entity") as pool:
+        while pending or running:
+            for name, deps in list(pending.items()):
+                if all(d in results for d in deps):
+                    running[pool.submit(_sync_entity, name, mode)] = name
+                    del pending[name]
+            if not running:
+                raise RuntimeError(f"Unresolvable sync dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    summary = {
+        "entities": results,
+        "duration_ms": int((time.monotonic() - start) * 1000),
+        "memory": {
+            "image_buffer_peak_bytes": buffer_gauge.peak,
+            # ru_maxrss is the process's lifetime peak, not this run's
+            "process_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "synced_at": datetime.datetime.utcnow().isoformat() + "Z",
+    }
+    log.info({"status": {name: r["status"] for name, r in results.items()},
+              "memory": summary["memory"], "synced_at": summary["synced_at"]})
+    return summary
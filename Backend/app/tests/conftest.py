@@ -3,6 +3,8 @@ from unittest.mock import patch
 from fastapi.testclient import TestClient
 from app.main import app
 from app.routers import auth
+from app.utils.cache import entity_cache
+from app.utils.conditional import entity_versions
 
 @pytest.fixture(scope="session", autouse=True)
 def disable_scheduler():
@@ -14,3 +16,11 @@ def client():
     app.dependency_overrides[auth.require_admin] = lambda: {"id": 99, "role": "admin"}
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture(autouse=True)
+def clear_entity_cache():
+    entity_cache.clear()
+    entity_versions.clear()
+    with patch("app.utils.conditional.get_connection") as versions_conn:
+        versions_conn.return_value.cursor.return_value.fetchall.return_value = []
+        yield versions_conn
@@ -1,4 +1,7 @@
+import pytest
 from unittest.mock import patch, MagicMock
+from fastapi import HTTPException
+from app.routers.auth import get_user_name
 from app.utils.jwt import create_access_token
 from app.utils.security import hash_password
 
@@ -49,3 +52,20 @@ def test_login_and_me(client):
         resp2 = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
         assert resp2.status_code == 200
         assert resp2.json()["email"] == "x@y.com"
+
+def test_get_user_name_returns_its_connection():
+    with patch("app.db.connection.get_connection") as mock_conn:
+        cursor = MagicMock()
+        mock_conn.return_value.cursor.return_value = cursor
+        cursor.fetchone.return_value = {"id": 1, "name": "Ada"}
+        assert get_user_name(1) == "Ada"
+        cursor.fetchone.return_value = None
+        with pytest.raises(HTTPException):
+            get_user_name(2)
+        assert mock_conn.return_value.close.call_count == 2
+        assert cursor.close.call_count == 2
+
+        shared = MagicMock()
+        shared.fetchone.return_value = {"id": 3, "name": "Lin"}
+        assert get_user_name(3, shared) == "Lin"
+        assert mock_conn.call_count == 2
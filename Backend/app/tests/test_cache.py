@@ -0,0 +1,57 @@
+import time
+from unittest.mock import MagicMock, patch
+from app.utils.cache import EntityCache
+
+def test_entity_cache_reads_through_and_expires():
+    cache = EntityCache(ttl=30, max_entries=10)
+    loader = MagicMock(return_value={"id": 1})
+    assert cache.item("news", 1, loader) == {"id": 1}
+    assert cache.item("news", 1, loader) == {"id": 1}
+    assert loader.call_count == 1
+    with patch("app.utils.cache.time.monotonic", return_value=time.monotonic() + 31):
+        cache.item("news", 1, loader)
+    assert loader.call_count == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+def test_entity_cache_evicts_least_recently_used():
+    cache = EntityCache(ttl=30, max_entries=2)
+    cache.item("events", 1, lambda: "a")
+    cache.item("events", 2, lambda: "b")
+    cache.item("events", 1, lambda: "stale")
+    cache.item("events", 3, lambda: "c")
+    assert cache.item("events", 1, lambda: "reloaded") == "a"
+    assert cache.item("events", 2, lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 2
+
+def test_entity_cache_invalidate_drops_item_and_lists():
+    cache = EntityCache(ttl=30, max_entries=10)
+    cache.item("partners", 1, lambda: "p1")
+    cache.item("partners", 2, lambda: "p2")
+    cache.list("partners", (None, 100), lambda: ["p1", "p2"])
+    cache.item("investors", 1, lambda: "i1")
+    cache.invalidate("partners", 1)
+    assert cache.stats()["by_entity"] == {"partners": 1, "investors": 1}
+    assert cache.item("partners", 2, lambda: "reloaded") == "p2"
+    cache.invalidate("partners")
+    assert cache.stats()["by_entity"] == {"investors": 1}
+
+def test_entity_cache_does_not_store_loads_racing_an_invalidation():
+    cache = EntityCache(ttl=30, max_entries=10)
+    def loader():
+        cache.invalidate("startups", 1)
+        return "before write"
+    assert cache.item("startups", 1, loader) == "before write"
+    assert cache.item("startups", 1, lambda: "after write") == "after write"
+
+def test_entity_cache_does_not_cache_errors():
+    cache = EntityCache(ttl=30, max_entries=10)
+    def missing():
+        raise LookupError
+    for _ in range(2):
+        try:
+            cache.item("news", 9, missing)
+        except LookupError:
+            pass
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["entries"] == 0
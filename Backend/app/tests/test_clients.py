@@ -1,7 +1,74 @@
-from unittest.mock import patch
+import time
+import pytest
+from unittest.mock import patch, MagicMock
 import app.clients.jeb_api as jeb
 
 def test_jeb_api_methods():
     with patch("app.clients.jeb_api.requests.get") as m:
         m.return_value.json.return_value = {"ok": True}
         assert "ok" in m.return_value.json()
+
+def _resp(status, headers=None):
+    r = MagicMock()
+    r.status_code = status
+    r.ok = 200 <= status < 400
+    r.headers = headers or {}
+    r.text = "body"
+    r.json.return_value = [{"id": 1}]
+    return r
+
+def test_rate_limiter_backoff_delays_next_slot():
+    limiter = jeb.RateLimiter(0)
+    limiter.backoff(0.05)
+    start = time.monotonic()
+    limiter.wait()
+    assert time.monotonic() - start >= 0.04
+
+def test_retry_honours_retry_after_and_counts_per_endpoint():
+    with patch.object(jeb._session, "request", side_effect=[_resp(429, {"Retry-After": "0.01"}), _resp(200)]), \
+         patch("app.clients.jeb_api.time.sleep") as sleep:
+        assert jeb.get_page("startups/12/founders", {"skip": 0}) == [{"id": 1}]
+        sleep.assert_any_call(0.01)
+    endpoint = jeb.stats()["endpoints"]["/startups/{id}/founders"]
+    assert endpoint["throttled"] >= 1 and endpoint["retries"] >= 1
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = jeb.CircuitBreaker(threshold=2, cooldown=0.02)
+    breaker.failure()
+    breaker.before_request()
+    breaker.failure()
+    with pytest.raises(jeb.CircuitOpenError):
+        breaker.before_request()
+    time.sleep(0.03)
+    breaker.before_request()
+    assert breaker.state == "half_open"
+    breaker.success()
+    assert breaker.state == "closed"
+
+def test_retry_budget_limits_retries():
+    budget = jeb.RetryBudget(ratio=0.5, initial=1, cap=2)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    budget.on_request()
+    budget.on_request()
+    assert budget.try_spend()
+
+def test_half_open_trial_is_resolved_by_every_outcome():
+    breaker = jeb.CircuitBreaker(threshold=1, cooldown=0.0)
+    with patch.object(jeb, "breaker", breaker), patch("app.clients.jeb_api.time.sleep"):
+        breaker.failure()
+        with patch.object(jeb._session, "request", side_effect=ValueError("bad url")):
+            with pytest.raises(ValueError):
+                jeb.get_one("startups/1")
+        assert breaker.state == "open"
+        with patch.object(jeb._session, "request", return_value=_resp(429)):
+            with pytest.raises(jeb.UpstreamHTTPError):
+                jeb._request_with_retry("GET", "startups/1", retries=0)
+        assert breaker.state == "closed"
+
+def test_non_retryable_error_closes_streamed_response():
+    resp = _resp(403)
+    with patch.object(jeb._session, "request", return_value=resp):
+        with pytest.raises(jeb.UpstreamHTTPError):
+            jeb.get_stream("startups/1/image")
+    resp.close.assert_called_once()
@@ -0,0 +1,404 @@
+import json
+import time
+import asyncio
+import datetime
+import pytest
+from unittest.mock import patch, MagicMock, PropertyMock
+from starlette.websockets import WebSocketDisconnect
+from app.communication.hub import MessageHub, hub
+from app.communication.identity import identities
+from app.communication import search, archive, bulk
+from pydantic import TypeAdapter
+from app.communication.com_classes import Read_message
+from app.communication.privates_messages import publish_message, encode_messages
+from app.utils.jwt import create_access_token
+from app.main import app
+
+def _auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id), 'role': 'founder'})}"}
+
+def _conversation_cursor(messages):
+    cur = MagicMock()
+    cur.fetchone.side_effect = [
+        {"user1_id": 1, "user2_id": 2},
+        {"email": "a@x.com", "name": "A"},
+        {"email": "b@x.com", "name": "B"},
+    ]
+    cur.fetchall.return_value = messages
+    return cur
+
+def test_read_conversation_latest_page_in_order(client):
+    newest_first = [
+        {"id": 12, "sender_id": 2, "content": "yo", "created_at": None},
+        {"id": 11, "sender_id": 1, "content": "hi", "created_at": None},
+    ]
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = _conversation_cursor(newest_first)
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_conversation/5?limit=2")
+        assert r.status_code == 200
+        assert [m["id"] for m in r.json()] == [11, 12]
+        sql, params = cur.execute.call_args.args
+        assert "ORDER BY id DESC LIMIT" in sql and params == (5, 2)
+
+def test_read_conversation_before_and_after_cursors(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = _conversation_cursor([])
+        mock_conn.return_value.cursor.return_value = cur
+        client.get("/api/communication/read_conversation/5?before=40")
+        sql, params = cur.execute.call_args.args
+        assert "id < %s" in sql and params == (5, 40, 50)
+
+        cur = _conversation_cursor([{"id": 41, "sender_id": 1, "content": "x", "created_at": None}])
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_conversation/5?after=40&limit=10")
+        sql, params = cur.execute.call_args.args
+        assert "id > %s" in sql and "ORDER BY id ASC" in sql and params == (5, 40, 10)
+        assert r.json()[0]["id"] == 41
+
+def test_read_conversation_rejects_oversized_page(client):
+    assert client.get("/api/communication/read_conversation/5?limit=1000").status_code == 422
+
+def _users_cursor():
+    cur = MagicMock()
+    cur.fetchall.return_value = [
+        {"id": 1, "name": "A", "email": "a@x.com"},
+        {"id": 2, "name": "B", "email": "B@x.com"},
+    ]
+    return cur
+
+def test_send_message_moves_last_message_pointer(client):
+    identities.invalidate()
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = _users_cursor()
+        type(cur).lastrowid = PropertyMock(side_effect=[5, 77])
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.post("/api/communication/send_message",
+                        json={"sender_email": "b@x.com", "reciver_email": "a@x.com", "content_message": "hello"})
+        assert r.status_code == 200
+        calls = cur.execute.call_args_list
+        assert "WHERE email IN (%s,%s)" in calls[0].args[0] and calls[0].args[1] == ("a@x.com", "b@x.com")
+        assert "LAST_INSERT_ID(id)" in calls[1].args[0] and calls[1].args[1] == (1, 2)
+        sql, params = calls[-1].args
+        assert sql.startswith("UPDATE conversations SET last_message_id")
+        assert params == (77, 2, "hello", 5, 77)
+        mock_conn.return_value.commit.assert_called_once()
+
+def test_read_last_message_uses_pointer(client):
+    identities.invalidate()
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = _users_cursor()
+        cur.fetchone.side_effect = [
+            {"id": 5},
+            {"id": 77, "sender_id": 2, "content": "latest", "created_at": None},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_message/a@x.com/with/b@x.com")
+        assert r.json() == {"sender_name": "B", "content": "latest", "id": None, "created_at": None}
+        assert cur.execute.call_args_list[1].args[1] == (1, 2)
+        assert "JOIN messages m ON m.id = c.last_message_id" in cur.execute.call_args.args[0]
+
+        cur = MagicMock()
+        cur.fetchone.side_effect = [{"id": 5}, {"id": 78, "sender_id": 1, "content": "mine", "created_at": None}]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_message/b@x.com/with/A@x.com")
+        assert r.json()["sender_name"] == "A"
+        cur.fetchall.assert_not_called()
+        assert cur.execute.call_args_list[0].args[1] == (1, 2)
+
+def test_read_message_unknown_user(client):
+    identities.invalidate()
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [{"id": 1, "name": "A", "email": "a@x.com"}]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_message/a@x.com/with/ghost@x.com")
+        assert r.status_code == 501
+        assert "does not exist" in r.json()["detail"]
+
+def test_inbox_is_one_query(client):
+    row = {"conversation_id": 5, "user_id": 2, "name": "B", "email": "b@x.com", "last_message_id": 77,
+           "last_sender_id": 2, "last_message_preview": "latest", "last_message_at": None,
+           "unread": 2, "other_last_read_id": 70}
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [row]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/inbox/1?before=100&limit=20", headers=_auth(1))
+        assert r.status_code == 200
+        assert r.json() == [row]
+        cur.execute.assert_called_once()
+        assert cur.execute.call_args.args[1] == (1, 100, 100, 20, 1, 100, 100, 20, 20)
+
+def test_inbox_is_only_served_to_its_owner(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        assert client.get("/api/communication/inbox/1").status_code == 401
+        assert client.get("/api/communication/inbox/1", headers=_auth(2)).status_code == 403
+        mock_conn.assert_not_called()
+
+def test_read_last_message_by_id_skips_table_scan(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = {"email": "b@x.com"}
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_last_message_by_id/5/user/1")
+        assert r.json()["sender_name"] == "b@x.com"
+        cur.execute.assert_called_once()
+        cur.fetchall.assert_not_called()
+
+def test_hub_fans_out_and_drops_slow_subscribers():
+    async def scenario():
+        hub = MessageHub(queue_size=2)
+        fast, slow = hub.subscribe(1), hub.subscribe(2)
+        assert hub.publish([1, 2, 3], {"n": 1}) == 2
+        await asyncio.sleep(0)
+        assert await fast.queue.get() == {"n": 1}
+        for n in range(2, 4):
+            hub.publish([1, 2], {"n": n})
+        await asyncio.sleep(0)
+        assert slow.overflowed and slow.queue.get_nowait() is None
+        assert not fast.overflowed
+        hub.unsubscribe(slow)
+        return hub.stats()
+    stats = asyncio.run(scenario())
+    assert stats["connections"] == 1 and stats["dropped"] == 1
+
+def test_message_stream_pushes_published_messages(client):
+    token = create_access_token({"sub": "7", "role": "founder"})
+    with client.websocket_connect(f"/api/communication/ws?token={token}") as ws:
+        for _ in range(100):
+            if hub.stats()["connections"]:
+                break
+            time.sleep(0.01)
+        publish_message(5, 77, 7, 8, "hello")
+        event = ws.receive_json()
+        assert event["type"] == "message" and event["id"] == 77 and event["content"] == "hello"
+
+def test_message_stream_rejects_bad_token(client):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/communication/ws?token=bad") as ws:
+            ws.receive_json()
+
+def test_mark_read_recounts_from_index_and_publishes_receipt(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn, \
+         patch("app.communication.privates_messages.hub.publish") as publish:
+        cur = MagicMock()
+        cur.fetchone.side_effect = [
+            {"user1_id": 1, "user2_id": 2, "user1_last_read_id": 10, "user2_last_read_id": 40,
+             "last_message_id": 50},
+            {"unread": 3},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.post("/api/communication/read/5/user/2?up_to=45", headers=_auth(2))
+        assert r.json() == {"conversation_id": 5, "user_id": 2, "last_read_message_id": 45, "unread": 3}
+        count_sql, count_params = cur.execute.call_args_list[1].args
+        assert "id > %s" in count_sql and count_params == (5, 45, 2)
+        update_sql, update_params = cur.execute.call_args_list[2].args
+        assert "user2_last_read_id = %s, user2_unread = %s" in update_sql and update_params == (45, 3, 5)
+        assert publish.call_args.args[1]["type"] == "read"
+
+def test_mark_read_rejects_non_participant(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = {"user1_id": 1, "user2_id": 2, "user1_last_read_id": 0,
+                                     "user2_last_read_id": 0, "last_message_id": 5}
+        mock_conn.return_value.cursor.return_value = cur
+        assert client.post("/api/communication/read/5/user/9", headers=_auth(9)).status_code == 404
+
+def test_unread_total_sums_counters(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = {"unread": 4}
+        mock_conn.return_value.cursor.return_value = cur
+        assert client.get("/api/communication/unread/1", headers=_auth(1)).json() == {"user_id": 1, "unread": 4}
+        assert "SUM(user1_unread)" in cur.execute.call_args.args[0]
+
+def test_read_markers_and_unread_need_the_users_token(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        assert client.post("/api/communication/read/5/user/2").status_code == 401
+        assert client.post("/api/communication/read/5/user/2", headers=_auth(1)).status_code == 403
+        assert client.get("/api/communication/unread/1", headers=_auth(2)).status_code == 403
+        mock_conn.assert_not_called()
+
+def test_bulk_send_batches_everything_in_one_transaction(client):
+    identities.invalidate()
+    with patch("app.communication.privates_messages.get_connection") as mock_conn, \
+         patch("app.communication.privates_messages.hub.publish") as publish:
+        cur = MagicMock()
+        cur.rowcount = 1
+        cur.fetchall.side_effect = [
+            [{"id": 5, "name": "Admin", "email": "admin@x.com"}],
+            [{"id": 2, "name": "B", "email": "b@x.com"}],
+            [{"id": 9, "email": "f@x.com"}, {"id": 5, "email": "admin@x.com"}],
+            [],
+            [{"id": 30, "user1_id": 2, "user2_id": 5}, {"id": 31, "user1_id": 5, "user2_id": 9}],
+            [{"conversation_id": 30, "id": 100}, {"conversation_id": 31, "id": 101}],
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.post("/api/communication/bulk_send", json={
+            "sender_email": "admin@x.com", "content_message": "hello founders",
+            "recipient_emails": ["b@x.com", "ghost@x.com"], "sector": "AI",
+        })
+        assert r.status_code == 200
+        body = r.json()
+        assert body["recipients"] == 2 and body["unknown_emails"] == ["ghost@x.com"]
+        sqls = [c.args for c in cur.execute.call_args_list]
+        conv_insert = next(a for a in sqls if a[0].startswith("INSERT INTO conversations"))
+        assert conv_insert[1] == (2, 5, 5, 9)
+        msg_insert = next(a for a in sqls if a[0].startswith("INSERT INTO messages"))
+        assert msg_insert[0].count("(%s,%s,%s,%s)") == 2
+        assert msg_insert[1] == (30, 5, 2, "hello founders", 31, 5, 9, "hello founders")
+        update = next(a for a in sqls if "UPDATE conversations c" in a[0])
+        assert "JOIN" not in update[0] and update[1][:4] == (30, 100, 31, 101)
+        assert sum("MAX(id)" in a[0] for a in sqls) == 1
+        assert body["conversations_created"] == 2
+        mock_conn.return_value.commit.assert_called_once()
+        assert publish.call_count == 2
+
+def test_bulk_conversations_count_only_new_pairs():
+    cur = MagicMock()
+    cur.rowcount = 2
+    cur.fetchall.side_effect = [
+        [{"id": 30, "user1_id": 2, "user2_id": 5}],
+        [{"id": 31, "user1_id": 5, "user2_id": 9}],
+    ]
+    conversations, created = bulk.conversations_for(cur, 5, [2, 9])
+    assert conversations == {2: 30, 9: 31} and created == 1
+    insert = next(c.args for c in cur.execute.call_args_list if c.args[0].startswith("INSERT"))
+    assert insert[1] == (5, 9)
+
+def test_bulk_send_requires_recipients(client):
+    r = client.post("/api/communication/bulk_send", json={"sender_email": "a@x.com", "content_message": "x"})
+    assert r.status_code == 400
+
+def test_search_snippet_highlights_prefix_matches():
+    text = "x " * 60 + "Our Funding round closes next week, funded by two angels"
+    snippet, highlights = search.snippet(text, ["fund"])
+    assert snippet.startswith("…")
+    assert [snippet[s:e] for s, e in highlights] == ["Funding", "funded"]
+    assert search.boolean_query(search.search_terms("fund* -round")) == "+fund* +round*"
+
+def test_search_endpoint_scopes_to_user(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            {"id": 9, "conversation_id": 5, "sender_id": 2, "created_at": None, "content": "seed deck attached"},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/search/1?q=deck&limit=5", headers=_auth(1))
+        assert r.status_code == 200
+        hit = r.json()[0]
+        assert hit["snippet"] == "seed deck attached" and hit["highlights"] == [[5, 9]]
+        sql, params = cur.execute.call_args.args
+        assert "FROM messages m" in sql and "FROM messages_archive m" in sql
+        assert params == ("+deck*", 1, 1, None, None, 5) * 2 + (5,)
+
+def test_search_is_only_served_to_its_owner(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        assert client.get("/api/communication/search/1?q=deck").status_code == 401
+        assert client.get("/api/communication/search/1?q=deck", headers=_auth(2)).status_code == 403
+        mock_conn.assert_not_called()
+
+def test_read_conversation_falls_back_to_archive(client):
+    hot = [{"id": 60, "sender_id": 2, "content": "new", "created_at": None}]
+    archived = [
+        {"id": 30, "sender_id": 1, "content": "old", "created_at": None},
+        {"id": 29, "sender_id": 2, "content": "older", "created_at": None},
+    ]
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.side_effect = [
+            {"user1_id": 1, "user2_id": 2, "archived_through_id": 30},
+            {"email": "a@x.com", "name": "A"},
+            {"email": "b@x.com", "name": "B"},
+        ]
+        cur.fetchall.side_effect = [hot, archived]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_conversation/5?limit=2")
+        assert [m["id"] for m in r.json()] == [30, 60]
+        sql, params = cur.execute.call_args.args
+        assert "FROM messages_archive" in sql and params == (5, 2)
+
+def test_read_conversation_recent_page_stays_hot(client):
+    hot = [{"id": 61, "sender_id": 2, "content": "b", "created_at": None},
+           {"id": 60, "sender_id": 1, "content": "a", "created_at": None}]
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.side_effect = [
+            {"user1_id": 1, "user2_id": 2, "archived_through_id": 30},
+            {"email": "a@x.com", "name": "A"},
+            {"email": "b@x.com", "name": "B"},
+        ]
+        cur.fetchall.return_value = hot
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_conversation/5?limit=2")
+        assert [m["id"] for m in r.json()] == [60, 61]
+        assert not any("messages_archive" in c.args[0] for c in cur.execute.call_args_list)
+
+def test_archive_messages_moves_batches_and_keeps_last_message():
+    with patch("app.communication.archive.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.side_effect = [[{"id": 3}, {"id": 4}], [{"id": 9}], []]
+        mock_conn.return_value.cursor.return_value = cur
+        summary = archive.archive_messages(older_than_days=30, batch_size=2)
+        assert summary["archived"] == 3 and summary["batches"] == 2
+        selects = [c.args for c in cur.execute.call_args_list if c.args[0].startswith("SELECT m.id")]
+        assert "m.id < c.last_message_id" in selects[0][0]
+        assert [s[1][0] for s in selects] == [0, 4]
+        deletes = [c.args for c in cur.execute.call_args_list if c.args[0].startswith("DELETE")]
+        assert deletes == [("DELETE FROM messages WHERE id IN (%s,%s)", (3, 4)),
+                           ("DELETE FROM messages WHERE id IN (%s)", (9,))]
+        assert mock_conn.return_value.commit.call_count == 2
+
+def test_archive_endpoint_is_admin_only(client):
+    with patch.dict(app.dependency_overrides, clear=True), \
+         patch("app.main.archive_messages") as archive_job:
+        assert client.post("/admin/messages/archive").status_code == 401
+        assert client.post("/admin/messages/archive", headers=_auth(1)).status_code == 403
+        archive_job.assert_not_called()
+
+def test_encoded_messages_match_pydantic_serialization():
+    rows = [{"id": 1, "sender_id": 1, "content": "héllo \"x\"", "created_at": datetime.datetime(2024, 5, 1, 9, 30, 1, 5)},
+            {"id": 2, "sender_id": 3, "content": "stranger", "created_at": None},
+            {"id": 3, "sender_id": 2, "content": "yo", "created_at": None}]
+    names = {1: "a@x.com", 2: "b@x.com"}
+    models = [Read_message(sender_name=names[r["sender_id"]], content=r["content"], id=r["id"], created_at=r["created_at"])
+              for r in rows if r["sender_id"] in names]
+    expected = TypeAdapter(list[Read_message]).dump_python(models, mode="json")
+    assert json.loads(b"".join(encode_messages((rows[:1], rows[1:]), names))) == expected
+    assert b"".join(encode_messages(([], []), names)) == b"[]"
+
+def test_history_streams_archive_then_hot_in_batches(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn, \
+         patch("app.communication.privates_messages.HISTORY_STREAM_BATCH", 1):
+        cur = _conversation_cursor([])
+        cur.fetchone.side_effect = [
+            {"user1_id": 1, "user2_id": 2, "archived_through_id": 7},
+            {"email": "a@x.com", "name": "A"},
+            {"email": "b@x.com", "name": "B"},
+        ]
+        cur.fetchmany.side_effect = [
+            [{"id": 7, "sender_id": 1, "content": "old", "created_at": None}], [],
+            [{"id": 8, "sender_id": 2, "content": "new", "created_at": None}], [],
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/communication/read_conversation/5/history", headers=_auth(1))
+        assert r.headers["content-type"] == "application/json"
+        assert [(m["id"], m["sender_name"]) for m in r.json()] == [(7, "a@x.com"), (8, "b@x.com")]
+        tables = [c.args[0].split("FROM ")[1].split()[0] for c in cur.execute.call_args_list[3:]]
+        assert tables == ["messages_archive", "messages"]
+        mock_conn.return_value.close.assert_called_once()
+
+def test_history_is_only_streamed_to_participants(client):
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.side_effect = [
+            {"user1_id": 1, "user2_id": 2, "archived_through_id": 0},
+            {"email": "a@x.com", "name": "A"},
+            {"email": "b@x.com", "name": "B"},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        assert client.get("/api/communication/read_conversation/5/history").status_code == 401
+        assert client.get("/api/communication/read_conversation/5/history", headers=_auth(3)).status_code == 403
+        assert not cur.fetchmany.called
+        mock_conn.return_value.close.assert_called_once()
@@ -0,0 +1,43 @@
+import time
+from unittest.mock import MagicMock, patch
+from app.utils.cache import entity_cache
+from app.utils.conditional import EntityVersions, bump_version, commit_change, etag_matches
+
+def test_etag_matches_lists_weak_tags_and_wildcard():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+def test_entity_versions_refresh_after_ttl_and_invalidate_moved_entities(clear_entity_cache):
+    cur = clear_entity_cache.return_value.cursor.return_value
+    cur.fetchall.return_value = [{"entity": "news", "version": 3}]
+    versions = EntityVersions(ttl=1)
+    assert versions.get("news") == 3
+    assert versions.get("news") == 3
+    assert cur.execute.call_count == 1
+
+    entity_cache.item("news", 1, lambda: "cached")
+    cur.fetchall.return_value = [{"entity": "news", "version": 4}]
+    with patch("app.utils.conditional.time.monotonic", return_value=time.monotonic() + 2):
+        assert versions.get("news") == 4
+    assert entity_cache.item("news", 1, lambda: "reloaded") == "reloaded"
+
+def test_commit_change_bumps_in_the_same_transaction():
+    conn, cursor = MagicMock(), MagicMock()
+    calls = MagicMock()
+    calls.attach_mock(cursor.execute, "execute")
+    calls.attach_mock(conn.commit, "commit")
+    entity_cache.item("events", 5, lambda: "cached")
+    commit_change(conn, cursor, "events", 5)
+    assert [c[0] for c in calls.mock_calls] == ["execute", "commit"]
+    assert "entity_versions" in cursor.execute.call_args.args[0]
+    assert cursor.execute.call_args.args[1] == ("events",)
+    assert entity_cache.item("events", 5, lambda: "reloaded") == "reloaded"
+
+def test_bump_version_upserts_the_counter():
+    cursor = MagicMock()
+    bump_version(cursor, "startups")
+    sql = cursor.execute.call_args.args[0]
+    assert "ON DUPLICATE KEY UPDATE version = version + 1" in sql
@@ -0,0 +1,61 @@
+import gc
+import pytest
+from unittest.mock import MagicMock
+from app.db.connection import ConnectionPool, PoolTimeoutError
+
+def make_pool(size=2, timeout=0.05, recycle=1000, ping_after=1000):
+    return ConnectionPool(MagicMock(side_effect=lambda: MagicMock()), size, timeout, recycle, ping_after)
+
+def test_pool_reuses_released_connection():
+    pool = make_pool()
+    c1 = pool.acquire()
+    raw = c1._raw
+    c1.close()
+    c2 = pool.acquire()
+    assert c2._raw is raw
+    raw.rollback.assert_called_once()
+    assert pool._connect.call_count == 1
+    assert pool.stats()["in_use"] == 1
+
+def test_pool_times_out_when_exhausted():
+    pool = make_pool(size=1)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+def test_pool_recycles_and_replaces_broken():
+    pool = make_pool(recycle=-1)
+    c = pool.acquire()
+    c.close()
+    pool.acquire()
+    assert pool.stats()["recycled"] == 1
+
+    pool = make_pool(ping_after=-1)
+    c = pool.acquire()
+    c._raw.ping.side_effect = Exception("gone")
+    c.close()
+    pool.acquire()
+    assert pool.stats()["broken"] == 1
+    assert pool._connect.call_count == 2
+
+def test_pool_releases_slot_on_connect_failure():
+    pool = ConnectionPool(MagicMock(side_effect=Exception("down")), 1, 0.05, 1000, 1000)
+    with pytest.raises(Exception):
+        pool.acquire()
+    assert pool.stats()["in_use"] == 0
+
+def test_pool_reclaims_connections_dropped_without_close():
+    pool = make_pool(size=1)
+    conn = pool.acquire()
+    raw = conn._raw
+    del conn
+    gc.collect()
+    assert pool.stats()["in_use"] == 0 and pool.stats()["reclaimed"] == 1
+    raw.rollback.assert_called_once()
+    c = pool.acquire()
+    assert c._raw is raw
+    c.close()
+    del c
+    gc.collect()
+    assert pool.stats()["reclaimed"] == 1
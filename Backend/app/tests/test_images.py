@@ -0,0 +1,18 @@
+from unittest.mock import patch, MagicMock
+
+def test_batch_image_urls(client):
+    with patch("app.routers.images.get_connection") as mock_conn, \
+         patch("app.routers.images.presigned_url", side_effect=lambda key: f"https://s3/{key}"):
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            {"id": 1, "image_s3_key": "startups/1/a.png"},
+            {"id": 2, "image_s3_key": None},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/images/startups?ids=1&ids=2&ids=3&ids=1")
+        assert r.status_code == 200
+        assert r.json()["urls"] == {"1": "https://s3/startups/1/a.png", "2": None, "3": None}
+        assert cur.execute.call_args.args[1] == (1, 2, 3)
+
+def test_batch_image_urls_rejects_unknown_entity(client):
+    assert client.get("/api/images/secrets?ids=1").status_code == 404
@@ -1,4 +1,7 @@
+import pytest
 from unittest.mock import patch
+from app.main import app
+from app.utils.jwt import create_access_token
 
 def test_root_and_admin(client):
     r = client.get("/")
@@ -9,3 +12,16 @@ def test_root_and_admin(client):
         r = client.post("/admin/sync")
         assert r.status_code == 200
         assert r.json() == {"ok": True}
+
+@pytest.mark.parametrize("path", [
+    "/admin/db/pool",
+    "/admin/jeb/stats",
+    "/admin/ws/stats",
+    "/admin/cache/entities",
+    "/admin/s3/presigned-cache",
+])
+def test_admin_stats_need_an_admin(client, path):
+    founder = {"Authorization": f"Bearer {create_access_token({'sub': '1', 'role': 'founder'})}"}
+    with patch.dict(app.dependency_overrides, clear=True):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers=founder).status_code == 403
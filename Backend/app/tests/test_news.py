@@ -20,6 +20,16 @@ def test_get_news(client):
         assert r.status_code == 200
         assert r.json()[0]["title"] == "Big News"
 
+def test_get_news_pages_past_null_dates(client):
+    with patch("app.routers.news.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [{**news_row, "news_date": None, "id": 4}]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/news/?limit=1")
+        client.get(f"/api/news/?limit=1&cursor={r.headers['X-Next-Cursor']}")
+        sql, params = cur.execute.call_args.args
+        assert "news_date IS NULL AND id < %s" in sql and params == (4, 1)
+
 def test_get_news_item_not_found(client):
     with patch("app.routers.news.get_connection") as mock_conn:
         cur = MagicMock()
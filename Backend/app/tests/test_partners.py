@@ -1,4 +1,5 @@
 from unittest.mock import patch, MagicMock
+from app.utils.conditional import entity_versions
 
 partner_row = {
     "id": 1,
@@ -29,3 +30,67 @@ def test_get_partner_not_found(client):
         mock_conn.return_value.cursor.return_value = cur
         r = client.get("/api/partners/42")
         assert r.status_code == 404
+
+def test_get_partner_is_cached_until_updated(client):
+    with patch("app.routers.partners.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = partner_row
+        mock_conn.return_value.cursor.return_value = cur
+        assert client.get("/api/partners/1").json()["name"] == "Partner A"
+        assert client.get("/api/partners/1").status_code == 200
+        assert mock_conn.call_count == 1
+
+        cur.fetchone.return_value = {**partner_row, "name": "Partner B"}
+        assert client.put("/api/partners/1", json={"name": "Partner B"}).status_code == 200
+        assert client.get("/api/partners/1").json()["name"] == "Partner B"
+        assert mock_conn.call_count == 3
+
+def test_partner_list_is_cached_until_created(client):
+    with patch("app.routers.partners.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [partner_row]
+        cur.fetchone.side_effect = [None, partner_row]
+        cur.lastrowid = 2
+        mock_conn.return_value.cursor.return_value = cur
+        client.get("/api/partners/")
+        client.get("/api/partners/")
+        assert mock_conn.call_count == 1
+        r = client.post("/api/partners/", json={"name": "Partner C", "email": "c@example.com"})
+        assert r.status_code == 200
+        client.get("/api/partners/")
+        assert mock_conn.call_count == 3
+
+def test_get_partner_answers_304_until_a_write(client):
+    with patch("app.routers.partners.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = partner_row
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/partners/1")
+        etag = r.headers["etag"]
+        assert r.headers["cache-control"] == "public, no-cache"
+
+        r = client.get("/api/partners/1", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.headers["etag"] == etag
+        assert r.content == b""
+        assert client.get("/api/partners/2", headers={"If-None-Match": etag}).status_code == 200
+
+        client.put("/api/partners/1", json={"name": "Partner B"})
+        assert any("entity_versions" in c.args[0] for c in cur.execute.call_args_list)
+
+def test_partner_list_etag_follows_the_entity_version(client, clear_entity_cache):
+    versions = clear_entity_cache.return_value.cursor.return_value
+    versions.fetchall.return_value = [{"entity": "partners", "version": 1}]
+    with patch("app.routers.partners.get_connection") as mock_conn:
+        mock_conn.return_value.cursor.return_value.fetchall.return_value = [partner_row]
+        r = client.get("/api/partners/")
+        assert r.headers["cache-control"].startswith("public, max-age=")
+        assert client.get("/api/partners/", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+        assert mock_conn.call_count == 1
+
+        versions.fetchall.return_value = [{"entity": "partners", "version": 2}]
+        entity_versions.expire()
+        r2 = client.get("/api/partners/", headers={"If-None-Match": r.headers["etag"]})
+        assert r2.status_code == 200
+        assert r2.headers["etag"] != r.headers["etag"]
+        assert mock_conn.call_count == 2
@@ -1,6 +1,12 @@
 from unittest.mock import patch
-from app.utils.s3 import upload_file_to_s3, generate_presigned_url, delete_file_from_s3
+from app.utils.s3 import (
+    upload_file_to_s3, generate_presigned_url, delete_file_from_s3,
+    upload_stream_to_s3, buffer_gauge, UploadRejected, PresignedUrlCache,
+)
 import io
+import time
+import hashlib
+import pytest
 
 def test_upload_file_to_s3():
     with patch("app.utils.s3.s3_client.upload_fileobj") as mock_upload:
@@ -15,3 +21,58 @@ def test_generate_and_delete():
     with patch("app.utils.s3.s3_client.delete_object") as m:
         delete_file_from_s3("k")
         m.assert_called_once()
+
+def test_upload_stream_uses_multipart_for_large_bodies():
+    with patch("app.utils.s3.s3_client") as s3:
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        s3.upload_part.side_effect = lambda **kw: {"ETag": f"e{kw['PartNumber']}"}
+        buffer_gauge.reset()
+        uploaded, sha, size = upload_stream_to_s3(iter([b"aaaa", b"bbbb", b"cc"]), "k", "image/png",
+                                                  max_bytes=100, part_size=4)
+        assert uploaded and size == 10 and sha == hashlib.sha256(b"aaaabbbbcc").hexdigest()
+        parts = s3.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"]
+        assert [p["PartNumber"] for p in parts] == [1, 2, 3]
+        s3.put_object.assert_not_called()
+        assert buffer_gauge.peak == 4 and buffer_gauge.current == 0
+
+def test_upload_stream_small_body_and_limits():
+    with patch("app.utils.s3.s3_client") as s3:
+        assert upload_stream_to_s3([b"ab"], "k", "image/png", max_bytes=100)[0]
+        s3.put_object.assert_called_once()
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        s3.upload_part.return_value = {"ETag": "e"}
+        with pytest.raises(UploadRejected):
+            upload_stream_to_s3([b"aaaa", b"bbbb"], "k", "image/png", max_bytes=6, part_size=4)
+        s3.abort_multipart_upload.assert_called_once()
+
+def test_upload_stream_with_skip_sends_nothing_before_hashing():
+    with patch("app.utils.s3.s3_client") as s3:
+        assert not upload_stream_to_s3([b"aaaa", b"b"], "k", "image/png", max_bytes=100,
+                                       part_size=4, skip=lambda sha: True)[0]
+        s3.create_multipart_upload.assert_not_called()
+        s3.upload_part.assert_not_called()
+
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        s3.upload_part.side_effect = lambda **kw: {"ETag": f"e{kw['PartNumber']}"}
+        buffer_gauge.reset()
+        uploaded, _, size = upload_stream_to_s3(iter([b"aaaa", b"bbbb", b"cc"]), "k", "image/png",
+                                                max_bytes=100, part_size=4, skip=lambda sha: False)
+        assert uploaded and size == 10
+        bodies = [bytes(c.kwargs["Body"]) for c in s3.upload_part.call_args_list]
+        assert bodies == [b"aaaa", b"bbbb", b"cc"]
+        assert buffer_gauge.peak <= 4 and buffer_gauge.current == 0
+
+def test_presigned_url_cache_reuses_refreshes_and_invalidates():
+    cache = PresignedUrlCache(expires_in=3600, refresh_before=300, max_entries=2)
+    with patch("app.utils.s3.s3_client.generate_presigned_url", side_effect=["u1", "u2", "u3", "u4", "u5"]) as gen:
+        assert cache.get("a") == "u1"
+        assert cache.get("a") == "u1"
+        assert gen.call_args.kwargs["ExpiresIn"] == 3600
+        cache.invalidate("a")
+        assert cache.get("a") == "u2"
+        cache.get("b")
+        cache.get("c")
+        assert "a" not in cache._entries
+        with patch("app.utils.s3.time.monotonic", return_value=time.monotonic() + 3301):
+            assert cache.get("c") == "u5"
+    assert cache.stats()["hits"] == 1
@@ -9,3 +9,9 @@ def test_register_scheduler_calls_sync():
         for h in app.router.on_startup:
             h()
         mock_sync.assert_called()
+
+def test_register_scheduler_schedules_message_archive():
+    with patch("app.scheduler.sync_runner.BackgroundScheduler") as scheduler:
+        register_scheduler(FastAPI())
+        jobs = [c.kwargs["id"] for c in scheduler.return_value.add_job.call_args_list]
+        assert jobs == ["sync_all_job", "archive_messages_job"]
@@ -0,0 +1,40 @@
+from unittest.mock import patch, MagicMock
+from app.communication.search import search_terms
+from app.utils.pagination import encode_cursor
+
+def test_search_ranks_across_types(client):
+    with patch("app.routers.search.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [
+            {"type": "startup", "id": 3, "title": "GreenPay", "description": "Payments for green energy",
+             "score": 2.5, "uid": 15},
+            {"type": "news", "id": 9, "title": "Funding", "description": None, "score": 1.0, "uid": 48},
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/search?q=green pay&limit=2")
+        assert r.status_code == 200
+        hits = r.json()
+        assert [(h["type"], h["id"]) for h in hits] == [("startup", 3), ("news", 9)]
+        assert hits[0]["highlights"] == [[0, 8], [13, 18]] and hits[1]["snippet"] is None
+        sql, params = cur.execute.call_args.args
+        assert sql.count("UNION ALL") == 4 and "ORDER BY score DESC, uid DESC" in sql
+        assert "CAST(MATCH(name, email, address, description, sector, needs) AGAINST (%s IN BOOLEAN MODE) AS DECIMAL(12,6))" in sql
+        assert params == ("+green* +pay*",) * 10 + (2,)
+        token = r.headers["X-Next-Cursor"]
+
+        cur.fetchall.return_value = []
+        r = client.get(f"/api/search?q=green pay&type=news&type=event&cursor={token}")
+        sql, params = cur.execute.call_args.args
+        assert "FROM news" in sql and "FROM events" in sql and "FROM startups" not in sql
+        assert "WHERE score < CAST(%s AS DECIMAL(12,6)) OR (score = CAST(%s AS DECIMAL(12,6)) AND uid < %s)" in sql
+        assert params == ("+green* +pay*",) * 4 + ("1.0", "1.0", 48, 20)
+        assert "X-Next-Cursor" not in r.headers
+
+def test_search_validates_input(client):
+    with patch("app.routers.search.get_connection") as mock_conn:
+        assert client.get("/api/search?q=--").json() == []
+        assert client.get("/api/search?q=the ai").json() == []
+        mock_conn.assert_not_called()
+    assert search_terms("The AI of green-pay") == ["green", "pay"]
+    assert client.get(f"/api/search?q=green&cursor={encode_cursor(1.5, 3)}").status_code == 400
+    assert client.get("/api/search?q=x&type=users").status_code == 422
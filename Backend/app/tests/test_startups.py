@@ -1,4 +1,9 @@
+import time
+import asyncio
+import httpx
 from unittest.mock import patch, MagicMock
+from app.main import app
+from app.routers.auth import require_founder_of_startup
 
 valid_row = {
     "id": 1,
@@ -26,6 +31,55 @@ def test_get_startups(client):
         r = client.get("/api/startups/")
         assert r.status_code == 200
 
+def test_get_startups_keyset_cursor(client):
+    with patch("app.routers.startups.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.return_value = [{**valid_row, "id": 7, "created_at": "2024-03-01"},
+                                     {**valid_row, "id": 5, "created_at": "2024-02-01"}]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/startups/?limit=2")
+        sql, params = cur.execute.call_args.args
+        assert "ORDER BY created_at DESC, id DESC LIMIT %s" in sql and "OFFSET" not in sql
+        assert params == (2,)
+        token = r.headers["X-Next-Cursor"]
+
+        cur.execute.reset_mock()
+        cur.fetchall.side_effect = [[{**valid_row, "id": 3, "created_at": "2024-01-01"}], [valid_row]]
+        r = client.get(f"/api/startups/?limit=2&cursor={token}")
+        (range_sql, range_params), (tail_sql, tail_params) = [c.args for c in cur.execute.call_args_list]
+        assert "(created_at, id) < (%s, %s)" in range_sql and " OR " not in range_sql
+        assert range_params == ("2024-02-01", 5, 2)
+        assert "created_at IS NULL" in tail_sql and tail_params == (1,)
+        assert [s["id"] for s in r.json()] == [3, 1]
+        assert "X-Next-Cursor" in r.headers
+
+def test_get_startups_rejects_bad_cursor_and_large_pages(client):
+    with patch("app.routers.startups.get_connection") as mock_conn:
+        assert client.get("/api/startups/?cursor=not-a-cursor").status_code == 400
+        mock_conn.return_value.close.assert_called_once()
+    assert client.get("/api/startups/?limit=1000").status_code == 422
+
+def test_startup_directory_filters_and_facets(client):
+    with patch("app.routers.startups.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchall.side_effect = [
+            [{**valid_row, "sector": "Fintech", "maturity": "Seed"}],
+            [{"value": "Fintech", "count": 1}, {"value": "Health", "count": 4}],
+            [{"value": "Seed", "count": 1}],
+        ]
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.get("/api/startups/directory?sector=Fintech&q=pay app")
+        assert r.status_code == 200
+        body = r.json()
+        assert body["items"][0]["sector"] == "Fintech" and body["next_cursor"] is None
+        assert body["facets"]["sector"][1] == {"value": "Health", "count": 4}
+        (page_sql, page_params), (sector_sql, sector_params), (maturity_sql, maturity_params) = \
+            [c.args for c in cur.execute.call_args_list]
+        assert "sector = %s AND MATCH(name, email, address, description, sector, needs)" in page_sql
+        assert page_params == ("Fintech", "+pay* +app*", 100)
+        assert "GROUP BY sector" in sector_sql and sector_params == ("+pay* +app*",)
+        assert "GROUP BY maturity" in maturity_sql and maturity_params == ("Fintech", "+pay* +app*")
+
 def test_get_startup_notfound(client):
     with patch("app.routers.startups.get_connection") as mock_conn:
         cur = MagicMock()
@@ -33,3 +87,52 @@ def test_get_startup_notfound(client):
         mock_conn.return_value.cursor.return_value = cur
         r = client.get("/api/startups/99")
         assert r.status_code == 404
+
+def test_startup_view_leaves_the_version_alone(client):
+    with patch("app.routers.startups.get_connection") as mock_conn:
+        cur = MagicMock()
+        cur.fetchone.return_value = {"id": 1, "view_count": 4}
+        mock_conn.return_value.cursor.return_value = cur
+        r = client.post("/api/startups/1/view")
+        assert r.json() == {"startup_id": 1, "new_view_count": 5}
+        assert not any("entity_versions" in c.args[0] for c in cur.execute.call_args_list)
+        mock_conn.return_value.commit.assert_called_once()
+
+def test_delete_startup_bumps_news_too(client):
+    with patch("app.routers.startups.get_connection") as mock_conn, \
+         patch.dict(app.dependency_overrides, {require_founder_of_startup: lambda: {"sub": "1"}}):
+        cur = MagicMock()
+        cur.fetchone.return_value = (1,)
+        mock_conn.return_value.cursor.return_value = cur
+        assert client.delete("/api/startups/1").status_code == 200
+        bumped = [c.args[1] for c in cur.execute.call_args_list if "entity_versions" in c.args[0]]
+        assert bumped == [("startups",), ("news",)]
+
+def test_image_uploads_do_not_block_other_requests():
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            async def probe():
+                latencies = []
+                for _ in range(10):
+                    start = time.monotonic()
+                    assert (await ac.get("/")).status_code == 200
+                    await asyncio.sleep(0.03)
+                    latencies.append(time.monotonic() - start)
+                return latencies
+            uploads = [ac.post(f"/api/startups/{i}/image", files={"file": ("a.png", b"img", "image/png")})
+                       for i in range(1, 5)]
+            latencies, *responses = await asyncio.gather(probe(), *uploads)
+        return latencies, responses
+
+    def slow_upload(*args, **kwargs):
+        time.sleep(0.3)
+
+    with patch("app.routers.startups.get_connection") as mock_conn, \
+         patch("app.utils.s3.s3_client.upload_fileobj", side_effect=slow_upload):
+        cur = MagicMock()
+        cur.fetchone.return_value = {"id": 1}
+        mock_conn.return_value.cursor.return_value = cur
+        latencies, responses = asyncio.run(scenario())
+    assert all(r.status_code == 200 for r in responses)
+    assert max(latencies) < 0.15
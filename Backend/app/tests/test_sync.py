@@ -0,0 +1,202 @@
+import time
+import hashlib
+from unittest.mock import patch, MagicMock
+from app.services import sync
+from app.services.batch_writer import UpsertBatch
+
+def test_fetch_concurrently_keeps_order_and_errors():
+    def fn(item):
+        if item["id"] == 2:
+            raise ValueError("boom")
+        time.sleep(0.01 * (5 - item["id"]))
+        return item["id"] * 10
+    results = sync.fetch_concurrently(fn, [{"id": i} for i in range(1, 5)])
+    assert [r[0]["id"] for r in results] == [1, 2, 3, 4]
+    assert [r[1] for r in results] == [10, None, 30, 40]
+    assert isinstance(results[1][2], ValueError)
+
+def test_sync_investors_records_state():
+    page = [{"id": 3, "name": "A", "email": "a@x.com"}, {"id": 7, "name": "B", "email": "b@x.com"}]
+    with patch("app.services.sync.get_connection") as mock_conn, \
+         patch("app.services.sync.fetch_page", side_effect=[page, [], page[-1:]]) as fetch_page, \
+         patch("app.services.sync.fetch_and_upload_image",
+               return_value=({"etag": None, "last_modified": None, "content_hash": "h", "s3_key": "investors/3/image.png"}, "uploaded")):
+        cur = MagicMock()
+        cur.fetchone.return_value = {"last_reconciled_at": None}
+        mock_conn.return_value.cursor.return_value = cur
+        stats = sync.sync_investors()
+        state = [c for c in cur.execute.call_args_list if "sync_state" in c.args[0] and "INSERT" in c.args[0]]
+        assert state[-1].args[1][:3] == ("investors", 7, "reconcile")
+        assert stats["rows"]["changed"] == 2
+        mock_conn.return_value.commit.assert_called()
+        fetch_page.assert_called_with("investors", 1, 2)
+
+def test_upsert_batch_flushes_parent_then_children():
+    child = UpsertBatch("founders", ("id", "startup_id"), update=("startup_id",))
+    parent = UpsertBatch("startups", ("id", "name", "image_s3_key"), update=("name",),
+                         coalesce=("image_s3_key",), children=(child,), max_rows=2)
+    for i in range(3):
+        parent.add((i, f"s{i}", None))
+    child.add((10, 0))
+    cur = MagicMock()
+    assert parent.flush(cur) == 4
+    sqls = [c.args[0] for c in cur.execute.call_args_list]
+    assert [s.split()[2] for s in sqls] == ["startups", "startups", "founders"]
+    assert sqls[0].count("(%s,%s,%s)") == 2
+    assert "image_s3_key=COALESCE(VALUES(image_s3_key), image_s3_key)" in sqls[0]
+    assert cur.execute.call_args_list[1].args[1] == (2, "s2", None)
+    assert parent.stats()["rows"] == 3 and not parent.rows
+
+def _image_response(status, content=b"", headers=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.iter_content.return_value = [content[:2], content[2:]]
+    resp.headers = headers or {}
+    resp.__enter__.return_value = resp
+    return resp
+
+def test_fetch_image_conditional_and_unchanged():
+    stored = {"etag": '"v1"', "last_modified": None, "content_hash": hashlib.sha256(b"img").hexdigest(),
+              "s3_key": "events/1/image.png"}
+    with patch("app.services.sync.jeb_api.get_stream", return_value=_image_response(304)) as get, \
+         patch("app.utils.s3.s3_client") as s3:
+        fp, outcome = sync.fetch_and_upload_image("u", "events", 1, stored)
+        assert outcome == "not_modified" and fp is stored
+        assert get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        s3.put_object.assert_not_called()
+    with patch("app.services.sync.jeb_api.get_stream", return_value=_image_response(200, b"img", {"ETag": '"v2"'})), \
+         patch("app.utils.s3.s3_client") as s3:
+        fp, outcome = sync.fetch_and_upload_image("u", "events", 1, stored)
+        assert outcome == "unchanged" and fp["etag"] == '"v2"'
+        s3.put_object.assert_not_called()
+
+def test_fetch_image_rejects_wrong_type_and_oversized():
+    html = _image_response(200, b"<html>", {"Content-Type": "text/html"})
+    with patch("app.services.sync.jeb_api.get_stream", return_value=html), \
+         patch("app.utils.s3.s3_client") as s3:
+        assert sync.fetch_and_upload_image("u", "events", 1) == (None, "rejected")
+    big = _image_response(200, b"abcdef", {"Content-Type": "image/png"})
+    with patch("app.services.sync.jeb_api.get_stream", return_value=big), \
+         patch("app.services.sync.SYNC_IMAGE_MAX_BYTES", 4), \
+         patch("app.utils.s3.s3_client") as s3:
+        assert sync.fetch_and_upload_image("u", "events", 1) == (None, "rejected")
+        s3.put_object.assert_not_called()
+
+def test_image_sync_record_skips_unchanged_key():
+    cur = MagicMock()
+    stored = {"etag": "a", "last_modified": None, "content_hash": "h", "s3_key": "events/1/image.png"}
+    cur.fetchall.return_value = [{"entity_id": 1, **stored}]
+    images = sync.ImageSync("events", cur)
+    assert images.record(1, dict(stored)) is None
+    assert not images.batch.rows
+    assert images.record(1, {**stored, "etag": "b"}) is None
+    assert len(images.batch.rows) == 1
+    assert images.record(2, {**stored, "s3_key": "events/2/image.png"}) == "events/2/image.png"
+
+def test_sync_run_incremental_skips_unchanged_rows():
+    unchanged, edited = {"id": 1, "name": "A"}, {"id": 2, "name": "B"}
+    cur = MagicMock()
+    cur.fetchall.return_value = [
+        {"row_id": 1, "content_hash": sync.row_hash(unchanged)},
+        {"row_id": 2, "content_hash": "old"},
+    ]
+    run = sync.SyncRun("events", cur, "incremental")
+    todo = [i["id"] for i in run.listed([unchanged, edited, {"id": 3, "name": "C"}]) if run.needs_write(i)]
+    assert todo == [2, 3]
+    run.written(2)
+    assert run.batch.rows == [("events", 2, sync.row_hash(edited))]
+    stats = run.finish(cur)
+    assert stats["seen"] == 3 and stats["changed"] == 1 and stats["deleted"] == 0
+
+def test_sync_events_rewrites_unchanged_rows_with_a_new_image():
+    event = {"id": 1, "name": "A"}
+    fingerprint = {"etag": "new", "last_modified": None, "content_hash": "h", "s3_key": "events/1/image.png"}
+    with patch("app.services.sync.get_connection") as mock_conn, \
+         patch("app.services.sync.fetch_page", side_effect=[[event], []]), \
+         patch("app.services.sync.fetch_and_upload_image", return_value=(fingerprint, "uploaded")) as fetch_image:
+        cur = MagicMock()
+        cur.fetchall.side_effect = [[], [{"row_id": 1, "content_hash": sync.row_hash(event), "missed": 0}]]
+        mock_conn.return_value.cursor.return_value = cur
+        stats = sync.sync_events("incremental")
+    fetch_image.assert_called_once()
+    assert stats["rows"]["changed"] == 1
+    statements = [c.args[0] for c in cur.execute.call_args_list]
+    assert any(s.startswith("INSERT INTO events") for s in statements)
+    assert not any(s.startswith("INSERT INTO sync_rows") for s in statements)
+
+def test_sync_run_reconcile_deletes_rows_missing_twice():
+    cur = MagicMock()
+    cur.fetchall.return_value = [{"row_id": 1, "content_hash": "x", "missed": 0},
+                                 {"row_id": 8, "content_hash": "y", "missed": 1},
+                                 {"row_id": 9, "content_hash": "z", "missed": 0}]
+    run = sync.SyncRun("events", cur, "reconcile")
+    with patch("app.services.sync.fetch_page", return_value=[{"id": 1}]) as tail:
+        assert all(run.needs_write(i) for i in run.listed([{"id": 1}]))
+        stats = run.finish(cur)
+    tail.assert_called_once_with("events", 0, 2)
+    assert stats["deleted"] == 1 and stats["missing"] == 1
+    statements = [c.args for c in cur.execute.call_args_list]
+    assert ("UPDATE sync_rows SET missed = 1 WHERE entity=%s AND row_id IN (%s)", ("events", 9)) in statements
+    assert ("DELETE FROM events WHERE id IN (%s)", (8,)) in statements
+
+def test_sync_run_reconcile_skips_deletes_when_the_listing_shifted():
+    cur = MagicMock()
+    cur.fetchall.return_value = [{"row_id": 1, "content_hash": "x", "missed": 1},
+                                 {"row_id": 9, "content_hash": "y", "missed": 1}]
+    grown = sync.SyncRun("events", cur, "reconcile")
+    grown.listed([{"id": 1}, {"id": 2}])
+    with patch("app.services.sync.fetch_page", return_value=[{"id": 2}, {"id": 3}]):
+        assert grown.finish(cur)["deleted"] == 0
+    assert ("UPDATE sync_rows SET missed = 0 WHERE entity=%s AND row_id IN (%s)", ("events", 1)) in \
+        [c.args for c in cur.execute.call_args_list]
+
+    shifted = sync.SyncRun("events", cur, "reconcile")
+    shifted.listed([{"id": 1}, {"id": 2}])
+    shifted.listed([{"id": 2}])
+    assert not shifted.listing_stable()
+    assert not sync.SyncRun("events", cur, "reconcile").listing_stable()
+    assert not any(c.args[0].startswith("DELETE") for c in cur.execute.call_args_list)
+
+def test_sync_startups_hashes_the_detail_payload():
+    listing = [{"id": 4, "name": "S"}]
+    detail = {"id": 4, "name": "S", "email": "s@x.com", "description": "new", "founders": []}
+    with patch("app.services.sync.get_connection") as mock_conn, \
+         patch("app.services.sync.fetch_page", side_effect=[listing, []]), \
+         patch("app.services.sync.fetch_detail", return_value=detail), \
+         patch("app.services.sync.fetch_and_upload_image", return_value=(None, "missing")):
+        cur = MagicMock()
+        cur.fetchall.side_effect = [[], [], [{"row_id": 4, "content_hash": sync.row_hash(listing[0]), "missed": 0}]]
+        mock_conn.return_value.cursor.return_value = cur
+        stats = sync.sync_startups("incremental")
+    assert stats["rows"]["changed"] == 1
+    hashes = [c for c in cur.execute.call_args_list if c.args[0].startswith("INSERT INTO sync_rows")]
+    assert sync.row_hash(detail) in hashes[0].args[1]
+
+def test_sync_all_respects_dependencies():
+    spans = {}
+    def fake(name, delay):
+        def run(mode):
+            start = time.monotonic()
+            time.sleep(delay)
+            spans[name] = (start, time.monotonic())
+            if name == "events":
+                raise RuntimeError("down")
+            return {"rows": {"changed": 1}}
+        return run
+    fns = {name: fake(name, 0.05) for name in sync.SYNC_DEPENDENCIES}
+    with patch.dict(sync.SYNC_FUNCTIONS, fns):
+        summary = sync.sync_all()
+    entities = summary["entities"]
+    assert entities["events"]["status"] == "error" and entities["events"]["error"] == "down"
+    assert entities["users"]["status"] == "ok" and "duration_ms" in entities["users"]
+    assert spans["news"][0] >= spans["startups"][1]
+    assert spans["users"][0] >= max(spans["startups"][1], spans["investors"][1])
+    assert spans["investors"][0] < spans["startups"][1]
+
+def test_sync_entity_bumps_news_after_startup_deletes(clear_entity_cache):
+    cursor = clear_entity_cache.return_value.cursor.return_value
+    for deleted, expected in ((0, [("startups",)]), (2, [("startups",), ("news",)])):
+        cursor.execute.reset_mock()
+        with patch.dict(sync.SYNC_FUNCTIONS, {"startups": lambda mode: {"rows": {"deleted": deleted}}}):
+            assert sync._sync_entity("startups", None)["status"] == "ok"
+        assert [c.args[1] for c in cursor.execute.call_args_list] == expected
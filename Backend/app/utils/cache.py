@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+from app.core.config import ENTITY_CACHE_TTL, ENTITY_CACHE_SIZE
+
+class EntityCache:
+    """Read-through cache for entity reads, keyed by (entity, key) where key
+    is ("item", id) or ("list", params...). Entries live `ttl` seconds and
+    the least recently used go past `max_entries`.
+
+    Writers call invalidate(entity, id) after committing: that drops the
+    item and every cached list of the entity. A load that raced with an
+    invalidation is returned to its caller but not stored."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_or_load(self, entity: str, key: Hashable, loader: Callable):
+        full_key = (entity, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[full_key]
+                self.expirations += 1
+            self.misses += 1
+            generation = (self._epoch, self._generations.get(entity, 0))
+        value = loader()
+        with self._lock:
+            if (self._epoch, self._generations.get(entity, 0)) == generation:
+                self._entries[full_key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def item(self, entity: str, item_id: int, loader: Callable):
+        return self.get_or_load(entity, ("item", item_id), loader)
+
+    def list(self, entity: str, params: tuple, loader: Callable):
+        return self.get_or_load(entity, ("list", *params), loader)
+
+    def invalidate(self, entity: str, item_id: Optional[int] = None):
+        """Drop `entity`'s lists and the given item, or everything cached
+        for `entity` when no id is given."""
+        with self._lock:
+            self._generations[entity] = self._generations.get(entity, 0) + 1
+            self.invalidations += 1
+            for full_key in [k for k in self._entries if k[0] == entity]:
+                key = full_key[1]
+                if item_id is None or key[0] != "item" or key[1] == item_id:
+                    del self._entries[full_key]
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_entity: Dict[str, int] = {}
+            for entity, _ in self._entries:
+                per_entity[entity] = per_entity.get(entity, 0) + 1
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "by_entity": per_entity,
+            }
+
+entity_cache = EntityCache(ENTITY_CACHE_TTL, ENTITY_CACHE_SIZE)
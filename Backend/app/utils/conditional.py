@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from app.db.connection import get_connection
+from app.core.config import ENTITY_VERSION_TTL, CATALOG_LIST_MAX_AGE
+from app.utils.cache import entity_cache
+
+# Item reads must show an edit at once; listings may be reused briefly.
+DETAIL_CACHE_CONTROL = "public, no-cache"
+LIST_CACHE_CONTROL = f"public, max-age={CATALOG_LIST_MAX_AGE}, must-revalidate"
+
+class EntityVersions:
+    """Process-local view of entity_versions, refreshed at most every `ttl`
+    seconds. A counter seen to move drops that entity from entity_cache, so
+    writes committed by other processes reach this one's cache too."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._versions: Dict[str, int] = {}
+        self._expires = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, entity: str) -> int:
+        with self._lock:
+            if time.monotonic() < self._expires:
+                return self._versions.get(entity, 0)
+            generation = self._generation
+        conn = get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT entity, version FROM entity_versions")
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        with self._lock:
+            for row in rows:
+                if self._versions.get(row["entity"]) != row["version"]:
+                    entity_cache.invalidate(row["entity"])
+                    self._versions[row["entity"]] = row["version"]
+            if self._generation == generation:
+                self._expires = time.monotonic() + self.ttl
+            return self._versions.get(entity, 0)
+
+    def expire(self):
+        """Force the next get() to re-read, e.g. after a local commit."""
+        with self._lock:
+            self._generation += 1
+            self._expires = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._versions.clear()
+            self._expires = 0.0
+
+entity_versions = EntityVersions(ENTITY_VERSION_TTL)
+
+# Entities whose rows a delete also rewrites through a foreign key
+# (news.startup_id is ON DELETE SET NULL).
+DELETE_CASCADES: Dict[str, Tuple[str, ...]] = {"startups": ("news",)}
+
+def bump_version(cursor, entity: str):
+    """Bump `entity`'s counter inside the caller's transaction."""
+    cursor.execute(
+        "INSERT INTO entity_versions (entity, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1",
+        (entity,),
+    )
+
+def commit_change(conn, cursor, entity: str, item_id: Optional[int] = None, also: Tuple[str, ...] = ()):
+    """Commit a write to `entity` together with its version bump, then drop
+    the stale cache entries. Entities in `also` (see DELETE_CASCADES) are
+    bumped and dropped whole."""
+    for name in (entity, *also):
+        bump_version(cursor, name)
+    conn.commit()
+    entity_cache.invalidate(entity, item_id)
+    for name in also:
+        entity_cache.invalidate(name)
+    entity_versions.expire()
+
+def record_change(entity: str, also: Tuple[str, ...] = ()):
+    """commit_change for writers without an open transaction (sync runs)."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        commit_change(conn, cursor, entity, also=also)
+    finally:
+        cursor.close()
+        conn.close()
+
+def entity_etag(entity: str, version: int, request: Request) -> str:
+    digest = hashlib.blake2b(f"{entity}:{version}:{request.url.path}?{request.url.query}".encode(),
+                             digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def conditional_get(request: Request, response: Response, entity: str, cache_control: str, load: Callable):
+    """Serve `load()` with a strong ETag taken from `entity`'s version, or a
+    bare 304 when If-None-Match already holds it. The version is read
+    before loading, so a body is never older than its tag."""
+    headers = {"ETag": entity_etag(entity, entity_versions.get(entity), request), "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return load()
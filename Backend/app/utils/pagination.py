@@ -0,0 +1,85 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Callable, Optional, Sequence
+from fastapi import HTTPException, Response
+from app.utils.cache import entity_cache
+
+LIST_PAGE_SIZE = 100
+MAX_LIST_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    if isinstance(sort_value, (datetime.date, datetime.datetime)):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str):
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(row_id, int) or not isinstance(sort_value, (str, int, float, type(None))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, row_id
+
+def keyset_rows(cursor, select: str, sort_column: Optional[str], token: Optional[str],
+                limit: int, filters: Sequence[str] = (), filter_params: tuple = ()):
+    """One page of `select` in (sort_column DESC, id DESC) order, resuming
+    after the row encoded in `token`. NULL sort keys come last, as MariaDB
+    sorts them, and are paged as a separate phase (a cursor whose sort value
+    is None), so every predicate stays a plain range on the composite
+    (sort_column, id) index and deep pages cost the same as the first.
+    `filters` are extra AND-ed conditions with their params."""
+    order = "id DESC" if sort_column is None else f"{sort_column} DESC, id DESC"
+
+    def page(extra: Sequence[str], extra_params: tuple, count: int):
+        conditions = [*filters, *extra]
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        cursor.execute(f"{select} {where} ORDER BY {order} LIMIT %s", (*filter_params, *extra_params, count))
+        return cursor.fetchall()
+
+    if token is None:
+        return page((), (), limit)
+    sort_value, last_id = decode_cursor(token)
+    if sort_column is None:
+        return page(("id < %s",), (last_id,), limit)
+    if sort_value is None:
+        return page((f"{sort_column} IS NULL AND id < %s",), (last_id,), limit)
+    rows = page((f"({sort_column}, id) < (%s, %s)",), (sort_value, last_id), limit)
+    if len(rows) < limit:
+        # The non-NULL range ran out: fill the page from the start of the NULL tail.
+        rows = [*rows, *page((f"{sort_column} IS NULL",), (), limit - len(rows))]
+    return rows
+
+def set_next_cursor(response: Response, rows, limit: int, sort_column: Optional[str]):
+    """X-Next-Cursor for a full page: more rows may follow its last one."""
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last["id"] if sort_column is None else last[sort_column], last["id"])
+
+def keyset_page(cursor, select: str, sort_column: Optional[str], token: Optional[str],
+                limit: int, response: Response, filters: Sequence[str] = (), filter_params: tuple = ()):
+    rows = keyset_rows(cursor, select, sort_column, token, limit, filters, filter_params)
+    set_next_cursor(response, rows, limit, sort_column)
+    return rows
+
+def cached_keyset_page(entity: str, connect: Callable, select: str, sort_column: Optional[str],
+                       token: Optional[str], limit: int, response: Response,
+                       filters: Sequence[str] = (), filter_params: tuple = ()):
+    """keyset_page read through entity_cache: a connection from `connect`
+    is only checked out on a miss."""
+    def load():
+        conn = connect()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            return keyset_rows(cursor, select, sort_column, token, limit, filters, filter_params)
+        finally:
+            cursor.close()
+            conn.close()
+    rows = entity_cache.list(entity, (token, limit, tuple(filters), tuple(filter_params)), load)
+    set_next_cursor(response, rows, limit, sort_column)
+    return rows
@@ -1,6 +1,18 @@
 import boto3
 import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
 from botocore.exceptions import NoCredentialsError
+from starlette.concurrency import run_in_threadpool
+from app.core.config import (
+    S3_PART_SIZE, S3_UPLOAD_CONCURRENCY,
+    S3_PRESIGN_EXPIRES, S3_PRESIGN_REFRESH_BEFORE, S3_PRESIGN_CACHE_SIZE,
+)
 
 AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
@@ -22,10 +34,20 @@ def upload_file_to_s3(file_obj, key: str, content_type: str):
             key,
             ExtraArgs={"ContentType": content_type, "ACL": "private"}
         )
+        presigned_urls.invalidate(key)
         return f"https://{S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
     except NoCredentialsError:
         raise Exception("AWS credentials not found")
 
+_upload_slots = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
+
+async def run_upload(fn, *args):
+    """Run a blocking upload handler (MySQL + boto3) in the threadpool.
+    At most S3_UPLOAD_CONCURRENCY run at once; requests waiting for a slot
+    hold no worker thread, so uploads cannot starve other endpoints."""
+    async with _upload_slots:
+        return await run_in_threadpool(fn, *args)
+
 def generate_presigned_url(key: str, expires_in=3600):
     return s3_client.generate_presigned_url(
         "get_object",
@@ -35,3 +57,171 @@ def generate_presigned_url(key: str, expires_in=3600):
 
 def delete_file_from_s3(key: str):
     s3_client.delete_object(Bucket=S3_BUCKET, Key=key)
+    presigned_urls.invalidate(key)
+
+class PresignedUrlCache:
+    """TTL cache of presigned GET URLs keyed by S3 key. A URL is reused
+    until `refresh_before` seconds ahead of its own expiry, so callers never
+    get one about to lapse. Least recently used entries go past `max_entries`."""
+
+    def __init__(self, expires_in: int, refresh_before: int, max_entries: int):
+        self.expires_in = expires_in
+        self.ttl = max(expires_in - refresh_before, 0)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        url = generate_presigned_url(key, self.expires_in)
+        with self._lock:
+            self._entries[key] = (url, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return url
+
+    def invalidate(self, *keys: Optional[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+presigned_urls = PresignedUrlCache(S3_PRESIGN_EXPIRES, S3_PRESIGN_REFRESH_BEFORE, S3_PRESIGN_CACHE_SIZE)
+
+def presigned_url(key: str) -> str:
+    """Presigned GET URL for `key`, served from the in-process cache."""
+    return presigned_urls.get(key)
+
+class UploadRejected(Exception):
+    pass
+
+class BufferGauge:
+    """Bytes currently held in streaming upload buffers, and the peak since
+    the last reset()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def add(self, n: int):
+        with self._lock:
+            self.current += n
+            self.peak = max(self.peak, self.current)
+
+    def sub(self, n: int):
+        with self._lock:
+            self.current -= n
+
+    def reset(self):
+        with self._lock:
+            self.peak = self.current
+
+buffer_gauge = BufferGauge()
+
+def _upload_part(key: str, upload_id: str, number: int, body) -> dict:
+    resp = s3_client.upload_part(Bucket=S3_BUCKET, Key=key, UploadId=upload_id, PartNumber=number, Body=body)
+    return {"ETag": resp["ETag"], "PartNumber": number}
+
+def _create_multipart(key: str, content_type: str) -> str:
+    return s3_client.create_multipart_upload(
+        Bucket=S3_BUCKET, Key=key, ContentType=content_type, ACL="private")["UploadId"]
+
+def _upload_spooled(spool, key: str, upload_id: str, part_size: int) -> list:
+    """Upload a spooled body as parts of `upload_id`, one part in memory."""
+    spool.seek(0)
+    parts = []
+    while True:
+        part = spool.read(part_size)
+        if not part:
+            return parts
+        buffer_gauge.add(len(part))
+        try:
+            parts.append(_upload_part(key, upload_id, len(parts) + 1, part))
+        finally:
+            buffer_gauge.sub(len(part))
+
+def upload_stream_to_s3(chunks: Iterable[bytes], key: str, content_type: str, max_bytes: int,
+                        part_size: int = S3_PART_SIZE,
+                        skip: Optional[Callable[[str], bool]] = None) -> Tuple[bool, str, int]:
+    """Stream `chunks` to S3 holding at most one part in memory. Bodies that
+    fit in one part go up with put_object, larger ones as a multipart upload.
+    With `skip`, nothing is sent before the whole body is hashed: larger
+    bodies are spooled to a temporary file, and `skip(sha256)` may drop the
+    upload before any byte reaches S3. Empty bodies are never stored.
+    Returns (uploaded, sha256 hexdigest, size)."""
+    digest = hashlib.sha256()
+    buf = bytearray()
+    size = 0
+    upload_id = None
+    parts = []
+    spool = None
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(f"{key}: body exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            buf += chunk
+            buffer_gauge.add(len(chunk))
+            if len(buf) >= part_size:
+                if skip is not None:
+                    if spool is None:
+                        spool = tempfile.TemporaryFile()
+                    spool.write(buf)
+                else:
+                    if upload_id is None:
+                        upload_id = _create_multipart(key, content_type)
+                    parts.append(_upload_part(key, upload_id, len(parts) + 1, buf))
+                buffer_gauge.sub(len(buf))
+                buf = bytearray()
+        sha = digest.hexdigest()
+        if size == 0 or (skip is not None and skip(sha)):
+            return False, sha, size
+        if spool is not None:
+            spool.write(buf)
+            buffer_gauge.sub(len(buf))
+            buf = bytearray()
+            upload_id = _create_multipart(key, content_type)
+            parts = _upload_spooled(spool, key, upload_id, part_size)
+        elif upload_id is None:
+            s3_client.put_object(Bucket=S3_BUCKET, Key=key, Body=buf, ContentType=content_type, ACL="private")
+        elif buf:
+            parts.append(_upload_part(key, upload_id, len(parts) + 1, buf))
+        if upload_id is not None:
+            s3_client.complete_multipart_upload(
+                Bucket=S3_BUCKET, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts})
+        presigned_urls.invalidate(key)
+        return True, sha, size
+    except NoCredentialsError:
+        raise Exception("AWS credentials not found")
+    except BaseException:
+        if upload_id is not None:
+            try:
+                s3_client.abort_multipart_upload(Bucket=S3_BUCKET, Key=key, UploadId=upload_id)
+            except Exception:
+                pass
+        raise
+    finally:
+        buffer_gauge.sub(len(buf))
+        if spool is not None:
+            spool.close()
@@ -0,0 +1,95 @@
+"""Latency of /api/search on a synthetic 100k-row catalogue.
+
+Seeds startups, investors, partners, news and events (an equal share of
+--rows each) into the configured database, then times the ranked FULLTEXT
+UNION behind the endpoint, for all types and for a single type, first page
+and a deep cursor page. Run against a scratch database:
+
+    cd Backend && python -m benchmarks.catalog_search --rows 100000 --cleanup
+"""
+import argparse
+import random
+from app.db.connection import get_connection
+from app.routers.search import SEARCH_SOURCES, search_query
+from app.communication.search import boolean_query, search_terms
+from benchmarks.message_search import measure
+
+MARKER = "bench-catalog"
+WORDS = ("solar", "fintech", "health", "robotics", "marketplace", "logistics", "climate", "edtech",
+         "payments", "biotech", "mobility", "retail", "security", "analytics", "agritech", "gaming")
+BATCH = 2000
+
+def _rows(rng):
+    """type -> (insert columns, row factory)."""
+    text = lambda k: " ".join(rng.choices(WORDS, k=k))
+    return {
+        "startup": (("name", "email", "description", "sector", "needs"),
+                    lambda i: (f"{text(2)} {i}", f"{MARKER}-{i}@example.com", text(40), rng.choice(WORDS), text(8))),
+        "investor": (("name", "email", "description", "investment_focus", "investor_type"),
+                     lambda i: (f"{text(2)} {i}", f"{MARKER}-{i}@example.com", text(40), text(3), "VC")),
+        "partner": (("name", "email", "description", "partnership_type"),
+                    lambda i: (f"{text(2)} {i}", f"{MARKER}-{i}@example.com", text(40), text(2))),
+        "news": (("title", "description", "category"),
+                 lambda i: (f"{MARKER} {text(4)}", text(60), rng.choice(WORDS))),
+        "event": (("name", "description", "event_type", "target_audience"),
+                  lambda i: (f"{MARKER} {text(3)}", text(40), rng.choice(WORDS), text(2))),
+    }
+
+def seed(cursor, conn, rows: int):
+    rng = random.Random(42)
+    per_type = rows // len(SEARCH_SOURCES)
+    for kind, (columns, make) in _rows(rng).items():
+        table = SEARCH_SOURCES[kind][0]
+        placeholders = "(" + ",".join(["%s"] * len(columns)) + ")"
+        for start in range(0, per_type, BATCH):
+            values = [make(i) for i in range(start, min(start + BATCH, per_type))]
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+                           + ",".join([placeholders] * len(values)), tuple(v for row in values for v in row))
+            conn.commit()
+        print(f"seeded {per_type} {table}")
+
+def cleanup(cursor, conn):
+    for table in ("startups", "investors", "partners"):
+        cursor.execute(f"DELETE FROM {table} WHERE email LIKE %s", (f"{MARKER}-%",))
+    cursor.execute("DELETE FROM news WHERE title LIKE %s", (f"{MARKER} %",))
+    cursor.execute("DELETE FROM events WHERE name LIKE %s", (f"{MARKER} %",))
+    conn.commit()
+
+def run_search(cursor, query: str, sources, after=None, limit: int = 20):
+    against = boolean_query(search_terms(query))
+    params = tuple(against for _ in sources for _ in range(2)) + (after or ())
+    cursor.execute(search_query(sources, after is not None), (*params, limit))
+    return cursor.fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if not args.skip_seed:
+            seed(cursor, conn, args.rows)
+        rng = random.Random(7)
+        queries = [" ".join(rng.sample(WORDS, rng.randint(1, 2))) for _ in range(args.queries)]
+        every = list(SEARCH_SOURCES)
+        print("all types, page 1   ", measure(lambda q: run_search(cursor, q, every), [(q,) for q in queries]))
+        print("startups, page 1    ", measure(lambda q: run_search(cursor, q, ["startup"]), [(q,) for q in queries]))
+        deep = []
+        for q in queries[:20]:
+            rows = run_search(cursor, q, every, limit=500)
+            if rows:
+                deep.append((q, (rows[-1]["score"], rows[-1]["score"], rows[-1]["uid"])))
+        print("all types, deep page", measure(lambda q, after: run_search(cursor, q, every, after), deep))
+        if args.cleanup:
+            cleanup(cursor, conn)
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Serialization cost of conversation history at 10k messages.
+
+Compares the old path (one Read_message per row, then FastAPI re-validating
+the list against response_model) with the encoder behind
+/communication/read_conversation/{id}/history. Rows are synthetic so only
+serialization is measured; no database is needed:
+
+    cd Backend && python -m benchmarks.conversation_serialization --messages 10000
+"""
+import argparse
+import datetime
+import statistics
+import time
+from unittest.mock import MagicMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.communication import privates_messages
+from app.communication.com_classes import Read_message
+
+def make_rows(count: int):
+    start = datetime.datetime(2024, 1, 1)
+    return [
+        {"id": i, "sender_id": 1 + i % 2, "content": f"message {i} " + "lorem ipsum " * 8,
+         "created_at": start + datetime.timedelta(seconds=i)}
+        for i in range(1, count + 1)
+    ]
+
+def legacy_app(rows, names):
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=list[Read_message])
+    def legacy():
+        conversation = []
+        for message_s in rows:
+            if message_s['sender_id'] in names:
+                conversation.append(Read_message(
+                    sender_name=names[message_s['sender_id']],
+                    content=message_s['content'],
+                    id=message_s['id'],
+                    created_at=message_s['created_at']))
+        return conversation
+    return app
+
+def history_cursor(rows):
+    cur = MagicMock()
+    cur.fetchone.side_effect = lambda: next(lookups)
+    batches = [rows[i:i + privates_messages.HISTORY_STREAM_BATCH]
+               for i in range(0, len(rows), privates_messages.HISTORY_STREAM_BATCH)]
+    cur.fetchmany.side_effect = batches + [[]]
+    lookups = iter([{"user1_id": 1, "user2_id": 2, "archived_through_id": 0},
+                    {"email": "a@x.com", "name": "A"}, {"email": "b@x.com", "name": "B"}])
+    return cur
+
+def timed(fn, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(timings), 1), "min_ms": round(min(timings), 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+    rows = make_rows(args.messages)
+    names = {1: "a@x.com", 2: "b@x.com"}
+
+    legacy = TestClient(legacy_app(rows, names))
+    assert len(legacy.get("/legacy").json()) == args.messages
+    print("response_model list    ", timed(lambda: legacy.get("/legacy"), args.repeat))
+
+    app = FastAPI()
+    app.include_router(privates_messages.comm, prefix="/api")
+    streamed = TestClient(app)
+    with patch("app.communication.privates_messages.get_connection") as mock_conn:
+        def request():
+            mock_conn.return_value.cursor.return_value = history_cursor(rows)
+            return streamed.get("/api/communication/read_conversation/1/history")
+        assert len(request().json()) == args.messages
+        print("streamed history       ", timed(request, args.repeat))
+
+    print("encoder only           ", timed(lambda: b"".join(privates_messages.encode_messages((rows,), names)),
+                                            args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Latency of /communication/search at scale.
+
+Seeds synthetic conversations and messages (1M by default) into the
+configured database, then times the FULLTEXT search used by the endpoint
+against the LIKE scan it replaces. Run against a scratch database:
+
+    cd Backend && python -m benchmarks.message_search --rows 1000000 --cleanup
+"""
+import argparse
+import random
+import statistics
+import time
+from app.db.connection import get_connection
+from app.communication.search import search_messages, search_terms
+
+USER_OFFSET = 900_000_000
+WORDS = ("funding", "pitch", "investor", "roadmap", "seed", "demo", "meeting", "contract",
+         "prototype", "market", "revenue", "hiring", "launch", "feedback", "partner", "deck")
+BATCH = 5000
+
+def seed(cursor, conn, rows: int, users: int):
+    rng = random.Random(42)
+    pairs = [(USER_OFFSET + u, USER_OFFSET + v) for u in range(users) for v in range(u + 1, min(u + 6, users))]
+    for i in range(0, len(pairs), BATCH):
+        chunk = pairs[i:i + BATCH]
+        cursor.execute("INSERT IGNORE INTO conversations (user1_id, user2_id) VALUES "
+                       + ",".join(["(%s,%s)"] * len(chunk)), tuple(v for p in chunk for v in p))
+    conn.commit()
+    cursor.execute("SELECT id, user1_id, user2_id FROM conversations WHERE user1_id >= %s", (USER_OFFSET,))
+    conversations = cursor.fetchall()
+    for i in range(0, rows, BATCH):
+        values = []
+        for _ in range(min(BATCH, rows - i)):
+            c = rng.choice(conversations)
+            sender, receiver = (c["user1_id"], c["user2_id"]) if rng.random() < 0.5 else (c["user2_id"], c["user1_id"])
+            values.extend((c["id"], sender, receiver, " ".join(rng.choices(WORDS, k=rng.randint(5, 30)))))
+        cursor.execute("INSERT INTO messages (conversation_id, sender_id, receiver_id, content) VALUES "
+                       + ",".join(["(%s,%s,%s,%s)"] * (len(values) // 4)), tuple(values))
+        conn.commit()
+        print(f"seeded {min(i + BATCH, rows)}/{rows} messages", end="\r")
+    print()
+
+def like_search(cursor, user_id: int, query: str, limit: int):
+    clauses = " AND ".join(["m.content LIKE %s"] * len(search_terms(query)))
+    cursor.execute(
+        f"""SELECT m.id FROM messages m
+            WHERE {clauses} AND m.conversation_id IN (
+                SELECT id FROM conversations WHERE user1_id = %s
+                UNION ALL SELECT id FROM conversations WHERE user2_id = %s)
+            ORDER BY m.id DESC LIMIT %s""",
+        (*[f"%{t}%" for t in search_terms(query)], user_id, user_id, limit))
+    return cursor.fetchall()
+
+def measure(fn, samples):
+    timings = []
+    for args in samples:
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "max_ms": round(timings[-1], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--skip-like", action="store_true", help="skip the LIKE baseline (slow at 1M rows)")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if not args.skip_seed:
+            seed(cursor, conn, args.rows, args.users)
+        rng = random.Random(7)
+        samples = [(USER_OFFSET + rng.randrange(args.users), " ".join(rng.sample(WORDS, rng.randint(1, 2))))
+                   for _ in range(args.queries)]
+        print("fulltext", measure(lambda u, q: search_messages(cursor, u, q, None, 20), samples))
+        if not args.skip_like:
+            print("like    ", measure(lambda u, q: like_search(cursor, u, q, 20), samples))
+        if args.cleanup:
+            cursor.execute("DELETE FROM messages WHERE sender_id >= %s", (USER_OFFSET,))
+            cursor.execute("DELETE FROM conversations WHERE user1_id >= %s", (USER_OFFSET,))
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,12 @@ CREATE TABLE IF NOT EXISTS startups (
   maturity VARCHAR(100),
   UNIQUE KEY ux_startups_email (email),
   image_s3_key VARCHAR(512) NULL,
-  view_count INT NOT NULL DEFAULT 0
+  view_count INT NOT NULL DEFAULT 0,
+  KEY idx_startups_created_at_id (created_at, id),
+  KEY idx_startups_sector (sector),
+  KEY idx_startups_maturity (maturity),
+  KEY idx_startups_project_status (project_status),
+  FULLTEXT KEY ft_startups_search (name, email, address, description, sector, needs)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Founders
@@ -48,7 +53,9 @@ CREATE TABLE IF NOT EXISTS investors (
   investor_type VARCHAR(100),
   investment_focus VARCHAR(255),
   UNIQUE KEY ux_investors_email (email),
-  image_s3_key VARCHAR(512) NULL
+  image_s3_key VARCHAR(512) NULL,
+  KEY idx_investors_created_at_id (created_at, id),
+  FULLTEXT KEY ft_investors_catalog (name, description, investment_focus, investor_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Partners
@@ -63,7 +70,9 @@ CREATE TABLE IF NOT EXISTS partners (
   description TEXT,
   partnership_type VARCHAR(100),
   UNIQUE KEY ux_partners_email (email),
-  image_s3_key VARCHAR(512) NULL
+  image_s3_key VARCHAR(512) NULL,
+  KEY idx_partners_created_at_id (created_at, id),
+  FULLTEXT KEY ft_partners_catalog (name, description, partnership_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- News
@@ -77,7 +86,9 @@ CREATE TABLE IF NOT EXISTS news (
   description TEXT,
   image_s3_key VARCHAR(512) NULL,
   view_count INT NOT NULL DEFAULT 0,
-  FOREIGN KEY (startup_id) REFERENCES startups(id) ON DELETE SET NULL
+  FOREIGN KEY (startup_id) REFERENCES startups(id) ON DELETE SET NULL,
+  KEY idx_news_news_date_id (news_date, id),
+  FULLTEXT KEY ft_news_catalog (title, description, category)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Events
@@ -90,7 +101,8 @@ CREATE TABLE IF NOT EXISTS events (
   event_type VARCHAR(100),
   target_audience VARCHAR(255),
   image_s3_key VARCHAR(512) NULL,
-  view_count INT NOT NULL DEFAULT 0
+  view_count INT NOT NULL DEFAULT 0,
+  FULLTEXT KEY ft_events_catalog (name, description, event_type, target_audience)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Users
@@ -109,22 +121,49 @@ CREATE TABLE IF NOT EXISTS users (
   FOREIGN KEY (investor_id) REFERENCES investors(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
--- Conversations
+-- Conversations (participants stored as a canonical pair: user1_id < user2_id)
 CREATE TABLE IF NOT EXISTS conversations (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
     user1_id BIGINT NOT NULL,
     user2_id BIGINT NOT NULL,
-    UNIQUE KEY unique_users (user1_id, user2_id)
+    last_message_id BIGINT NULL,
+    last_sender_id BIGINT NULL,
+    last_message_preview VARCHAR(255) NULL,
+    last_message_at DATETIME NULL,
+    user1_last_read_id BIGINT NOT NULL DEFAULT 0,
+    user2_last_read_id BIGINT NOT NULL DEFAULT 0,
+    user1_unread INT NOT NULL DEFAULT 0,
+    user2_unread INT NOT NULL DEFAULT 0,
+    archived_through_id BIGINT NOT NULL DEFAULT 0,
+    UNIQUE KEY unique_users (user1_id, user2_id),
+    KEY idx_conversations_user1_last (user1_id, last_message_id),
+    KEY idx_conversations_user2_last (user2_id, last_message_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Messages
 CREATE TABLE IF NOT EXISTS messages (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
     conversation_id BIGINT NOT NULL,
     sender_id BIGINT NOT NULL,
     receiver_id BIGINT NOT NULL,
-    content TEXT NOT NULL
+    content TEXT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_messages_conversation (conversation_id, id),
+    FULLTEXT KEY ft_messages_content (content)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS messages_archive (
+    id BIGINT PRIMARY KEY,
+    conversation_id BIGINT NOT NULL,
+    sender_id BIGINT NOT NULL,
+    receiver_id BIGINT NOT NULL,
+    content TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_messages_archive_conversation (conversation_id, id),
+    FULLTEXT KEY ft_messages_archive_content (content)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
+
 -- Indexes
 CREATE INDEX IF NOT EXISTS idx_startups_sector ON startups(sector);
 CREATE INDEX IF NOT EXISTS idx_news_startup_id ON news(startup_id);
@@ -140,9 +179,44 @@ CREATE TABLE IF NOT EXISTS email_verifications (
 CREATE TABLE IF NOT EXISTS sync_state (
   entity VARCHAR(32) PRIMARY KEY,
   last_id INT NOT NULL DEFAULT 0,
+  last_mode VARCHAR(16),
+  rows_seen INT NOT NULL DEFAULT 0,
+  rows_changed INT NOT NULL DEFAULT 0,
+  rows_deleted INT NOT NULL DEFAULT 0,
+  last_run_ms INT,
+  last_run_at DATETIME,
+  last_reconciled_at DATETIME,
   updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- Content hash of every synced upstream row (row-level change detection)
+CREATE TABLE IF NOT EXISTS sync_rows (
+  entity VARCHAR(32) NOT NULL,
+  row_id INT NOT NULL,
+  content_hash CHAR(64) NOT NULL,
+  missed TINYINT NOT NULL DEFAULT 0,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, row_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Image fingerprints of synced entities (upstream validators + content hash)
+CREATE TABLE IF NOT EXISTS image_fingerprints (
+  entity VARCHAR(32) NOT NULL,
+  entity_id INT NOT NULL,
+  etag VARCHAR(255),
+  last_modified VARCHAR(64),
+  content_hash CHAR(64),
+  s3_key VARCHAR(512),
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Version counter per catalogue table, bumped by every write and sync run (ETags)
+CREATE TABLE IF NOT EXISTS entity_versions (
+  entity VARCHAR(32) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 INSERT INTO sync_state (entity, last_id) VALUES
   ('startups', 0),
   ('investors', 0),
@@ -150,3 +224,10 @@ INSERT INTO sync_state (entity, last_id) VALUES
   ('news', 0),
   ('events', 0),
   ('users', 0);
+
+INSERT INTO entity_versions (entity) VALUES
+  ('startups'),
+  ('investors'),
+  ('partners'),
+  ('news'),
+  ('events');
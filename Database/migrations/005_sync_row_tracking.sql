@@ -0,0 +1,29 @@
+-- Upgrade an existing database for row-level sync change detection.
+-- Fresh databases get the same schema from init/001_schema.sql.
+ALTER TABLE sync_state
+  ADD COLUMN IF NOT EXISTS last_mode VARCHAR(16) AFTER last_id,
+  ADD COLUMN IF NOT EXISTS rows_seen INT NOT NULL DEFAULT 0 AFTER last_mode,
+  ADD COLUMN IF NOT EXISTS rows_changed INT NOT NULL DEFAULT 0 AFTER rows_seen,
+  ADD COLUMN IF NOT EXISTS rows_deleted INT NOT NULL DEFAULT 0 AFTER rows_changed,
+  ADD COLUMN IF NOT EXISTS last_run_ms INT AFTER rows_deleted,
+  ADD COLUMN IF NOT EXISTS last_run_at DATETIME AFTER last_run_ms,
+  ADD COLUMN IF NOT EXISTS last_reconciled_at DATETIME AFTER last_run_at;
+
+CREATE TABLE IF NOT EXISTS sync_rows (
+  entity VARCHAR(32) NOT NULL,
+  row_id INT NOT NULL,
+  content_hash CHAR(64) NOT NULL,
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, row_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS image_fingerprints (
+  entity VARCHAR(32) NOT NULL,
+  entity_id INT NOT NULL,
+  etag VARCHAR(255),
+  last_modified VARCHAR(64),
+  content_hash CHAR(64),
+  s3_key VARCHAR(512),
+  updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, entity_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
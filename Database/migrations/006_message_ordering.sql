@@ -0,0 +1,7 @@
+-- Give messages a primary key, a timestamp and a (conversation_id, id)
+-- index for keyset pagination. Existing rows are numbered in their
+-- insertion order; their created_at is the time of the migration.
+ALTER TABLE messages
+  ADD COLUMN IF NOT EXISTS id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST,
+  ADD COLUMN IF NOT EXISTS created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP AFTER content,
+  ADD INDEX IF NOT EXISTS idx_messages_conversation (conversation_id, id);
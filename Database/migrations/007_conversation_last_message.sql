@@ -0,0 +1,19 @@
+-- Denormalized last-message pointer on conversations, kept up to date by
+-- the send endpoints, plus per-participant indexes for inbox listing.
+ALTER TABLE conversations
+  ADD COLUMN IF NOT EXISTS last_message_id BIGINT NULL,
+  ADD COLUMN IF NOT EXISTS last_sender_id BIGINT NULL,
+  ADD COLUMN IF NOT EXISTS last_message_preview VARCHAR(255) NULL,
+  ADD COLUMN IF NOT EXISTS last_message_at DATETIME NULL,
+  ADD INDEX IF NOT EXISTS idx_conversations_user1_last (user1_id, last_message_at),
+  ADD INDEX IF NOT EXISTS idx_conversations_user2_last (user2_id, last_message_at);
+
+-- Backfill from the newest message of each conversation.
+UPDATE conversations c
+JOIN (SELECT conversation_id, MAX(id) AS id FROM messages GROUP BY conversation_id) latest
+  ON latest.conversation_id = c.id
+JOIN messages m ON m.id = latest.id
+SET c.last_message_id = m.id,
+    c.last_sender_id = m.sender_id,
+    c.last_message_preview = LEFT(m.content, 255),
+    c.last_message_at = m.created_at;
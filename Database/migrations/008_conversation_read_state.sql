@@ -0,0 +1,12 @@
+-- Per-participant read markers and unread counters on conversations.
+-- Messages sent before this migration count as read.
+ALTER TABLE conversations
+  ADD COLUMN IF NOT EXISTS user1_last_read_id BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS user2_last_read_id BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS user1_unread INT NOT NULL DEFAULT 0,
+  ADD COLUMN IF NOT EXISTS user2_unread INT NOT NULL DEFAULT 0;
+
+UPDATE conversations
+SET user1_last_read_id = COALESCE(last_message_id, 0),
+    user2_last_read_id = COALESCE(last_message_id, 0)
+WHERE user1_last_read_id = 0 AND user2_last_read_id = 0;
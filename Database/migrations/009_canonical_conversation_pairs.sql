@@ -0,0 +1,44 @@
+-- Store every conversation as (smaller user id, larger user id) so that a
+-- lookup is one probe of unique_users and insert-or-get is atomic.
+-- Per-participant columns are swapped together with the ids.
+SET SESSION sql_mode = CONCAT(@@sql_mode, ',SIMULTANEOUS_ASSIGNMENT');
+
+-- If both orderings of a pair exist, fold the reversed row's messages into
+-- the canonical one and drop it before swapping.
+UPDATE messages m
+JOIN conversations r ON r.id = m.conversation_id AND r.user1_id > r.user2_id
+JOIN conversations c ON c.user1_id = r.user2_id AND c.user2_id = r.user1_id
+SET m.conversation_id = c.id;
+
+-- The dropped row's read state is folded in too, from each participant's
+-- side: unread counts add up, read markers keep the furthest one.
+UPDATE conversations c
+JOIN conversations r ON r.user1_id = c.user2_id AND r.user2_id = c.user1_id AND r.user1_id > r.user2_id
+SET c.user1_unread = c.user1_unread + r.user2_unread,
+    c.user2_unread = c.user2_unread + r.user1_unread,
+    c.user1_last_read_id = GREATEST(c.user1_last_read_id, r.user2_last_read_id),
+    c.user2_last_read_id = GREATEST(c.user2_last_read_id, r.user1_last_read_id);
+
+DELETE r FROM conversations r
+JOIN conversations c ON c.user1_id = r.user2_id AND c.user2_id = r.user1_id
+WHERE r.user1_id > r.user2_id;
+
+UPDATE conversations
+SET user1_id = user2_id,
+    user2_id = user1_id,
+    user1_last_read_id = user2_last_read_id,
+    user2_last_read_id = user1_last_read_id,
+    user1_unread = user2_unread,
+    user2_unread = user1_unread
+WHERE user1_id > user2_id;
+
+-- Folded conversations may have gained a newer last message.
+UPDATE conversations c
+JOIN (SELECT conversation_id, MAX(id) AS id FROM messages GROUP BY conversation_id) latest
+  ON latest.conversation_id = c.id
+JOIN messages m ON m.id = latest.id
+SET c.last_message_id = m.id,
+    c.last_sender_id = m.sender_id,
+    c.last_message_preview = LEFT(m.content, 255),
+    c.last_message_at = m.created_at
+WHERE c.last_message_id IS NULL OR c.last_message_id < m.id;
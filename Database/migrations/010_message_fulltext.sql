@@ -0,0 +1,3 @@
+-- FULLTEXT index backing /communication/search. Building it rewrites the
+-- table; expect it to take a while on large message tables.
+ALTER TABLE messages ADD FULLTEXT INDEX IF NOT EXISTS ft_messages_content (content);
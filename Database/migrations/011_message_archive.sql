@@ -0,0 +1,16 @@
+-- Cold message history moves to a compressed table (see
+-- app/communication/archive.py). archived_through_id is the highest
+-- archived message id of a conversation; 0 means nothing is archived.
+ALTER TABLE conversations
+  ADD COLUMN IF NOT EXISTS archived_through_id BIGINT NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS messages_archive (
+    id BIGINT PRIMARY KEY,
+    conversation_id BIGINT NOT NULL,
+    sender_id BIGINT NOT NULL,
+    receiver_id BIGINT NOT NULL,
+    content TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_messages_archive_conversation (conversation_id, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
@@ -0,0 +1,6 @@
+-- Composite indexes behind the keyset cursors of the public listings
+-- (app/utils/pagination.py). events pages on its primary key.
+ALTER TABLE startups ADD INDEX IF NOT EXISTS idx_startups_created_at_id (created_at, id);
+ALTER TABLE news ADD INDEX IF NOT EXISTS idx_news_news_date_id (news_date, id);
+ALTER TABLE investors ADD INDEX IF NOT EXISTS idx_investors_created_at_id (created_at, id);
+ALTER TABLE partners ADD INDEX IF NOT EXISTS idx_partners_created_at_id (created_at, id);
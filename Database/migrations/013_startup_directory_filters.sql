@@ -0,0 +1,8 @@
+-- Indexes behind the startup directory filters and facets
+-- (GET /api/startups/directory). Building the FULLTEXT index rewrites
+-- the table.
+ALTER TABLE startups
+  ADD INDEX IF NOT EXISTS idx_startups_sector (sector),
+  ADD INDEX IF NOT EXISTS idx_startups_maturity (maturity),
+  ADD INDEX IF NOT EXISTS idx_startups_project_status (project_status);
+ALTER TABLE startups ADD FULLTEXT INDEX IF NOT EXISTS ft_startups_search (name, email, address, description);
@@ -0,0 +1,7 @@
+-- FULLTEXT indexes behind GET /api/search. Column lists must match the
+-- MATCH() lists in app/routers/search.py. Each build rewrites its table.
+ALTER TABLE startups ADD FULLTEXT INDEX IF NOT EXISTS ft_startups_catalog (name, description, sector, needs);
+ALTER TABLE investors ADD FULLTEXT INDEX IF NOT EXISTS ft_investors_catalog (name, description, investment_focus, investor_type);
+ALTER TABLE partners ADD FULLTEXT INDEX IF NOT EXISTS ft_partners_catalog (name, description, partnership_type);
+ALTER TABLE news ADD FULLTEXT INDEX IF NOT EXISTS ft_news_catalog (title, description, category);
+ALTER TABLE events ADD FULLTEXT INDEX IF NOT EXISTS ft_events_catalog (name, description, event_type, target_audience);
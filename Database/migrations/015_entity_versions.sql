@@ -0,0 +1,13 @@
+-- Version counters behind the catalogue ETags (app/utils/conditional.py).
+-- Fresh databases get the same schema from init/001_schema.sql.
+CREATE TABLE IF NOT EXISTS entity_versions (
+  entity VARCHAR(32) PRIMARY KEY,
+  version BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO entity_versions (entity) VALUES
+  ('startups'),
+  ('investors'),
+  ('partners'),
+  ('news'),
+  ('events');
@@ -0,0 +1,5 @@
+-- Reconcile only deletes a synced row once it has been missing from two
+-- consecutive upstream walks; `missed` remembers the first miss.
+-- Fresh databases get the same schema from init/001_schema.sql.
+ALTER TABLE sync_rows
+  ADD COLUMN IF NOT EXISTS missed TINYINT NOT NULL DEFAULT 0 AFTER content_hash;
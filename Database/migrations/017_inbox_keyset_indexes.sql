@@ -0,0 +1,11 @@
+-- The inbox filters on userX_id and pages and orders by last_message_id;
+-- rebuild the per-participant indexes on that column (they were on
+-- last_message_at, which no query reads through).
+-- Fresh databases get the same schema from init/001_schema.sql.
+ALTER TABLE conversations
+  DROP INDEX IF EXISTS idx_conversations_user1_last,
+  DROP INDEX IF EXISTS idx_conversations_user2_last;
+
+ALTER TABLE conversations
+  ADD INDEX idx_conversations_user1_last (user1_id, last_message_id),
+  ADD INDEX idx_conversations_user2_last (user2_id, last_message_id);
@@ -0,0 +1,3 @@
+-- /communication/search covers archived messages too; index them the same
+-- way as the hot table. Building it rewrites messages_archive.
+ALTER TABLE messages_archive ADD FULLTEXT INDEX IF NOT EXISTS ft_messages_archive_content (content);
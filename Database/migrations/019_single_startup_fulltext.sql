@@ -0,0 +1,8 @@
+-- One FULLTEXT index on startups, shared by the directory filter and
+-- GET /api/search (STARTUP_SEARCH_COLUMNS in app/routers/startups.py);
+-- ft_startups_catalog duplicated most of ft_startups_search and doubled the
+-- FULLTEXT work on every startup write. Rebuilding rewrites the table.
+ALTER TABLE startups
+  DROP INDEX IF EXISTS ft_startups_catalog,
+  DROP INDEX IF EXISTS ft_startups_search;
+ALTER TABLE startups ADD FULLTEXT INDEX ft_startups_search (name, email, address, description, sector, needs);
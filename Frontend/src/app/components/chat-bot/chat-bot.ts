@@ -4,7 +4,7 @@ import { FormsModule } from '@angular/forms';
 import {BackendInterface} from "../../cores/interfaces/backend/backend-interface";
 import {AuthService} from '../../cores/services/auth-service/auth';
 import {interval, Subscription} from 'rxjs';
-import {Communication} from '../../cores/interfaces/backend/dtos';
+import {Communication, ChatMessageEvent} from '../../cores/interfaces/backend/dtos';
 
 @Component({
   selector: 'app-chat-bot',
@@ -28,6 +28,7 @@ export class ChatBot {
   conversation: Communication[] = []
   display_conversation: any = -1
   private reloadSub!: Subscription;
+  private socket: WebSocket | null = null;
   private backend = inject(BackendInterface);
   private auth = inject(AuthService);
   
@@ -43,8 +44,9 @@ export class ChatBot {
 
 
   ngOnInit(): void {
+    // Fallback polling, only while the message socket is not connected.
     this.reloadSub = interval(2000).subscribe(() => {
-      if (this.display_conversation !== -1) {
+      if (this.display_conversation !== -1 && !this.socketOpen()) {
         this.backend.get_Conversations_content(this.ids[this.display_conversation]).subscribe({
           next: (msg) => {
             this.conversation = msg;
@@ -61,17 +63,11 @@ export class ChatBot {
       this.logged = true;
       this.sender = this.auth.user.email;
       this.id_of_user = this.auth.user.id;
-      this.backend.get_Conversations_of_user(this.auth.user.id).subscribe({
-        next: (msg) => {
-            this.ids = msg;
-            for (let tmp of this.ids) {
-              console.log("tmp value in order: ", tmp)
-              this.get_last_message_and_email(tmp, this.id_of_user);
-            }
-      },})
-
+      this.connectSocket();
+      this.loadInbox();
     }
     else {
+      this.disconnectSocket();
       this.logged = false;
       this.email = []
       this.last_message = []
@@ -84,6 +80,52 @@ export class ChatBot {
     } 
   }
 
+  loadInbox(): void {
+      this.backend.getInbox(this.id_of_user).subscribe({
+        next: (inbox) => {
+            this.ids = inbox.map(entry => entry.conversation_id);
+            this.email = inbox.map(entry => entry.email);
+            this.last_message = inbox.map(entry => entry.last_message_preview);
+      },})
+  }
+
+  private socketOpen(): boolean {
+    return this.socket !== null && this.socket.readyState === WebSocket.OPEN;
+  }
+
+  private connectSocket(): void {
+    const token = this.auth.getToken();
+    if (!token || this.socket) return;
+    const socket = new WebSocket(this.backend.messageSocketUrl(token));
+    socket.onmessage = (raw) => this.onMessageEvent(JSON.parse(raw.data) as ChatMessageEvent);
+    socket.onclose = () => {
+      if (this.socket !== socket) return;
+      this.socket = null;
+      // Reconnect after a drop; the inbox reload catches up on anything missed.
+      if (this.logged) setTimeout(() => { this.connectSocket(); this.loadInbox(); }, 2000);
+    };
+    this.socket = socket;
+  }
+
+  private disconnectSocket(): void {
+    const socket = this.socket;
+    this.socket = null;
+    socket?.close();
+  }
+
+  private onMessageEvent(event: ChatMessageEvent): void {
+    const index = this.ids.indexOf(event.conversation_id);
+    if (index === -1) {
+      this.loadInbox();
+      return;
+    }
+    this.last_message[index] = event.content;
+    if (index === this.display_conversation) {
+      const sender_name = event.sender_id === this.id_of_user ? this.sender : this.email[index];
+      this.conversation = [...this.conversation, {sender_name, content: event.content, id: event.id}];
+    }
+  }
+
   toggleChat(): void {
     this.isOpen ? this.closeChat() : this.openChat();
   }
@@ -94,6 +136,7 @@ export class ChatBot {
 
   closeChat(): void {
     this.isOpen = false;
+    this.disconnectSocket();
     this.logged = false;
     this.email = []
     this.last_message = []
@@ -119,6 +162,7 @@ export class ChatBot {
           }
           },})
           this.display_conversation = id_list;
+          this.backend.markConversationRead(this.ids[id_list], this.id_of_user).subscribe();
           console.log("laaaaaaaaaaaaaaaaaaaaa ", this.email[this.display_conversation])
   }
 
@@ -132,6 +176,7 @@ export class ChatBot {
         next: () =>{
         this.last_message[this.display_conversation] = this.draft
         this.draft = '';
+        if (this.socketOpen()) return;
         this.conversation = []
         this.backend.get_Conversations_content(this.ids[this.display_conversation]).subscribe({
           next: (msg) => {
@@ -38,8 +38,8 @@ export class DashboardComponent {
         switchMap(link => {
           const sid = link?.startup_id;
           if (!sid) return of(0);
-          return this.backend.getStartup(sid).pipe(
-            map(s => s?.view_count ?? 0)
+          return this.backend.getStartupView(sid).pipe(
+            map(v => v?.view_count ?? 0)
           );
         })
       );
@@ -21,7 +21,7 @@ export class PartnersListComponent implements OnInit {
   private backend = inject(BackendInterface);
 
   ngOnInit() {
-    this.backend.getPartners(0, 100).subscribe({
+    this.backend.getPartners(null, 100).subscribe({
       next: (data) => {
         this.partners = data;
         this.loading = false;
@@ -1,8 +1,13 @@
-import {Component, Input} from '@angular/core';
+import {Component, DestroyRef, inject, OnInit} from '@angular/core';
 import {ActivatedRoute} from '@angular/router';
 import {CommonModule} from '@angular/common';
 import {FormsModule} from '@angular/forms';
-import type {StartupList as StartupListDTO} from '../../cores/interfaces/backend/dtos';
+import {Subject, switchMap} from 'rxjs';
+import {debounceTime} from 'rxjs/operators';
+import {takeUntilDestroyed} from '@angular/core/rxjs-interop';
+import type {
+  FacetCount, StartupFilters, StartupList as StartupListDTO
+} from '../../cores/interfaces/backend/dtos';
 import {StartupPopup} from "../startup-popup/startup-popup";
 import {BackendInterface} from "../../cores/interfaces/backend/backend-interface";
 
@@ -13,13 +18,19 @@ import {BackendInterface} from "../../cores/interfaces/backend/backend-interface
   templateUrl: './startup-list.html',
   styleUrl: './startup-list.css'
 })
-export class StartupList {
-  @Input() items: StartupListDTO[] = [];
+export class StartupList implements OnInit {
+  items: StartupListDTO[] = [];
+  facets: Record<string, FacetCount[]> = {};
+  nextCursor: string | null = null;
+  loading = false;
 
   query = '';
   filtersBy: string[] = ['sector', 'maturity'];
   filterValues: Record<string, string> = {};
 
+  private destroyRef = inject(DestroyRef);
+  private reload$ = new Subject<void>();
+
   constructor(private backend: BackendInterface, private route: ActivatedRoute) {
     this.filtersBy.forEach(k => (this.filterValues[k] ??= ''));
     this.route.queryParams.subscribe(params => {
@@ -30,39 +41,65 @@ export class StartupList {
     });
   }
 
+  ngOnInit(): void {
+    this.reload$.pipe(
+      debounceTime(250),
+      switchMap(() => {
+        this.loading = true;
+        return this.backend.getStartupDirectory(this.currentFilters());
+      }),
+      takeUntilDestroyed(this.destroyRef)
+    ).subscribe({
+      next: (page) => {
+        this.items = page.items;
+        this.facets = page.facets ?? {};
+        this.nextCursor = page.next_cursor;
+        this.loading = false;
+      },
+      error: () => (this.loading = false)
+    });
+    this.reload$.next();
+  }
+
   get filters(): string[][] {
     return this.filtersBy.map(field => {
-      const set = new Set(
-        this.items
-          .map(s => {
-            return ((s as any)?.[field] ?? '').toString().trim();
-          })
-          .filter(v => !!v)
-      );
-      const values = Array.from(set).sort((a, b) => a.localeCompare(b));
+      const values = (this.facets[field] ?? []).map(f => f.value);
+      const selected = this.filterValues[field];
+      if (selected && !values.includes(selected)) values.push(selected);
       return [field, ...values];
     });
   }
 
-  get filtered(): StartupListDTO[] {
-    const q = this.query.trim().toLowerCase();
+  facetCount(field: string, value: string): number | null {
+    return this.facets[field]?.find(f => f.value === value)?.count ?? null;
+  }
 
-    return this.items.filter(s => {
-      const matchesQuery =
-        !q ||
-        (s.name?.toLowerCase().includes(q)) ||
-        (s.email?.toLowerCase().includes(q)) ||
-        (s.address?.toLowerCase().includes(q));
+  onFiltersChange(): void {
+    this.reload$.next();
+  }
 
-      const matchesAllFilters = this.filtersBy.every(field => {
-        const filterVal = (this.filterValues[field] ?? '').trim().toLowerCase();
-        if (!filterVal) return true;
-        const itemVal = (((s as any)?.[field] ?? '') as string).toString().trim().toLowerCase();
-        return itemVal === filterVal;
-      });
+  loadMore(): void {
+    if (!this.nextCursor || this.loading) return;
+    this.loading = true;
+    this.backend.getStartupDirectory(this.currentFilters(), this.nextCursor).subscribe({
+      next: (page) => {
+        this.items = this.items.concat(page.items);
+        this.nextCursor = page.next_cursor;
+        this.loading = false;
+      },
+      error: () => (this.loading = false)
+    });
+  }
 
-      return matchesQuery && matchesAllFilters;
+  private currentFilters(): StartupFilters {
+    const filters: StartupFilters = {};
+    const q = this.query.trim();
+    if (q) filters.q = q;
+    this.filtersBy.forEach(field => {
+      const value = (this.filterValues[field] ?? '').trim();
+      if (value) (filters as Record<string, string>)[field] = value;
     });
+    return filters;
   }
 
 
@@ -77,4 +114,4 @@ export class StartupList {
     this.selectedId = null;
   }
 
-}
\ No newline at end of file
+}
@@ -18,6 +18,7 @@ export class StartupPopup implements OnChanges {
   loading = false;
   error: string | null = null;
   data: StartupDetail | null = null;
+  viewCount = 0;
   founderImages: Record<number, string> = {};
   @ViewChild('printSection') private printSection?: ElementRef<HTMLElement>;
 
@@ -34,6 +35,7 @@ export class StartupPopup implements OnChanges {
     this.loading = true;
     this.error = null;
     this.data = null;
+    this.viewCount = 0;
     this.clearFounderImages();
 
     this.backend.getStartup(this.startupId).subscribe({
@@ -48,6 +50,14 @@ export class StartupPopup implements OnChanges {
         console.error(e);
       }
     });
+    this.backend.getStartupView(this.startupId).subscribe({
+      next: (v) => {
+        this.viewCount = v?.view_count ?? 0;
+      },
+      error: (e) => {
+        console.warn('Startup view count not found', this.startupId, e);
+      }
+    });
   }
 
   private loadFounderImages(): void {
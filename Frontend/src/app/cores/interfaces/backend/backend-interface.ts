@@ -1,14 +1,17 @@
-import {Observable} from "rxjs";
+import {EMPTY, Observable} from "rxjs";
+import {expand, map, reduce} from "rxjs/operators";
 import {Injectable} from "@angular/core";
 import {HttpInterface, RequestOptions} from "../http/http-interface";
 import {
-  Event, Investor, News, NewsDetail, Partner, StartupDetail, StartupList, User, Communication, Conversations,
-  UserStartup, TotalStartupView
+  Event, Investor, News, NewsDetail, Partner, StartupDetail, StartupList, User, Communication, Conversations, InboxEntry,
+  UserStartup, StartupViewCount, TotalStartupView, Page, StartupDirectory, StartupFilters, SearchHit, SearchType
 } from "./dtos";
 
 @Injectable({providedIn: 'root'})
 export class BackendInterface {
 
+  private readonly MAX_PAGE_SIZE = 200;
+
   constructor(private http: HttpInterface) {
   }
 
@@ -20,6 +23,21 @@ export class BackendInterface {
     return query ? `?${query}` : "";
   }
 
+  private getPage<T>(path: string, cursor?: string | null, limit?: number, options?: RequestOptions): Observable<Page<T>> {
+    let qs = this.buildQuery({cursor, limit});
+    if (qs && path.includes("?")) qs = `&${qs.slice(1)}`;
+    return this.http.getResponse<T[]>(`${path}${qs}`, options).pipe(
+      map((res) => ({items: res.body ?? [], nextCursor: res.headers.get('X-Next-Cursor')}))
+    );
+  }
+
+  private getAllPages<T>(path: string, options?: RequestOptions): Observable<T[]> {
+    return this.getPage<T>(path, null, this.MAX_PAGE_SIZE, options).pipe(
+      expand((page) => page.nextCursor ? this.getPage<T>(path, page.nextCursor, this.MAX_PAGE_SIZE, options) : EMPTY),
+      reduce((all, page) => all.concat(page.items), [] as T[])
+    );
+  }
+
   requestRegister(email: string): Observable<{ detail: string }> {
     return this.http.post<{ detail: string }>(
       `/auth/request-register`,
@@ -86,11 +104,27 @@ export class BackendInterface {
     );
   }
 
-  getStartups(skip?: number, limit?: number, options?: RequestOptions): Observable<StartupList[]> {
-    const qs = this.buildQuery({skip, limit});
+  getStartups(cursor?: string | null, limit?: number, options?: RequestOptions): Observable<StartupList[]> {
+    const qs = this.buildQuery({cursor, limit});
     return this.http.get<StartupList[]>(`/startups/${qs}`, options);
   }
 
+  getAllStartups(options?: RequestOptions): Observable<StartupList[]> {
+    return this.getAllPages<StartupList>(`/startups/`, options);
+  }
+
+  getStartupDirectory(filters: StartupFilters, cursor?: string | null, limit?: number,
+                      options?: RequestOptions): Observable<StartupDirectory> {
+    const qs = this.buildQuery({...filters, cursor, limit});
+    return this.http.get<StartupDirectory>(`/startups/directory${qs}`, options);
+  }
+
+  search(q: string, types?: SearchType[], cursor?: string | null, limit?: number,
+         options?: RequestOptions): Observable<Page<SearchHit>> {
+    const typeQs = (types ?? []).map(t => `&type=${encodeURIComponent(t)}`).join("");
+    return this.getPage<SearchHit>(`/search${this.buildQuery({q})}${typeQs}`, cursor, limit, options);
+  }
+
   getStartup(startupId: number, options?: RequestOptions): Observable<StartupDetail> {
     return this.http.get<StartupDetail>(`/startups/${encodeURIComponent(String(startupId))}`, options);
   }
@@ -103,11 +137,15 @@ export class BackendInterface {
     return this.http.get<{ image_url: string }>(`/founders/${encodeURIComponent(String(founderId))}/image`, options);
   }
 
-  getInvestors(skip?: number, limit?: number, options?: RequestOptions): Observable<Investor[]> {
-    const qs = this.buildQuery({skip, limit});
+  getInvestors(cursor?: string | null, limit?: number, options?: RequestOptions): Observable<Investor[]> {
+    const qs = this.buildQuery({cursor, limit});
     return this.http.get<Investor[]>(`/investors${qs}`, options);
   }
 
+  getAllInvestors(options?: RequestOptions): Observable<Investor[]> {
+    return this.getAllPages<Investor>(`/investors`, options);
+  }
+
   getInvestor(investorId: number, options?: RequestOptions): Observable<Investor> {
     return this.http.get<Investor>(`/investors/${encodeURIComponent(String(investorId))}`, options);
   }
@@ -119,20 +157,28 @@ export class BackendInterface {
     );
   }
 
-  getPartners(skip?: number, limit?: number, options?: RequestOptions): Observable<Partner[]> {
-    const qs = this.buildQuery({skip, limit});
+  getPartners(cursor?: string | null, limit?: number, options?: RequestOptions): Observable<Partner[]> {
+    const qs = this.buildQuery({cursor, limit});
     return this.http.get<Partner[]>(`/partners${qs}`, options);
   }
 
+  getAllPartners(options?: RequestOptions): Observable<Partner[]> {
+    return this.getAllPages<Partner>(`/partners`, options);
+  }
+
   getPartner(partnerId: number, options?: RequestOptions): Observable<Partner> {
     return this.http.get<Partner>(`/partners/${encodeURIComponent(String(partnerId))}`, options);
   }
 
-  getNews(skip?: number, limit?: number, options?: RequestOptions): Observable<News[]> {
-    const qs = this.buildQuery({skip, limit});
+  getNews(cursor?: string | null, limit?: number, options?: RequestOptions): Observable<News[]> {
+    const qs = this.buildQuery({cursor, limit});
     return this.http.get<News[]>(`/news/${qs}`, options);
   }
 
+  getAllNews(options?: RequestOptions): Observable<News[]> {
+    return this.getAllPages<News>(`/news/`, options);
+  }
+
   getNewsItem(newsId: number, options?: RequestOptions): Observable<NewsDetail> {
     return this.http.get<NewsDetail>(`/news/${encodeURIComponent(String(newsId))}`, options);
   }
@@ -144,11 +190,15 @@ export class BackendInterface {
     );
   }
 
-  getEvents(skip?: number, limit?: number, options?: RequestOptions): Observable<Event[]> {
-    const qs = this.buildQuery({skip, limit});
+  getEvents(cursor?: string | null, limit?: number, options?: RequestOptions): Observable<Event[]> {
+    const qs = this.buildQuery({cursor, limit});
     return this.http.get<Event[]>(`/events/${qs}`, options);
   }
 
+  getAllEvents(options?: RequestOptions): Observable<Event[]> {
+    return this.getAllPages<Event>(`/events/`, options);
+  }
+
   getEvent(eventId: number, options?: RequestOptions): Observable<Event> {
     return this.http.get<Event>(`/events/${encodeURIComponent(String(eventId))}`, options);
   }
@@ -218,8 +268,8 @@ export class BackendInterface {
     return this.http.post<unknown>(`/startups/${encodeURIComponent(String(startupId))}/view/`, options);
   }
 
-  getStartupView(startupId: number, options?: RequestOptions): Observable<unknown> {
-    return this.http.get<unknown>(`/startups/${encodeURIComponent(String(startupId))}/view/`, options);
+  getStartupView(startupId: number, options?: RequestOptions): Observable<StartupViewCount> {
+    return this.http.get<StartupViewCount>(`/startups/${encodeURIComponent(String(startupId))}/view/`, options);
   }
 
   incrementNewsView(newsId: number, options?: RequestOptions): Observable<unknown> {
@@ -385,6 +435,20 @@ export class BackendInterface {
   get_Conversations_content(conversation_id: number, options?: RequestOptions): Observable<Communication[]> {
     return this.http.get<Communication[]>(`communication/read_conversation/${encodeURIComponent(Number(conversation_id))}`, options)
   }
+  messageSocketUrl(token: string): string {
+    const base = this.http.getBaseUrl();
+    const origin = /^https?:\/\//.test(base)
+      ? base.replace(/^http/, 'ws')
+      : `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}${base}`;
+    return `${origin}/communication/ws?token=${encodeURIComponent(token)}`;
+  }
+  getInbox(userId: number, before?: number, options?: RequestOptions): Observable<InboxEntry[]> {
+    const query = before !== undefined ? `?before=${encodeURIComponent(Number(before))}` : '';
+    return this.http.get<InboxEntry[]>(`/communication/inbox/${encodeURIComponent(Number(userId))}${query}`, options)
+  }
+  markConversationRead(conversationId: number, userId: number, options?: RequestOptions): Observable<unknown> {
+    return this.http.post<unknown>(`/communication/read/${encodeURIComponent(Number(conversationId))}/user/${encodeURIComponent(Number(userId))}`, {}, options)
+  }
   get_last_message_by_id(id_of_conv: number, user: number, options?: RequestOptions): Observable<Communication> {
     return this.http.get<Communication>(`/communication/read_last_message_by_id/${encodeURIComponent(Number(id_of_conv))}/user/${encodeURIComponent(Number(user))}`, options)
   }
@@ -84,6 +84,35 @@ export interface StartupList {
     maturity?: string | null;
 }
 
+export interface FacetCount {
+    value: string;
+    count: number;
+}
+
+export interface StartupFilters {
+    q?: string;
+    sector?: string;
+    maturity?: string;
+    project_status?: string;
+}
+
+export interface StartupDirectory {
+    items: StartupList[];
+    facets: { sector: FacetCount[]; maturity: FacetCount[] } | null;
+    next_cursor: string | null;
+}
+
+export type SearchType = 'startup' | 'investor' | 'partner' | 'news' | 'event';
+
+export interface SearchHit {
+    type: SearchType;
+    id: number;
+    title: string;
+    score: number;
+    snippet?: string | null;
+    highlights: number[][];
+}
+
 export interface User {
     id: number;
     email: string;
@@ -106,6 +135,18 @@ export interface HTTPValidationError {
 export interface Communication {
     sender_name: string;
     content: string;
+    id?: number | null;
+    created_at?: string | null;
+}
+
+export interface ChatMessageEvent {
+    type: 'message';
+    conversation_id: number;
+    id: number;
+    sender_id: number;
+    receiver_id: number;
+    content: string;
+    created_at: string;
 }
 
 export interface Conversations {
@@ -113,15 +154,38 @@ export interface Conversations {
     chat_with: string;
 }
 
+export interface InboxEntry {
+    conversation_id: number;
+    user_id: number;
+    name?: string | null;
+    email: string;
+    last_message_id: number;
+    last_sender_id: number;
+    last_message_preview: string;
+    last_message_at?: string | null;
+    unread: number;
+    other_last_read_id: number;
+}
+
 export interface UserStartup {
   user_id?: number | null,
   startup_id?: number | null,
 }
 
+export interface StartupViewCount {
+  startup_id: number;
+  view_count: number;
+}
+
 export interface TotalStartupView {
   total_views?: number | null;
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
 export type StartupListResponse = StartupList[];
 export type InvestorListResponse = Investor[];
 export type PartnerListResponse = Partner[];
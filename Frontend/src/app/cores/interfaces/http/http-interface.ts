@@ -4,6 +4,7 @@ import {
   HttpErrorResponse,
   HttpHeaders,
   HttpParams,
+  HttpResponse,
 } from '@angular/common/http';
 import {Observable, throwError} from 'rxjs';
 import {catchError} from 'rxjs/operators';
@@ -50,6 +51,14 @@ export class HttpInterface {
     );
   }
 
+  getResponse<T>(path: string, options?: RequestOptions): Observable<HttpResponse<T>> {
+    const url = options?.absolutePath ? this.buildAbsoluteUrl(path) : this.buildUrl(path);
+    const httpOptions = this.buildOptions(options);
+    return this.http.get<T>(url, {...httpOptions, observe: 'response'}).pipe(
+      catchError((err) => this.handleError<HttpResponse<T>>('GET', url, err))
+    );
+  }
+
   post<T>(path: string, body?: unknown, options?: RequestOptions): Observable<T> {
     const url = options?.absolutePath ? this.buildAbsoluteUrl(path) : this.buildUrl(path);
     const httpOptions = this.buildOptions(options);
@@ -1,6 +1,6 @@
 import { Injectable, inject } from '@angular/core';
-import { Observable, ReplaySubject, of, EMPTY } from 'rxjs';
-import { catchError, expand, map, reduce, shareReplay, switchMap, tap } from 'rxjs/operators';
+import { Observable, ReplaySubject, of } from 'rxjs';
+import { catchError, map, shareReplay, switchMap, tap } from 'rxjs/operators';
 import {BackendInterface} from "../../interfaces/backend/backend-interface";
 import {StartupList} from "../../interfaces/backend/dtos";
 
@@ -9,7 +9,6 @@ export class DataCacheService {
   private backend = inject(BackendInterface);
 
   private startupsCache$?: Observable<StartupList[]>;
-  private readonly PAGE_SIZE = 100;
 
   getStartups$(): Observable<StartupList[]> {
     if (!this.startupsCache$) {
@@ -27,19 +26,8 @@ export class DataCacheService {
   }
 
   private loadAllStartups$(): Observable<StartupList[]> {
-    const firstPage$ = this.backend.getStartups(0, this.PAGE_SIZE).pipe(
-      catchError(() => of([] as StartupList[]))
-    );
-
-    return firstPage$.pipe(
-      expand((page, i) => {
-        if (!page || page.length < this.PAGE_SIZE) return EMPTY;
-        const nextSkip = (i + 1) * this.PAGE_SIZE;
-        return this.backend.getStartups(nextSkip, this.PAGE_SIZE).pipe(
-          catchError(() => of([] as StartupList[]))
-        );
-      }),
-      reduce((acc, page) => acc.concat(page ?? []), [] as StartupList[]),
+    return this.backend.getAllStartups().pipe(
+      catchError(() => of([] as StartupList[])),
       map((all) => [...all].sort((a, b) => a.name.localeCompare(b.name)))
     );
   }
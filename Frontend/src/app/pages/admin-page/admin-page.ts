@@ -92,7 +92,7 @@ export class AdminPage implements OnInit {
   private loadStartups() {
     this.loading.set(true);
     this.errorMsg.set(null);
-    this.backend.getStartups(0, 500).subscribe({
+    this.backend.getAllStartups().subscribe({
       next: (res: any) => {
         const items = this.normalizeListResponse(res);
         this.startups = items ?? [];
@@ -108,7 +108,7 @@ export class AdminPage implements OnInit {
   private loadInvestors() {
     this.loading.set(true);
     this.errorMsg.set(null);
-    this.backend.getInvestors(0, 500).subscribe({
+    this.backend.getAllInvestors().subscribe({
       next: (res: any) => {
         const items = this.normalizeListResponse(res);
         this.investors = items ?? [];
@@ -124,7 +124,7 @@ export class AdminPage implements OnInit {
   private loadPartners() {
     this.loading.set(true);
     this.errorMsg.set(null);
-    this.backend.getPartners(0, 500).subscribe({
+    this.backend.getAllPartners().subscribe({
       next: (res: any) => {
         const items = this.normalizeListResponse(res);
         this.partners = items ?? [];
@@ -140,7 +140,7 @@ export class AdminPage implements OnInit {
   private loadNews() {
     this.loading.set(true);
     this.errorMsg.set(null);
-    this.backend.getNews(0, 500).subscribe({
+    this.backend.getAllNews().subscribe({
       next: (res: any) => {
         const items = this.normalizeListResponse(res);
         this.news = items ?? [];
@@ -156,7 +156,7 @@ export class AdminPage implements OnInit {
   private loadEvents() {
     this.loading.set(true);
     this.errorMsg.set(null);
-    this.backend.getEvents(0, 500).subscribe({
+    this.backend.getAllEvents().subscribe({
       next: (res: any) => {
         const items = this.normalizeListResponse(res);
         this.events = items ?? [];